@@ -3,6 +3,13 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Requests to ``REALTIME_CAMINHO`` are served by the server-sent events stream
+(sophia.realtime.sse) without going through the Django middleware stack, so
+each open connection only costs a coroutine. Everything else goes to Django.
+Run it with an ASGI server, e.g.:
+
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -13,4 +20,13 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+from sophia.realtime.sse import aplicacao_eventos  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] == settings.REALTIME_CAMINHO:
+        return await aplicacao_eventos(scope, receive, send)
+    return await django_application(scope, receive, send)
\ No newline at end of file
@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # Terceiros
     'rest_framework',
@@ -213,3 +214,118 @@ ASAAS_ENVIRONMENT = config('ASAAS_ENVIRONMENT', default='sandbox')  # ou 'produc
 SUPABASE_URL = config('SUPABASE_URL', default='')
 SUPABASE_KEY = config('SUPABASE_KEY', default='')
 SUPABASE_STORAGE_BUCKET = config('SUPABASE_STORAGE_BUCKET', default='uploads')
+
+# Anexos enviados direto ao Storage por URL assinada (mesmo limite do nginx)
+ANEXOS_TAMANHO_MAXIMO = config('ANEXOS_TAMANHO_MAXIMO', default=100 * 1024 * 1024, cast=int)
+ANEXOS_VALIDADE_UPLOAD_SEGUNDOS = 2 * 60 * 60  # Validade das URLs de upload do Supabase
+ANEXOS_VALIDADE_URL_SEGUNDOS = 60 * 60  # URLs assinadas de leitura dos objetos deduplicados
+ANEXOS_INDEXACAO_WORKERS = config('ANEXOS_INDEXACAO_WORKERS', default=2, cast=int)  # Hash dos uploads diretos
+
+# Miniaturas dos anexos de imagem (lado máximo em px; WebP + JPEG de cada)
+MINIATURAS_ATIVAS = config('MINIATURAS_ATIVAS', default=True, cast=bool)
+MINIATURAS_WORKERS = config('MINIATURAS_WORKERS', default=2, cast=int)
+MINIATURAS_TAMANHOS = [160, 480, 1080]
+MINIATURAS_QUALIDADE = config('MINIATURAS_QUALIDADE', default=80, cast=int)
+
+# Média anual mínima para aprovação na disciplina (boletim da turma)
+BOLETIM_MEDIA_APROVACAO = config('BOLETIM_MEDIA_APROVACAO', default=6.0, cast=float)
+# Frequência mínima legal (%) abaixo da qual o aluno é sinalizado
+FREQUENCIA_MINIMA = config('FREQUENCIA_MINIMA', default=75, cast=float)
+
+
+# =========================
+# CACHE
+# =========================
+# Com vários processos (workers do gunicorn, notificacoes, sla) o cache precisa
+# ser compartilhado; o docker-compose usa o Redis:
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache e CACHE_LOCATION=redis://redis:6379/1
+CACHE_BACKEND = config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': config('CACHE_LOCATION', default='sophia'),
+    }
+}
+# LocMem/Dummy são por processo: escritas feitas em outro processo não chegam
+CACHE_COMPARTILHADO = not CACHE_BACKEND.endswith(('LocMemCache', 'DummyCache'))
+if CACHE_BACKEND.endswith('LocMemCache'):
+    # O limite padrão (300 chaves) descartaria os contadores de badges
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': 100000}
+# Validade dos contadores de badges (limita a defasagem se um incremento se perder).
+# Sem cache compartilhado o padrão é 0: os badges são sempre calculados no banco
+BADGES_CACHE_SEGUNDOS = config('BADGES_CACHE_SEGUNDOS', default=300 if CACHE_COMPARTILHADO else 0, cast=int)
+# Participações/papéis nos canais compartilhados entre requisições (0 = só por requisição).
+# Sem cache compartilhado o padrão é 0: a invalidação não chegaria aos outros processos
+ACESSO_CANAIS_CACHE_SEGUNDOS = config('ACESSO_CANAIS_CACHE_SEGUNDOS', default=60 if CACHE_COMPARTILHADO else 0, cast=int)
+
+
+# =========================
+# REALTIME (SSE)
+# =========================
+# O broker em memória só alcança as conexões do próprio processo: com ele, o servidor
+# ASGI roda com um único worker e os eventos publicados pelos processos de fundo
+# (verificar_sla, despachar_notificacoes) se perdem. Com vários workers ou processos
+# de fundo use sophia.realtime.broker.BrokerRedis (padrão no docker-compose)
+REALTIME_BROKER = config('REALTIME_BROKER', default='sophia.realtime.broker.BrokerEmMemoria')
+REALTIME_REDIS_URL = config('REALTIME_REDIS_URL', default='redis://localhost:6379/2')  # BrokerRedis
+REALTIME_CAMINHO = '/api/eventos/'
+REALTIME_HEARTBEAT_SEGUNDOS = config('REALTIME_HEARTBEAT_SEGUNDOS', default=15, cast=int)
+REALTIME_FILA_MAXIMA = config('REALTIME_FILA_MAXIMA', default=100, cast=int)
+
+
+# =========================
+# MENSAGENS
+# =========================
+# Níveis de respostas incluídos em cada mensagem (sobrescrito por ?profundidade=)
+MENSAGENS_PROFUNDIDADE_THREAD = config('MENSAGENS_PROFUNDIDADE_THREAD', default=2, cast=int)
+
+
+# =========================
+# DELTA SYNC
+# =========================
+# Janela de sobreposição que cobre transações confirmadas após a marca d'água
+SYNC_SOBREPOSICAO_SEGUNDOS = config('SYNC_SOBREPOSICAO_SEGUNDOS', default=10, cast=int)
+SYNC_LIMITE_MENSAGENS = config('SYNC_LIMITE_MENSAGENS', default=500, cast=int)
+
+
+# =========================
+# NOTIFICAÇÕES (OUTBOX)
+# =========================
+# Com False, apenas o comando despachar_notificacoes processa a outbox
+NOTIFICACOES_DESPACHO_IMEDIATO = config('NOTIFICACOES_DESPACHO_IMEDIATO', default=True, cast=bool)
+NOTIFICACOES_TAMANHO_LOTE = config('NOTIFICACOES_TAMANHO_LOTE', default=500, cast=int)
+NOTIFICACOES_MAX_TENTATIVAS = config('NOTIFICACOES_MAX_TENTATIVAS', default=5, cast=int)
+
+
+# =========================
+# SLA DE CONVERSAS
+# =========================
+# Conversas marcadas por lote no comando verificar_sla
+SLA_TAMANHO_LOTE = config('SLA_TAMANHO_LOTE', default=500, cast=int)
+
+
+# =========================
+# AUDITORIA (WRITE-BEHIND)
+# =========================
+# Com False, cada entrada é gravada na própria requisição
+AUDITORIA_BUFFER_ATIVO = config('AUDITORIA_BUFFER_ATIVO', default=True, cast=bool)
+AUDITORIA_TAMANHO_LOTE = config('AUDITORIA_TAMANHO_LOTE', default=200, cast=int)
+AUDITORIA_INTERVALO_SEGUNDOS = config('AUDITORIA_INTERVALO_SEGUNDOS', default=2.0, cast=float)
+AUDITORIA_BUFFER_MAXIMO = config('AUDITORIA_BUFFER_MAXIMO', default=10000, cast=int)
+
+
+# =========================
+# PARTICIONAMENTO (AUDITORIA E LOGINS)
+# =========================
+# Tabela -> coluna das partições mensais e meses mantidos pela retenção
+PARTICIONAMENTO_TABELAS = {
+    'auditoria_conversa': {
+        'coluna': 'criado_em',
+        'retencao_meses': config('RETENCAO_AUDITORIA_MESES', default=24, cast=int),
+    },
+    'historico_logins': {
+        'coluna': 'timestamp',
+        'retencao_meses': config('RETENCAO_LOGINS_MESES', default=12, cast=int),
+    },
+}
+PARTICIONAMENTO_MESES_A_FRENTE = config('PARTICIONAMENTO_MESES_A_FRENTE', default=3, cast=int)
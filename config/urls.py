@@ -52,7 +52,8 @@ from sophia.views import (
     CanalComunicacaoViewSet,
     MensagemCanalViewSet,
     NotificacaoComunicacaoViewSet,
-    AuditoriaConversaViewSet
+    AuditoriaConversaViewSet,
+    badges_view
 )
 
 from sophia.webhooks.asaas_webhook import asaas_webhook
@@ -115,6 +116,9 @@ urlpatterns = [
     path('api/auth/perfil/', perfil_usuario, name='perfil'),
     path('api/auth/atualizar-perfil/', atualizar_perfil, name='atualizar-perfil'),
 
+    # ============ COMUNICAÇÃO ============
+    path('api/badges/', badges_view, name='badges'),
+
     # ============ API PRINCIPAL ============
     path('api/', include(router.urls)),
 
@@ -5,8 +5,9 @@ from .models import (
     AlunoResponsavel, AnoLetivo, Turma, Disciplina, TurmaDisciplina,
     PeriodoAvaliativo, Nota, Frequencia, Mensalidade, Aviso,
     Mensagem, AtividadeAgenda, Evento, TokenRedefinicaoSenha,
-    HistoricoLogin, SessaoUsuario
+    HistoricoLogin, SessaoUsuario, CanalComunicacao, ParticipanteCanal
 )
+from .services.acesso_canais import acessos_alterados, coordenadores_alterados
 
 
 @admin.register(User)
@@ -68,6 +69,22 @@ class TurmaAdmin(admin.ModelAdmin):
     list_filter = ['turno', 'escola', 'ano_letivo']
     search_fields = ['nome', 'serie']
 
+    def save_model(self, request, obj, form, change):
+        anterior = form.initial.get('coordenador') if change else None
+        super().save_model(request, obj, form, change)
+        if 'coordenador' in form.changed_data:
+            coordenadores_alterados(anterior, obj.coordenador_id)
+
+    def delete_model(self, request, obj):
+        coordenador_id = obj.coordenador_id
+        super().delete_model(request, obj)
+        coordenadores_alterados(coordenador_id)
+
+    def delete_queryset(self, request, queryset):
+        coordenador_ids = list(queryset.values_list('coordenador_id', flat=True))
+        super().delete_queryset(request, queryset)
+        coordenadores_alterados(*coordenador_ids)
+
 
 @admin.register(Disciplina)
 class DisciplinaAdmin(admin.ModelAdmin):
@@ -134,6 +151,66 @@ class EventoAdmin(admin.ModelAdmin):
     date_hierarchy = 'data'
 
 
+def _usuarios_dos_canais(canais):
+    """Administradores e participantes dos canais, cujo acesso muda junto com eles"""
+    administradores = CanalComunicacao.administradores.through.objects.filter(
+        canalcomunicacao__in=canais
+    ).values_list('user_id', flat=True)
+    participantes = ParticipanteCanal.objects.filter(canal__in=canais).values_list('usuario_id', flat=True)
+    return set(administradores) | set(participantes)
+
+
+@admin.register(CanalComunicacao)
+class CanalComunicacaoAdmin(admin.ModelAdmin):
+    list_display = ['nome', 'tipo', 'escola', 'turma', 'status', 'total_participantes', 'criado_em']
+    list_filter = ['tipo', 'status', 'escola']
+    search_fields = ['nome', 'descricao']
+    filter_horizontal = ['administradores']
+    readonly_fields = [
+        'total_participantes', 'total_mensagens', 'ultima_mensagem', 'ultima_mensagem_em', 'ultima_mensagem_resumo'
+    ]
+
+    def save_related(self, request, form, formsets, change):
+        anteriores = set(form.instance.administradores.values_list('id', flat=True)) if change else set()
+        super().save_related(request, form, formsets, change)
+        alterados = anteriores ^ set(form.instance.administradores.values_list('id', flat=True))
+        if alterados:
+            acessos_alterados(alterados)
+
+    def delete_model(self, request, obj):
+        usuario_ids = _usuarios_dos_canais([obj.id])
+        super().delete_model(request, obj)
+        acessos_alterados(usuario_ids)
+
+    def delete_queryset(self, request, queryset):
+        usuario_ids = _usuarios_dos_canais(queryset.values('id'))
+        super().delete_queryset(request, queryset)
+        acessos_alterados(usuario_ids)
+
+
+@admin.register(ParticipanteCanal)
+class ParticipanteCanalAdmin(admin.ModelAdmin):
+    list_display = ['usuario', 'canal', 'papel', 'ativo', 'adicionado_em']
+    list_filter = ['papel', 'ativo']
+    search_fields = ['usuario__first_name', 'usuario__last_name', 'canal__nome']
+    raw_id_fields = ['canal', 'usuario', 'adicionado_por', 'ultima_mensagem_lida']
+
+    def save_model(self, request, obj, form, change):
+        anterior = form.initial.get('usuario') if change else None
+        super().save_model(request, obj, form, change)
+        acessos_alterados({usuario_id for usuario_id in (anterior, obj.usuario_id) if usuario_id})
+
+    def delete_model(self, request, obj):
+        usuario_id = obj.usuario_id
+        super().delete_model(request, obj)
+        acessos_alterados([usuario_id])
+
+    def delete_queryset(self, request, queryset):
+        usuario_ids = set(queryset.values_list('usuario_id', flat=True))
+        super().delete_queryset(request, queryset)
+        acessos_alterados(usuario_ids)
+
+
 @admin.register(HistoricoLogin)
 class HistoricoLoginAdmin(admin.ModelAdmin):
     list_display = ['usuario', 'sucesso', 'ip_address', 'cidade', 'timestamp']
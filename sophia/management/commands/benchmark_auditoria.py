@@ -0,0 +1,82 @@
+"""
+Benchmark de gravação da auditoria de conversas
+Salve em: sophia/management/commands/benchmark_auditoria.py
+
+Compara o create síncrono (comportamento anterior) com o escritor em
+buffer (bulk_create por lote/intervalo) em um canal temporário.
+
+Grava na auditoria do banco configurado: só roda com DEBUG ou --sim.
+
+Uso: python manage.py benchmark_auditoria --sim --entradas 5000
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from sophia.models import AuditoriaConversa, CanalComunicacao, Escola, User
+from sophia.services.auditoria import EscritorAuditoria
+
+
+class Command(BaseCommand):
+    """Mede a vazão de escrita da auditoria"""
+    help = 'Compara a gravação síncrona da auditoria com o escritor em buffer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entradas', type=int, default=5000)
+        parser.add_argument('--lote', type=int, default=settings.AUDITORIA_TAMANHO_LOTE)
+        parser.add_argument('--sim', action='store_true', help='Confirma a execução fora do DEBUG')
+
+    def handle(self, *args, **options):
+        if not (settings.DEBUG or options['sim']):
+            raise CommandError('Cria dados no banco configurado: use DEBUG=True ou confirme com --sim')
+
+        escola = Escola.objects.first()
+        usuario = User.objects.first()
+        if not escola or not usuario:
+            raise CommandError('É necessário ao menos uma escola e um usuário cadastrados')
+
+        canal = CanalComunicacao.objects.create(
+            escola=escola,
+            tipo='GRUPO_PROJETO',
+            nome='[benchmark] auditoria',
+            criado_por=usuario
+        )
+        total = options['entradas']
+
+        def entrada(i):
+            return dict(
+                usuario=usuario,
+                acao='MENSAGEM_ENVIADA',
+                canal=canal,
+                detalhes={'tipo': 'TEXTO', 'sequencia': i},
+                ip_address='127.0.0.1'
+            )
+
+        try:
+            self.stdout.write(f'📝 Gravando {total} entradas de forma síncrona...')
+            inicio = time.perf_counter()
+            for i in range(total):
+                AuditoriaConversa.objects.create(**entrada(i))
+            sincrono = time.perf_counter() - inicio
+
+            self.stdout.write(f'📝 Gravando {total} entradas pelo buffer (lote {options["lote"]})...')
+            escritor = EscritorAuditoria(tamanho_lote=options['lote'], intervalo=0.5, tamanho_maximo=total + 1)
+            inicio = time.perf_counter()
+            for i in range(total):
+                escritor.adicionar(AuditoriaConversa(**entrada(i)))
+            chamadas = time.perf_counter() - inicio
+            escritor.descarregar()
+            buffer = time.perf_counter() - inicio
+
+            gravadas = AuditoriaConversa.objects.filter(canal=canal).count()
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('DELETE FROM auditoria_conversa WHERE canal_id = %s', [canal.id])
+            canal.delete()
+
+        self.stdout.write(self.style.SUCCESS('✅ Resultado'))
+        self.stdout.write(f'   Entradas gravadas:                {gravadas} (esperado {total * 2})')
+        self.stdout.write(f'   Síncrono:  {total / sincrono:10.0f} entradas/s   {sincrono / total * 1000:.3f} ms por chamada')
+        self.stdout.write(f'   Buffer:    {total / buffer:10.0f} entradas/s   {chamadas / total * 1000:.3f} ms por chamada')
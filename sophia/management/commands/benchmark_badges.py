@@ -0,0 +1,136 @@
+"""
+Benchmark dos badges de não lidos
+Salve em: sophia/management/commands/benchmark_badges.py
+
+Simula um pico com usuários temporários em canais de grupo: mensagens
+chegando, leituras de canais e o app consultando os badges. Mede a taxa de
+acerto do cache e compara a leitura em cache com o cálculo no banco.
+
+Grava usuários e canais no banco configurado: só roda com DEBUG ou --sim.
+Do cache, descarta apenas as chaves dos usuários do benchmark.
+
+Uso: python manage.py benchmark_badges --sim --usuarios 300 --consultas 20000
+"""
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from sophia.models import CanalComunicacao, Escola, MensagemCanal, NotificacaoComunicacao, ParticipanteCanal, User
+from sophia.services import badges
+from sophia.services.notificacoes import registrar_notificacoes
+
+
+class Command(BaseCommand):
+    """Mede a taxa de acerto e a latência do endpoint de badges"""
+    help = 'Simula um pico de mensagens e consultas de badges'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=300)
+        parser.add_argument('--canais', type=int, default=10)
+        parser.add_argument('--consultas', type=int, default=20000)
+        parser.add_argument('--mensagens', type=int, default=500)
+        parser.add_argument('--leituras', type=int, default=500, help='Canais abertos durante o pico')
+        parser.add_argument('--sim', action='store_true', help='Confirma a execução fora do DEBUG')
+
+    def handle(self, *args, **options):
+        if not (settings.DEBUG or options['sim']):
+            raise CommandError('Cria dados no banco configurado: use DEBUG=True ou confirme com --sim')
+
+        escola = Escola.objects.first()
+        if not escola:
+            raise CommandError('É necessário ao menos uma escola cadastrada')
+
+        usuarios = User.objects.bulk_create([
+            User(username=f'benchmark_badges_{i}', first_name='Benchmark', role='RESPONSAVEL')
+            for i in range(options['usuarios'])
+        ])
+        canais = []
+        try:
+            for i in range(options['canais']):
+                canal = CanalComunicacao.objects.create(
+                    escola=escola, tipo='GRUPO_TURMA', nome=f'[benchmark] badges {i}', criado_por=usuarios[0]
+                )
+                membros = random.sample(usuarios, k=max(2, len(usuarios) // 3))
+                ParticipanteCanal.objects.bulk_create([
+                    ParticipanteCanal(canal=canal, usuario=usuario) for usuario in membros
+                ])
+                canais.append((canal, membros))
+
+            self._limpar_cache(usuarios, canais)
+            self._simular(canais, usuarios, options)
+            self._comparar(usuarios, canais)
+        finally:
+            self._limpar_cache(usuarios, canais)
+            self.stdout.write('🧹 Removendo dados gerados...')
+            for canal, _ in canais:
+                canal.delete()
+            User.objects.filter(pk__in=[u.pk for u in usuarios]).delete()
+
+    def _simular(self, canais, usuarios, options):
+        eventos = (
+            ['consulta'] * options['consultas'] +
+            ['mensagem'] * options['mensagens'] +
+            ['leitura'] * options['leituras']
+        )
+        random.shuffle(eventos)
+        self.stdout.write(
+            f"📈 Simulando {options['consultas']} consultas, {options['mensagens']} mensagens "
+            f"e {options['leituras']} leituras de canal..."
+        )
+
+        badges.estatisticas.update(acertos=0, faltas=0)
+        tempos = []
+        for evento in eventos:
+            canal, membros = random.choice(canais)
+            if evento == 'mensagem':
+                remetente = random.choice(membros)
+                mensagem = MensagemCanal.objects.create(canal=canal, remetente=remetente, conteudo='pico')
+                canal.registrar_nova_mensagem(mensagem)
+                badges.nova_mensagem_canal(canal.id, remetente.id)
+                registrar_notificacoes([
+                    NotificacaoComunicacao(
+                        usuario=usuario, tipo='NOVA_MENSAGEM', canal=canal,
+                        mensagem=mensagem, titulo='Nova mensagem', conteudo='pico'
+                    )
+                    for usuario in membros if usuario != remetente
+                ])
+            elif evento == 'leitura':
+                usuario = random.choice(membros)
+                badges.canal_lido(canal.id, usuario.id, canal.marcar_como_lida(usuario))
+            else:
+                usuario = random.choice(usuarios)
+                inicio = time.perf_counter()
+                badges.obter_badges(usuario)
+                tempos.append((time.perf_counter() - inicio) * 1000)
+
+        self.stdout.write(self.style.SUCCESS('✅ Resultado'))
+        self.stdout.write(f"   Taxa de acerto do cache: {badges.taxa_acerto():.1%} {badges.estatisticas}")
+        self.stdout.write(
+            f'   Consulta: mediana {statistics.median(tempos):.3f} ms   '
+            f'p99 {statistics.quantiles(tempos, n=100)[98]:.3f} ms'
+        )
+
+    def _limpar_cache(self, usuarios, canais):
+        """Descarta só as chaves de badges dos usuários do benchmark"""
+        contadores = ['notificacoes', 'diretas', 'canais'] + [f'canal:{canal.id}' for canal, _ in canais]
+        cache.delete_many([
+            badges._chave(usuario.id, contador) for usuario in usuarios for contador in contadores
+        ])
+
+    def _comparar(self, usuarios, canais):
+        amostra = random.sample(usuarios, k=min(50, len(usuarios)))
+
+        def medir():
+            inicio = time.perf_counter()
+            for usuario in amostra:
+                badges.obter_badges(usuario)
+            return (time.perf_counter() - inicio) * 1000 / len(amostra)
+
+        self._limpar_cache(amostra, canais)
+        sem_cache = medir()
+        com_cache = medir()
+        self.stdout.write(f'   Cálculo no banco: {sem_cache:.3f} ms   Cache: {com_cache:.3f} ms (por consulta)')
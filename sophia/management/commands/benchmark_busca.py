@@ -0,0 +1,143 @@
+"""
+Benchmark da busca textual de mensagens
+Salve em: sophia/management/commands/benchmark_busca.py
+
+Gera mensagens sintéticas em um canal temporário, compara a busca pelo
+índice GIN (tsvector) com um icontains sobre o conteúdo e remove os dados.
+
+Grava as mensagens no banco configurado: só roda com DEBUG ou --sim.
+
+Uso: python manage.py benchmark_busca --sim --mensagens 2000000
+"""
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from sophia.models import CanalComunicacao, Escola, MensagemCanal, User
+from sophia.services.busca import buscar_mensagens, com_trechos
+from sophia.utils.paginacao import paginar_keyset
+
+VOCABULARIO = [
+    'reunião', 'pais', 'responsáveis', 'aluno', 'alunos', 'professor', 'professora', 'coordenação',
+    'direção', 'prova', 'provas', 'avaliação', 'recuperação', 'trabalho', 'trabalhos', 'entrega',
+    'matemática', 'português', 'ciências', 'história', 'geografia', 'inglês', 'educação', 'física',
+    'artes', 'redação', 'leitura', 'livro', 'caderno', 'material', 'uniforme', 'lanche', 'merenda',
+    'passeio', 'excursão', 'autorização', 'assinatura', 'boletim', 'nota', 'notas', 'frequência',
+    'falta', 'faltas', 'atestado', 'médico', 'saúde', 'vacinação', 'horário', 'turma', 'sala',
+    'amanhã', 'hoje', 'semana', 'segunda', 'terça', 'quarta', 'quinta', 'sexta', 'manhã', 'tarde',
+    'feriado', 'férias', 'calendário', 'evento', 'festa', 'junina', 'formatura', 'apresentação',
+    'dúvida', 'obrigado', 'obrigada', 'por', 'favor', 'lembrete', 'importante', 'urgente', 'atenção',
+    'mensalidade', 'pagamento', 'boleto', 'vencimento', 'matrícula', 'rematrícula', 'transporte',
+]
+
+TERMOS = ['reunião', 'excursão autorização', '"prova de matemática"', 'rematrícula -boleto', 'vacinação']
+
+INSERIR_LOTE = """
+INSERT INTO mensagens_canal (
+    id, canal_id, remetente_id, tipo, conteudo, prioridade, editada, excluida,
+    lida, visualizacoes, requer_confirmacao, enviada_em, atualizada_em
+)
+SELECT
+    gen_random_uuid(), %(canal)s, %(remetente)s, 'TEXTO',
+    (
+        SELECT string_agg(
+            (%(vocabulario)s::text[])[1 + floor(random() * %(tamanho)s)::int], ' '
+        )
+        FROM generate_series(1, 6 + (g %% 20))
+    ),
+    'NORMAL', false, false, false, 0, false,
+    now() - make_interval(secs => g), now()
+FROM generate_series(%(inicio)s, %(fim)s) AS g
+"""
+
+
+class Command(BaseCommand):
+    """Compara busca por tsvector/GIN com icontains"""
+    help = 'Mede a busca textual de mensagens em um volume sintético'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mensagens', type=int, default=2000000)
+        parser.add_argument('--lote', type=int, default=100000)
+        parser.add_argument('--repeticoes', type=int, default=5)
+        parser.add_argument('--manter', action='store_true', help='Não remove os dados gerados')
+        parser.add_argument('--sim', action='store_true', help='Confirma a execução fora do DEBUG')
+
+    def handle(self, *args, **options):
+        if not (settings.DEBUG or options['sim']):
+            raise CommandError('Cria dados no banco configurado: use DEBUG=True ou confirme com --sim')
+
+        escola = Escola.objects.first()
+        usuario = User.objects.first()
+        if not escola or not usuario:
+            raise CommandError('É necessário ao menos uma escola e um usuário cadastrados')
+
+        canal = CanalComunicacao.objects.create(
+            escola=escola,
+            tipo='GRUPO_PROJETO',
+            nome='[benchmark] busca',
+            criado_por=usuario
+        )
+
+        try:
+            self._gerar(canal, usuario, options['mensagens'], options['lote'])
+            self._medir(canal, options['repeticoes'])
+        finally:
+            if not options['manter']:
+                self.stdout.write('🧹 Removendo dados gerados...')
+                with connection.cursor() as cursor:
+                    cursor.execute('DELETE FROM mensagens_canal WHERE canal_id = %s', [canal.id])
+                canal.delete()
+
+    def _gerar(self, canal, usuario, total, lote):
+        self.stdout.write(f'📝 Gerando {total} mensagens...')
+        inicio_geracao = time.perf_counter()
+
+        with connection.cursor() as cursor:
+            for inicio in range(1, total + 1, lote):
+                fim = min(inicio + lote - 1, total)
+                cursor.execute(INSERIR_LOTE, {
+                    'canal': canal.id,
+                    'remetente': usuario.id,
+                    'vocabulario': VOCABULARIO,
+                    'tamanho': len(VOCABULARIO),
+                    'inicio': inicio,
+                    'fim': fim,
+                })
+                self.stdout.write(f'   {fim}/{total}')
+            cursor.execute('ANALYZE mensagens_canal')
+
+        self.stdout.write(f'   Geração (com trigger do tsvector): {time.perf_counter() - inicio_geracao:.1f}s')
+
+    def _medir(self, canal, repeticoes):
+        mensagens = MensagemCanal.objects.filter(canal=canal, excluida=False).select_related('remetente', 'canal')
+
+        plano = buscar_mensagens(mensagens, TERMOS[1]).order_by('-relevancia', '-enviada_em', '-id')[:20].explain()
+        self.stdout.write(f'🔍 Plano da busca ({TERMOS[1]}):')
+        for linha in plano.splitlines():
+            self.stdout.write(f'   {linha}')
+
+        self.stdout.write(self.style.SUCCESS('✅ Resultado (mediana de 20 resultados por página)'))
+        for termos in TERMOS:
+            busca = self._cronometrar(repeticoes, lambda: paginar_keyset(
+                com_trechos(buscar_mensagens(mensagens, termos), termos),
+                ['relevancia', 'enviada_em', 'id'],
+                limite=20
+            ))
+            palavra = termos.strip('"').split()[0]
+            icontains = self._cronometrar(repeticoes, lambda: list(
+                mensagens.filter(conteudo__icontains=palavra).order_by('-enviada_em')[:20]
+            ))
+            self.stdout.write(
+                f'   {termos:<26} tsvector/GIN: {busca:8.1f} ms   icontains ({palavra}): {icontains:8.1f} ms'
+            )
+
+    def _cronometrar(self, repeticoes, funcao):
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        return statistics.median(tempos)
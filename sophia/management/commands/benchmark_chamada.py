@@ -0,0 +1,137 @@
+"""
+Benchmark do registro de chamada
+Salve em: sophia/management/commands/benchmark_chamada.py
+
+Cria uma turma temporária e compara o registro de chamadas com um
+update_or_create por aluno (implementação anterior) e com o upsert em lote
+(INSERT ... ON CONFLICT), tanto para chamadas novas quanto refeitas.
+
+Grava turma, alunos e chamadas no banco configurado: só roda com DEBUG ou --sim.
+
+Uso: python manage.py benchmark_chamada --sim --alunos 40 --chamadas 50
+"""
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+
+from sophia.models import Aluno, AnoLetivo, Disciplina, Escola, Frequencia, Turma, TurmaDisciplina, User
+from sophia.services.lancamentos import registrar_chamada
+
+ANO_BENCHMARK = 1900
+
+
+def chamada_por_aluno(turma_disciplina, data, presencas, usuario):
+    """Implementação anterior: um SELECT e um INSERT/UPDATE por aluno, sem transação"""
+    for item in presencas:
+        Frequencia.objects.update_or_create(
+            aluno_id=item['aluno_id'],
+            turma_disciplina_id=turma_disciplina.id,
+            data=data,
+            defaults={
+                'presente': item['presente'],
+                'lancado_por': usuario
+            }
+        )
+    return len(presencas)
+
+
+class Command(BaseCommand):
+    """Compara update_or_create por aluno com o upsert em lote"""
+    help = 'Mede o registro de chamadas de uma turma'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alunos', type=int, default=40)
+        parser.add_argument('--chamadas', type=int, default=50, help='Chamadas (dias) por implementação')
+        parser.add_argument('--sim', action='store_true', help='Confirma a execução fora do DEBUG')
+
+    def handle(self, *args, **options):
+        if not (settings.DEBUG or options['sim']):
+            raise CommandError('Cria dados no banco configurado: use DEBUG=True ou confirme com --sim')
+
+        escola = Escola.objects.first()
+        if not escola:
+            raise CommandError('É necessário ao menos uma escola cadastrada')
+        if AnoLetivo.objects.filter(escola=escola, ano=ANO_BENCHMARK).exists():
+            raise CommandError(f'Ano letivo {ANO_BENCHMARK} já existe (benchmark anterior interrompido?)')
+
+        ano_letivo = AnoLetivo.objects.create(
+            escola=escola, ano=ANO_BENCHMARK, data_inicio=date(ANO_BENCHMARK, 1, 1), data_fim=date(ANO_BENCHMARK, 12, 31)
+        )
+        usuarios = []
+        disciplina = None
+        try:
+            turma = Turma.objects.create(
+                escola=escola, ano_letivo=ano_letivo, nome='[benchmark] chamada', serie='-', turno='MATUTINO', sala='-'
+            )
+            disciplina = Disciplina.objects.create(escola=escola, nome='[benchmark] chamada', carga_horaria=1)
+            professor = User.objects.create(username='benchmark_chamada_professor', role='PROFESSOR')
+            usuarios.append(professor)
+            turma_disciplina = TurmaDisciplina.objects.create(turma=turma, disciplina=disciplina, professor=professor)
+
+            alunos_usuarios = User.objects.bulk_create([
+                User(username=f'benchmark_chamada_{i}', first_name='Benchmark', role='ALUNO')
+                for i in range(options['alunos'])
+            ])
+            usuarios.extend(alunos_usuarios)
+            alunos = Aluno.objects.bulk_create([
+                Aluno(
+                    usuario=usuario, escola=escola, matricula=f'benchmark-chamada-{i}',
+                    data_nascimento=date(2015, 1, 1), turma_atual=turma
+                )
+                for i, usuario in enumerate(alunos_usuarios)
+            ])
+
+            self.stdout.write(
+                f"📈 {options['chamadas']} chamadas de {len(alunos)} alunos por implementação..."
+            )
+            chamadas = options['chamadas']
+            inicio = date(ANO_BENCHMARK, 2, 1)
+            implementacoes = [
+                ('update_or_create', chamada_por_aluno, inicio),
+                ('upsert em lote', registrar_chamada, inicio + timedelta(days=chamadas)),
+            ]
+
+            self.stdout.write(self.style.SUCCESS('✅ Resultado'))
+            for nome, registrar, primeiro_dia in implementacoes:
+                for rodada in ('nova', 'refeita'):
+                    mediana, p99, consultas = self._medir(
+                        registrar, turma_disciplina, alunos, professor, primeiro_dia, chamadas
+                    )
+                    self.stdout.write(
+                        f'   {nome} ({rodada}): mediana {mediana:.2f} ms   p99 {p99:.2f} ms   '
+                        f'{consultas} consultas por chamada'
+                    )
+
+            gravadas = Frequencia.objects.filter(turma_disciplina=turma_disciplina).count()
+            esperadas = 2 * chamadas * len(alunos)
+            if gravadas != esperadas:
+                raise CommandError(f'Frequências gravadas: {gravadas} (esperadas {esperadas})')
+        finally:
+            self.stdout.write('🧹 Removendo dados gerados...')
+            ano_letivo.delete()
+            if disciplina:
+                disciplina.delete()
+            User.objects.filter(pk__in=[usuario.pk for usuario in usuarios]).delete()
+
+    def _medir(self, registrar, turma_disciplina, alunos, professor, inicio, chamadas):
+        tempos, consultas = [], 0
+        for dia in range(chamadas):
+            presencas = [
+                {'aluno_id': aluno.id, 'presente': random.random() > 0.1}
+                for aluno in alunos
+            ]
+            reset_queries()  # O log de consultas é limitado; zera a cada chamada
+            with CaptureQueriesContext(connection) as capturadas:
+                antes = time.perf_counter()
+                registrar(turma_disciplina, inicio + timedelta(days=dia), presencas, professor)
+                tempos.append((time.perf_counter() - antes) * 1000)
+            consultas += len(capturadas)
+
+        p99 = statistics.quantiles(tempos, n=100)[98] if len(tempos) > 1 else tempos[0]
+        return statistics.median(tempos), p99, consultas // chamadas
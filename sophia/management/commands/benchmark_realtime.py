@@ -0,0 +1,105 @@
+"""
+Benchmark do realtime (SSE) em um único worker
+Salve em: sophia/management/commands/benchmark_realtime.py
+
+Abre N conexões simuladas no broker configurado, mede a memória por conexão
+e a latência de fan-out de eventos publicados a partir de outra thread (como
+faria uma view síncrona).
+
+Uso: python manage.py benchmark_realtime --conexoes 5000 --eventos 50
+"""
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from sophia.realtime.eventos import formatar_evento
+from sophia.realtime.sse import transmitir
+
+
+class Command(BaseCommand):
+    """Mede conexões por worker e latência de entrega do realtime"""
+    help = 'Mede memória por conexão e latência de fan-out do realtime em um worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--conexoes', type=int, default=2000)
+        parser.add_argument('--eventos', type=int, default=20)
+
+    def handle(self, *args, **options):
+        conexoes = options['conexoes']
+        eventos = options['eventos']
+
+        self.stdout.write(f'🔌 Abrindo {conexoes} conexões ({settings.REALTIME_BROKER})...')
+        resultado = asyncio.run(self._executar(conexoes, eventos))
+
+        self.stdout.write(self.style.SUCCESS('✅ Resultado'))
+        self.stdout.write(f"   Conexões abertas:        {resultado['conexoes']}")
+        self.stdout.write(f"   Memória por conexão:     {resultado['kb_por_conexao']:.2f} KB")
+        self.stdout.write(f"   Fan-out médio:           {resultado['latencia_media_ms']:.2f} ms")
+        self.stdout.write(f"   Fan-out p95:             {resultado['latencia_p95_ms']:.2f} ms")
+        self.stdout.write(f"   Entregas por segundo:    {resultado['entregas_por_segundo']:.0f}")
+
+    async def _executar(self, conexoes, eventos):
+        broker = import_string(settings.REALTIME_BROKER)()
+        usuario_ids = [f'benchmark-{i}' for i in range(conexoes)]
+
+        desconectar = asyncio.Event()
+        entregas = {}
+        concluidos = {}
+
+        async def receive():
+            await desconectar.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(mensagem):
+            corpo = mensagem.get('body', b'')
+            if corpo.startswith(b'event:'):
+                entregas[corpo] = entregas.get(corpo, 0) + 1
+                if entregas[corpo] == conexoes:
+                    concluidos[corpo].set_result(time.perf_counter())
+
+        # Memória por conexão (assinatura + fila + coroutine de transmissão)
+        tracemalloc.start()
+        antes = tracemalloc.get_traced_memory()[0]
+
+        assinaturas = [broker.assinar(usuario_id) for usuario_id in usuario_ids]
+        tarefas = [
+            asyncio.ensure_future(transmitir(assinatura, receive, send, heartbeat=3600))
+            for assinatura in assinaturas
+        ]
+        await asyncio.sleep(0.1)
+
+        depois = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        # Latência de fan-out
+        loop = asyncio.get_running_loop()
+        latencias = []
+        inicio_total = time.perf_counter()
+        for sequencia in range(eventos):
+            quadro = formatar_evento('benchmark', {'sequencia': sequencia})
+            concluidos[quadro] = loop.create_future()
+
+            inicio = time.perf_counter()
+            await loop.run_in_executor(None, broker.publicar, usuario_ids, quadro)
+            fim = await concluidos[quadro]
+            latencias.append((fim - inicio) * 1000)
+        duracao_total = time.perf_counter() - inicio_total
+
+        desconectar.set()
+        await asyncio.gather(*tarefas, return_exceptions=True)
+        for assinatura in assinaturas:
+            broker.cancelar(assinatura)
+
+        latencias.sort()
+        return {
+            'conexoes': conexoes,
+            'kb_por_conexao': (depois - antes) / conexoes / 1024,
+            'latencia_media_ms': statistics.mean(latencias),
+            'latencia_p95_ms': latencias[int(len(latencias) * 0.95) - 1] if len(latencias) > 1 else latencias[0],
+            'entregas_por_segundo': conexoes * eventos / duracao_total,
+        }
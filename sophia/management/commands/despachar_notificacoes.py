@@ -0,0 +1,35 @@
+"""
+Comando Django para despachar a outbox de notificações
+Salve em: sophia/management/commands/despachar_notificacoes.py
+
+Uso: python manage.py despachar_notificacoes --loop
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from sophia.services.notificacoes import despachar_pendentes
+
+
+class Command(BaseCommand):
+    """Expande as linhas pendentes da outbox em notificações"""
+    help = 'Expande as linhas pendentes da outbox em notificações'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Executa continuamente')
+        parser.add_argument('--intervalo', type=float, default=2, help='Segundos entre varreduras')
+        parser.add_argument('--limite', type=int, default=100, help='Itens por varredura')
+
+    def handle(self, *args, **options):
+        while True:
+            processados = despachar_pendentes(limite=options['limite'])
+            if processados:
+                self.stdout.write(f'📨 {processados} item(ns) da outbox despachado(s)')
+
+            if not options['loop']:
+                break
+
+            close_old_connections()
+            if processados < options['limite']:
+                time.sleep(options['intervalo'])
@@ -0,0 +1,47 @@
+"""
+Comando Django para gerar miniaturas dos anexos de imagem pendentes
+Salve em: sophia/management/commands/gerar_miniaturas.py
+
+Cobre imagens anteriores ao pipeline e as que falharam no pool em segundo
+plano (ex.: processo reiniciado antes de terminar).
+
+Uso: python manage.py gerar_miniaturas --limite 500
+     python manage.py gerar_miniaturas --anexo <uuid>   (refaz um anexo)
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from sophia.services.miniaturas import processar_anexo, processar_pendentes
+
+
+class Command(BaseCommand):
+    """Gera as miniaturas dos anexos de imagem que ainda não têm variantes"""
+    help = 'Gera as miniaturas dos anexos de imagem pendentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--anexo', help='Refaz as miniaturas de um anexo específico')
+        parser.add_argument('--loop', action='store_true', help='Executa continuamente')
+        parser.add_argument('--intervalo', type=float, default=30, help='Segundos entre varreduras')
+        parser.add_argument('--limite', type=int, default=100, help='Anexos por varredura')
+
+    def handle(self, *args, **options):
+        if options['anexo']:
+            if processar_anexo(options['anexo'], refazer=True):
+                self.stdout.write(self.style.SUCCESS('✅ Miniaturas geradas'))
+            else:
+                self.stdout.write(self.style.WARNING('⚠️  Anexo de imagem não encontrado'))
+            return
+
+        while True:
+            processados = processar_pendentes(limite=options['limite'])
+            if processados:
+                self.stdout.write(f'🖼️  {processados} anexo(s) processado(s)')
+
+            if not options['loop']:
+                break
+
+            close_old_connections()
+            if processados < options['limite']:
+                time.sleep(options['intervalo'])
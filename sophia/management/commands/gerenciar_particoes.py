@@ -0,0 +1,60 @@
+"""
+Comando Django para manter as partições mensais de auditoria e logins
+Salve em: sophia/management/commands/gerenciar_particoes.py
+
+Cria as partições dos próximos meses e, com --retencao, desanexa (ou apaga,
+com --modo drop) as partições mais antigas que a retenção configurada em
+PARTICIONAMENTO_TABELAS. Agende diariamente (cron ou similar).
+
+Uso: python manage.py gerenciar_particoes --retencao
+"""
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from sophia.utils.particionamento import (
+    aplicar_retencao, criar_particoes_ate, esta_particionada, listar_particoes
+)
+
+
+class Command(BaseCommand):
+    """Cria partições futuras e aplica a retenção"""
+    help = 'Cria partições mensais futuras e aplica a política de retenção'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meses-a-frente', type=int, default=settings.PARTICIONAMENTO_MESES_A_FRENTE)
+        parser.add_argument('--retencao', action='store_true', help='Remove partições fora da retenção')
+        parser.add_argument('--modo', choices=['detach', 'drop'], default='detach')
+        parser.add_argument('--simular', action='store_true', help='Mostra o que seria feito e desfaz')
+
+    def handle(self, *args, **options):
+        with transaction.atomic(), connection.cursor() as cursor:
+            for tabela, config in settings.PARTICIONAMENTO_TABELAS.items():
+                if not esta_particionada(cursor, tabela):
+                    self.stdout.write(self.style.WARNING(f'⚠️  {tabela} não está particionada'))
+                    continue
+
+                criadas = criar_particoes_ate(
+                    cursor, tabela, date.today(), options['meses_a_frente'], config['coluna']
+                )
+                for nome in criadas:
+                    self.stdout.write(f'➕ {nome}')
+
+                if options['retencao'] and config.get('retencao_meses'):
+                    removidas = aplicar_retencao(cursor, tabela, config['retencao_meses'], options['modo'])
+                    acao = 'apagada' if options['modo'] == 'drop' else 'desanexada'
+                    for nome in removidas:
+                        self.stdout.write(f'➖ {nome} ({acao})')
+
+                particoes = listar_particoes(cursor, tabela)
+                if particoes:
+                    self.stdout.write(
+                        f'📦 {tabela}: {len(particoes)} partições '
+                        f'({particoes[0][1]:%Y-%m} a {particoes[-1][1]:%Y-%m})'
+                    )
+
+            if options['simular']:
+                transaction.set_rollback(True)
+                self.stdout.write(self.style.WARNING('Simulação: nenhuma alteração gravada'))
@@ -0,0 +1,30 @@
+"""
+Comando Django para remover do Storage os objetos sem anexos
+Salve em: sophia/management/commands/limpar_objetos.py
+
+Objetos deduplicados (ObjetoArmazenado) sem referências há mais que a
+validade das chaves de upload são apagados junto com as miniaturas.
+
+Uso: python manage.py limpar_objetos --limite 500
+"""
+from django.core.management.base import BaseCommand
+
+from sophia.services.armazenamento import limpar_objetos
+
+
+class Command(BaseCommand):
+    """Remove objetos armazenados que nenhum anexo referencia"""
+    help = 'Remove objetos armazenados que nenhum anexo referencia'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limite', type=int, default=500, help='Objetos por lote')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            removidos = limpar_objetos(limite=options['limite'])
+            total += removidos
+            if removidos < options['limite']:
+                break
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {total} objeto(s) removido(s)'))
@@ -0,0 +1,37 @@
+"""
+Comando Django para marcar conversas com prazo de resposta vencido
+Salve em: sophia/management/commands/verificar_sla.py
+
+Marca ResponsavelConversa.atrasado e cria as notificações SLA_ALERTA em lotes.
+
+Uso: python manage.py verificar_sla --loop
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from sophia.services.sla import verificar_prazos
+
+
+class Command(BaseCommand):
+    """Marca conversas atrasadas e alerta os responsáveis"""
+    help = 'Marca conversas com prazo de resposta vencido e cria alertas de SLA'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Executa continuamente')
+        parser.add_argument('--intervalo', type=float, default=60, help='Segundos entre varreduras')
+        parser.add_argument('--lote', type=int, default=settings.SLA_TAMANHO_LOTE, help='Conversas por lote')
+
+    def handle(self, *args, **options):
+        while True:
+            marcadas = verificar_prazos(limite=options['lote'])
+            if marcadas:
+                self.stdout.write(f'⏰ {marcadas} conversa(s) marcada(s) como atrasada(s)')
+
+            if not options['loop']:
+                break
+
+            close_old_connections()
+            time.sleep(options['intervalo'])
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def preencher_nao_lidas(apps, schema_editor):
+    """Inicializa o contador a partir do flag global de leitura"""
+    ParticipanteCanal = apps.get_model('sophia', 'ParticipanteCanal')
+    MensagemCanal = apps.get_model('sophia', 'MensagemCanal')
+
+    nao_lidas = MensagemCanal.objects.filter(
+        canal=OuterRef('canal'),
+        lida=False,
+        excluida=False
+    ).exclude(
+        remetente=OuterRef('usuario')
+    ).order_by().values('canal').annotate(total=Count('id')).values('total')
+
+    ParticipanteCanal.objects.update(nao_lidas=Coalesce(Subquery(nao_lidas), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sophia', '0002_canalcomunicacao_mensagemcanal_auditoriaconversa_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participantecanal',
+            name='lida_ate',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='participantecanal',
+            name='nao_lidas',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='participantecanal',
+            name='ultima_mensagem_lida',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='sophia.mensagemcanal'),
+        ),
+        migrations.RunPython(preencher_nao_lidas, migrations.RunPython.noop),
+    ]
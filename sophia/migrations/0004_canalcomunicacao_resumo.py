@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sophia', '0003_participantecanal_cursor_leitura'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='canalcomunicacao',
+            name='total_mensagens',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='canalcomunicacao',
+            name='total_participantes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='canalcomunicacao',
+            name='ultima_mensagem',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='sophia.mensagemcanal'),
+        ),
+        migrations.AddField(
+            model_name='canalcomunicacao',
+            name='ultima_mensagem_resumo',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
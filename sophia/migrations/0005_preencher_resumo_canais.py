@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:40
+
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def preencher_resumo(apps, schema_editor):
+    """Calcula o resumo dos canais existentes"""
+    CanalComunicacao = apps.get_model('sophia', 'CanalComunicacao')
+    ParticipanteCanal = apps.get_model('sophia', 'ParticipanteCanal')
+    MensagemCanal = apps.get_model('sophia', 'MensagemCanal')
+
+    participantes = ParticipanteCanal.objects.filter(
+        canal=OuterRef('pk'), ativo=True
+    ).order_by().values('canal').annotate(total=Count('id')).values('total')
+    mensagens = MensagemCanal.objects.filter(
+        canal=OuterRef('pk'), excluida=False
+    ).order_by().values('canal').annotate(total=Count('id')).values('total')
+
+    CanalComunicacao.objects.update(
+        total_participantes=Coalesce(Subquery(participantes), 0),
+        total_mensagens=Coalesce(Subquery(mensagens), 0)
+    )
+
+    for canal in CanalComunicacao.objects.filter(total_mensagens__gt=0).iterator():
+        ultima = MensagemCanal.objects.filter(canal=canal, excluida=False).select_related(
+            'remetente'
+        ).order_by('-enviada_em').first()
+        remetente = ultima.remetente
+        CanalComunicacao.objects.filter(pk=canal.pk).update(
+            ultima_mensagem=ultima,
+            ultima_mensagem_resumo={
+                'id': str(ultima.id),
+                # Modelos históricos não têm get_full_name()
+                'remetente': f'{remetente.first_name} {remetente.last_name}'.strip() if remetente else None,
+                'conteudo': ultima.conteudo[:100],
+                'enviada_em': timezone.localtime(ultima.enviada_em).isoformat()
+            }
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sophia', '0004_canalcomunicacao_resumo'),
+    ]
+
+    operations = [
+        migrations.RunPython(preencher_resumo, migrations.RunPython.noop),
+    ]
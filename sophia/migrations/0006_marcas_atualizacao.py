@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:43
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+
+def preencher_marcas(apps, schema_editor):
+    """Usa a última alteração conhecida de cada registro como marca d'água"""
+    MensagemCanal = apps.get_model('sophia', 'MensagemCanal')
+    NotificacaoComunicacao = apps.get_model('sophia', 'NotificacaoComunicacao')
+
+    MensagemCanal.objects.update(
+        atualizada_em=Greatest(F('enviada_em'), F('editada_em'), F('excluida_em'))
+    )
+    NotificacaoComunicacao.objects.update(
+        atualizada_em=Greatest(F('criada_em'), F('lida_em'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sophia', '0005_preencher_resumo_canais'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mensagemcanal',
+            name='atualizada_em',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='notificacaocomunicacao',
+            name='atualizada_em',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(preencher_marcas, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='canalcomunicacao',
+            index=models.Index(fields=['escola', 'atualizado_em'], name='canais_comu_escola__6e1129_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mensagemcanal',
+            index=models.Index(fields=['canal', 'atualizada_em'], name='mensagens_c_canal_i_a2f2cf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacaocomunicacao',
+            index=models.Index(fields=['usuario', 'atualizada_em'], name='notificacoe_usuario_3dc8fb_idx'),
+        ),
+    ]
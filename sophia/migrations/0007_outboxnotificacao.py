@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:45
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sophia', '0006_marcas_atualizacao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxNotificacao',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('tipo', models.CharField(choices=[('NOVA_MENSAGEM', 'Nova Mensagem'), ('MENCAO', 'Menção'), ('RESPOSTA', 'Resposta'), ('TRABALHO_ENTREGUE', 'Trabalho Entregue'), ('CONVERSA_ASSUMIDA', 'Conversa Assumida'), ('SLA_ALERTA', 'Alerta de SLA'), ('CANAL_CRIADO', 'Canal Criado')], max_length=30)),
+                ('titulo', models.CharField(max_length=200)),
+                ('conteudo', models.TextField()),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('ENVIADO', 'Enviado'), ('ERRO', 'Erro')], default='PENDENTE', max_length=20)),
+                ('tentativas', models.PositiveIntegerField(default=0)),
+                ('erro', models.TextField(blank=True)),
+                ('total_notificacoes', models.PositiveIntegerField(default=0)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('processado_em', models.DateTimeField(blank=True, null=True)),
+                ('canal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outbox_notificacoes', to='sophia.canalcomunicacao')),
+                ('mensagem', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='sophia.mensagemcanal')),
+                ('remetente', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'outbox_notificacoes',
+                'ordering': ['criado_em'],
+                'indexes': [models.Index(fields=['status', 'criado_em'], name='outbox_noti_status_68e577_idx')],
+            },
+        ),
+    ]
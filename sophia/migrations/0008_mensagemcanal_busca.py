@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:48
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import UnaccentExtension
+from django.db import migrations
+
+
+CRIAR_CONFIGURACAO = """
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'portuguese_unaccent') THEN
+        CREATE TEXT SEARCH CONFIGURATION portuguese_unaccent (COPY = portuguese);
+        ALTER TEXT SEARCH CONFIGURATION portuguese_unaccent
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+    END IF;
+END $$;
+"""
+
+REMOVER_CONFIGURACAO = "DROP TEXT SEARCH CONFIGURATION IF EXISTS portuguese_unaccent;"
+
+CRIAR_TRIGGER = """
+CREATE OR REPLACE FUNCTION mensagens_canal_busca_atualizar() RETURNS trigger AS $$
+BEGIN
+    NEW.busca := to_tsvector('portuguese_unaccent', coalesce(NEW.conteudo, ''));
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER mensagens_canal_busca_trigger
+    BEFORE INSERT OR UPDATE OF conteudo ON mensagens_canal
+    FOR EACH ROW EXECUTE FUNCTION mensagens_canal_busca_atualizar();
+"""
+
+REMOVER_TRIGGER = """
+DROP TRIGGER IF EXISTS mensagens_canal_busca_trigger ON mensagens_canal;
+DROP FUNCTION IF EXISTS mensagens_canal_busca_atualizar();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sophia', '0007_outboxnotificacao'),
+    ]
+
+    operations = [
+        UnaccentExtension(),
+        migrations.RunSQL(CRIAR_CONFIGURACAO, REMOVER_CONFIGURACAO),
+        migrations.AddField(
+            model_name='mensagemcanal',
+            name='busca',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CRIAR_TRIGGER, REMOVER_TRIGGER),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:50
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+TAMANHO_LOTE = 10000
+
+
+def preencher_busca(apps, schema_editor):
+    """Preenche o vetor das mensagens existentes em lotes (sem travar a tabela inteira)"""
+    with schema_editor.connection.cursor() as cursor:
+        while True:
+            cursor.execute(
+                """
+                UPDATE mensagens_canal
+                SET busca = to_tsvector('portuguese_unaccent', coalesce(conteudo, ''))
+                WHERE id IN (
+                    SELECT id FROM mensagens_canal WHERE busca IS NULL LIMIT %s
+                )
+                """,
+                [TAMANHO_LOTE]
+            )
+            if cursor.rowcount < TAMANHO_LOTE:
+                break
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('sophia', '0008_mensagemcanal_busca'),
+    ]
+
+    operations = [
+        migrations.RunPython(preencher_busca, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='mensagemcanal',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['busca'], name='mensagens_canal_busca_gin'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:55
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sophia', '0009_preencher_busca_mensagens'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditoriaconversa',
+            name='criado_em',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,126 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:10
+
+from datetime import date
+
+from django.db import migrations
+
+# Tabela -> coluna de data usada nas partições mensais
+TABELAS = {
+    'auditoria_conversa': 'criado_em',
+    'historico_logins': 'timestamp',
+}
+
+# Partições criadas além do mês atual (depois, o comando gerenciar_particoes)
+MESES_A_FRENTE = 3
+
+# O SQL fica congelado aqui (e não importado de sophia.utils.particionamento)
+# para que mudanças futuras no utilitário não alterem esta migração.
+
+
+def _mes_seguinte(mes):
+    return date(mes.year + (mes.month == 12), mes.month % 12 + 1, 1)
+
+
+def _esta_particionada(cursor, tabela):
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [tabela])
+    linha = cursor.fetchone()
+    return bool(linha) and linha[0] == 'p'
+
+
+def _recriar_tabela(cursor, tabela, criar, chave_primaria, depois_de_criar=None):
+    """Troca `tabela` por uma nova estrutura preservando dados, índices e FKs"""
+    antiga = f'{tabela}_antiga'
+    cursor.execute(
+        """
+        SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        WHERE i.indrelid = %s::regclass AND NOT i.indisprimary
+        """,
+        [tabela]
+    )
+    indices = cursor.fetchall()
+    cursor.execute(
+        """
+        SELECT conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype = 'f'
+        """,
+        [tabela]
+    )
+    chaves = cursor.fetchall()
+
+    cursor.execute(f'ALTER TABLE {tabela} RENAME TO {antiga}')
+    cursor.execute(f'ALTER INDEX {tabela}_pkey RENAME TO {antiga}_pkey')
+    for nome, _ in chaves:
+        cursor.execute(f'ALTER TABLE {antiga} DROP CONSTRAINT {nome}')
+    for nome, _ in indices:
+        cursor.execute(f'DROP INDEX {nome}')
+
+    cursor.execute(
+        f'CREATE TABLE {tabela} (LIKE {antiga} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE) {criar}'
+    )
+    cursor.execute(f'ALTER TABLE {tabela} ADD CONSTRAINT {tabela}_pkey PRIMARY KEY ({chave_primaria})')
+    if depois_de_criar:
+        depois_de_criar()
+
+    cursor.execute(f'INSERT INTO {tabela} SELECT * FROM {antiga}')
+    cursor.execute(f'DROP TABLE {antiga}')
+
+    for _, definicao in indices:
+        cursor.execute(definicao)
+    for nome, definicao in chaves:
+        cursor.execute(f'ALTER TABLE {tabela} ADD CONSTRAINT {nome} {definicao}')
+
+
+def _particionar_tabela(cursor, tabela, coluna):
+    if _esta_particionada(cursor, tabela):
+        return
+
+    cursor.execute(f'SELECT min({coluna}) FROM {tabela}')
+    primeira = cursor.fetchone()[0] or date.today()
+
+    def criar_particoes():
+        # Tabela nova e vazia: as partições são criadas direto, sem mover linhas
+        cursor.execute(f'CREATE TABLE {tabela}_padrao PARTITION OF {tabela} DEFAULT')
+        limite = date.today().replace(day=1)
+        for _ in range(MESES_A_FRENTE):
+            limite = _mes_seguinte(limite)
+
+        mes = date(primeira.year, primeira.month, 1)
+        while mes <= limite:
+            fim = _mes_seguinte(mes)
+            cursor.execute(
+                f"CREATE TABLE {tabela}_p{mes:%Y%m} PARTITION OF {tabela} FOR VALUES FROM ('{mes}') TO ('{fim}')"
+            )
+            mes = fim
+
+    _recriar_tabela(
+        cursor, tabela,
+        criar=f'PARTITION BY RANGE ({coluna})',
+        chave_primaria=f'id, {coluna}',
+        depois_de_criar=criar_particoes
+    )
+
+
+def particionar(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for tabela, coluna in TABELAS.items():
+            _particionar_tabela(cursor, tabela, coluna)
+
+
+def desparticionar(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for tabela in TABELAS:
+            if _esta_particionada(cursor, tabela):
+                _recriar_tabela(cursor, tabela, criar='', chave_primaria='id')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sophia', '0010_auditoriaconversa_criado_em'),
+    ]
+
+    operations = [
+        migrations.RunPython(particionar, desparticionar),
+    ]
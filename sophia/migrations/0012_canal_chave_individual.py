@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:00
+
+from django.db import migrations, models
+
+# Canais individuais com exatamente dois participantes recebem a chave do par;
+# havendo duplicados, só o mais antigo fica com a chave (os demais seguem
+# acessíveis, mas deixam de ser retornados na criação).
+PREENCHER_CHAVES = """
+UPDATE canais_comunicacao c
+SET chave_individual = pares.chave
+FROM (
+    SELECT DISTINCT ON (p.chave) p.canal_id, p.chave
+    FROM (
+        SELECT canal_id,
+               string_agg(usuario_id::text, ':' ORDER BY usuario_id::text COLLATE "C") AS chave
+        FROM participantes_canal
+        GROUP BY canal_id
+        HAVING count(DISTINCT usuario_id) = 2
+    ) p
+    JOIN canais_comunicacao canal ON canal.id = p.canal_id AND canal.tipo = 'INDIVIDUAL'
+    ORDER BY p.chave, canal.criado_em, canal.id
+) pares
+WHERE c.id = pares.canal_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sophia', '0011_particionar_auditoria_logins'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='canalcomunicacao',
+            name='chave_individual',
+            field=models.CharField(blank=True, editable=False, max_length=73, null=True),
+        ),
+        migrations.RunSQL(PREENCHER_CHAVES, migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name='canalcomunicacao',
+            constraint=models.UniqueConstraint(condition=models.Q(('tipo', 'INDIVIDUAL')), fields=('chave_individual',), name='canal_individual_unico'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:02
+
+from django.db import migrations, models
+
+# Conversas cuja última mensagem não é do responsável passam a aguardar resposta
+# a partir dela; as já vencidas serão marcadas na primeira execução do verificar_sla.
+PREENCHER_PRAZOS = """
+UPDATE responsavel_conversa r
+SET prazo_resposta_em = m.enviada_em + r.prazo_resposta * interval '1 hour'
+FROM canais_comunicacao c
+JOIN mensagens_canal m ON m.id = c.ultima_mensagem_id
+WHERE r.canal_id = c.id
+  AND r.ativo
+  AND m.remetente_id <> r.responsavel_original_id
+  AND m.remetente_id IS DISTINCT FROM r.assumida_por_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sophia', '0012_canal_chave_individual'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='responsavelconversa',
+            name='prazo_resposta_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunSQL(PREENCHER_PRAZOS, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='responsavelconversa',
+            index=models.Index(condition=models.Q(('ativo', True), ('atrasado', False), ('prazo_resposta_em__isnull', False)), fields=['prazo_resposta_em'], name='responsavel_prazo_pendente'),
+        ),
+        migrations.AddIndex(
+            model_name='responsavelconversa',
+            index=models.Index(condition=models.Q(('ativo', True), ('atrasado', True)), fields=['canal'], name='responsavel_atrasado'),
+        ),
+    ]
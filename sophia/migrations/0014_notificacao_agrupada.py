@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:04
+
+from django.db import migrations, models
+
+# Agrupa as não lidas já existentes na mais recente de cada (usuário, canal, tipo)
+AGRUPAR_NAO_LIDAS = """
+WITH grupos AS (
+    SELECT id,
+           row_number() OVER (PARTITION BY usuario_id, canal_id, tipo ORDER BY criada_em DESC, id DESC) AS posicao,
+           count(*) OVER (PARTITION BY usuario_id, canal_id, tipo) AS total
+    FROM notificacoes_comunicacao
+    WHERE NOT lida
+),
+mantidas AS (
+    UPDATE notificacoes_comunicacao n
+    SET quantidade = g.total
+    FROM grupos g
+    WHERE n.id = g.id AND g.posicao = 1 AND g.total > 1
+)
+DELETE FROM notificacoes_comunicacao n
+USING grupos g
+WHERE n.id = g.id AND g.posicao > 1
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sophia', '0013_responsavel_prazo_resposta_em'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificacaocomunicacao',
+            name='quantidade',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunSQL(AGRUPAR_NAO_LIDAS, migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name='notificacaocomunicacao',
+            constraint=models.UniqueConstraint(condition=models.Q(('lida', False)), fields=('usuario', 'canal', 'tipo'), name='notificacao_nao_lida_unica'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:20
+
+from django.db import migrations
+
+# O contador de visualizações nunca foi mantido; passa a refletir os registros existentes
+SINCRONIZAR_CONTADORES = """
+UPDATE mensagens_canal m
+SET visualizacoes = v.total
+FROM (
+    SELECT mensagem_id, count(*) AS total
+    FROM visualizacoes_mensagem
+    GROUP BY mensagem_id
+) v
+WHERE m.id = v.mensagem_id AND m.visualizacoes <> v.total
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sophia', '0014_notificacao_agrupada'),
+    ]
+
+    operations = [
+        migrations.RunSQL(SINCRONIZAR_CONTADORES, migrations.RunSQL.noop),
+    ]
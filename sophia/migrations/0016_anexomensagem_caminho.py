@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sophia', '0015_sincronizar_visualizacoes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='anexomensagem',
+            name='caminho',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.AddConstraint(
+            model_name='anexomensagem',
+            constraint=models.UniqueConstraint(condition=models.Q(('caminho', ''), _negated=True), fields=('caminho',), name='anexo_caminho_unico'),
+        ),
+    ]
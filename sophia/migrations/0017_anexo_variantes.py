@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sophia', '0016_anexomensagem_caminho'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='anexomensagem',
+            name='variantes',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='anexomensagem',
+            name='variantes_geradas_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='anexomensagem',
+            index=models.Index(condition=models.Q(('tipo', 'IMAGEM'), ('variantes_geradas_em__isnull', True)), fields=['enviado_em'], name='anexo_imagem_sem_variantes'),
+        ),
+    ]
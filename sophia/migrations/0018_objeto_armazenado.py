@@ -0,0 +1,77 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:24
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+CRIAR_TRIGGER = """
+CREATE OR REPLACE FUNCTION anexos_mensagem_referencias() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.objeto_id IS NOT DISTINCT FROM NEW.objeto_id THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.objeto_id IS NOT NULL THEN
+        UPDATE objetos_armazenados SET referencias = referencias - 1 WHERE id = OLD.objeto_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.objeto_id IS NOT NULL THEN
+        UPDATE objetos_armazenados SET referencias = referencias + 1, usado_em = now() WHERE id = NEW.objeto_id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER anexos_mensagem_referencias_trigger
+    AFTER INSERT OR DELETE OR UPDATE OF objeto_id ON anexos_mensagem
+    FOR EACH ROW EXECUTE FUNCTION anexos_mensagem_referencias();
+"""
+
+REMOVER_TRIGGER = """
+DROP TRIGGER IF EXISTS anexos_mensagem_referencias_trigger ON anexos_mensagem;
+DROP FUNCTION IF EXISTS anexos_mensagem_referencias();
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sophia', '0017_anexo_variantes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ObjetoArmazenado',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('caminho', models.CharField(max_length=500, unique=True)),
+                ('url', models.URLField()),
+                ('tamanho', models.BigIntegerField()),
+                ('mime_type', models.CharField(max_length=100)),
+                ('referencias', models.IntegerField(default=0)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('usado_em', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'objetos_armazenados',
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='anexomensagem',
+            name='anexo_caminho_unico',
+        ),
+        migrations.AddIndex(
+            model_name='objetoarmazenado',
+            index=models.Index(condition=models.Q(('referencias', 0)), fields=['usado_em'], name='objeto_sem_referencias'),
+        ),
+        migrations.AddField(
+            model_name='anexomensagem',
+            name='objeto',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='anexos', to='sophia.objetoarmazenado'),
+        ),
+        migrations.AddConstraint(
+            model_name='anexomensagem',
+            constraint=models.UniqueConstraint(condition=models.Q(models.Q(('caminho', ''), _negated=True), ('objeto__isnull', True)), fields=('caminho',), name='anexo_caminho_unico'),
+        ),
+        migrations.RunSQL(CRIAR_TRIGGER, REMOVER_TRIGGER),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:28
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# Última atividade = última mensagem do canal (ou a entrada do participante);
+# fixado vem do canal e silenciado da antiga lista silenciado_por.
+PREENCHER_CAIXA_ENTRADA = """
+UPDATE participantes_canal p
+SET ultima_atividade_em = GREATEST(COALESCE(c.ultima_mensagem_em, p.adicionado_em), p.adicionado_em),
+    fixado = c.fixado,
+    silenciado = EXISTS (
+        SELECT 1 FROM canais_comunicacao_silenciado_por s
+        WHERE s.canalcomunicacao_id = p.canal_id AND s.user_id = p.usuario_id
+    )
+FROM canais_comunicacao c
+WHERE c.id = p.canal_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sophia', '0018_objeto_armazenado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participantecanal',
+            name='fixado',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='participantecanal',
+            name='silenciado',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='participantecanal',
+            name='ultima_atividade_em',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunSQL(PREENCHER_CAIXA_ENTRADA, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='participantecanal',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['usuario', '-fixado', '-ultima_atividade_em', '-id'], name='participante_caixa_entrada'),
+        ),
+    ]
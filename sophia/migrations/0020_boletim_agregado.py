@@ -0,0 +1,113 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:34
+
+from decimal import Decimal
+
+import django.db.models.deletion
+import django.db.models.expressions
+import django.db.models.functions.comparison
+import django.db.models.functions.math
+from django.db import migrations, models
+
+
+# Triggers por comando (com tabelas de transição): um lançamento em lote
+# atualiza cada chave (aluno, turma_disciplina, periodo) uma única vez.
+CRIAR_TRIGGER = """
+CREATE OR REPLACE FUNCTION notas_boletim_agregado() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE boletim_agregado b SET
+            quantidade = b.quantidade - d.quantidade,
+            soma = b.soma - d.soma,
+            soma_pesos = b.soma_pesos - d.soma_pesos,
+            soma_ponderada = b.soma_ponderada - d.soma_ponderada,
+            atualizado_em = now()
+        FROM (
+            SELECT aluno_id, turma_disciplina_id, periodo_id, count(*) AS quantidade, sum(nota) AS soma,
+                   sum(peso) AS soma_pesos, sum(nota * peso) AS soma_ponderada
+            FROM antigas GROUP BY aluno_id, turma_disciplina_id, periodo_id
+        ) d
+        WHERE b.aluno_id = d.aluno_id AND b.turma_disciplina_id = d.turma_disciplina_id
+          AND b.periodo_id = d.periodo_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO boletim_agregado AS b (
+            aluno_id, turma_disciplina_id, periodo_id, quantidade, soma, soma_pesos, soma_ponderada, atualizado_em
+        )
+        SELECT aluno_id, turma_disciplina_id, periodo_id, count(*), sum(nota), sum(peso), sum(nota * peso), now()
+        FROM novas GROUP BY aluno_id, turma_disciplina_id, periodo_id
+        ON CONFLICT (aluno_id, turma_disciplina_id, periodo_id) DO UPDATE SET
+            quantidade = b.quantidade + EXCLUDED.quantidade,
+            soma = b.soma + EXCLUDED.soma,
+            soma_pesos = b.soma_pesos + EXCLUDED.soma_pesos,
+            soma_ponderada = b.soma_ponderada + EXCLUDED.soma_ponderada,
+            atualizado_em = EXCLUDED.atualizado_em;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM boletim_agregado b USING antigas a
+        WHERE b.aluno_id = a.aluno_id AND b.turma_disciplina_id = a.turma_disciplina_id
+          AND b.periodo_id = a.periodo_id AND b.quantidade = 0;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER notas_boletim_agregado_insert AFTER INSERT ON notas
+    REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION notas_boletim_agregado();
+CREATE TRIGGER notas_boletim_agregado_update AFTER UPDATE ON notas
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION notas_boletim_agregado();
+CREATE TRIGGER notas_boletim_agregado_delete AFTER DELETE ON notas
+    REFERENCING OLD TABLE AS antigas
+    FOR EACH STATEMENT EXECUTE FUNCTION notas_boletim_agregado();
+
+INSERT INTO boletim_agregado (
+    aluno_id, turma_disciplina_id, periodo_id, quantidade, soma, soma_pesos, soma_ponderada, atualizado_em
+)
+SELECT aluno_id, turma_disciplina_id, periodo_id, count(*), sum(nota), sum(peso), sum(nota * peso), now()
+FROM notas GROUP BY aluno_id, turma_disciplina_id, periodo_id;
+"""
+
+REMOVER_TRIGGER = """
+DROP TRIGGER IF EXISTS notas_boletim_agregado_insert ON notas;
+DROP TRIGGER IF EXISTS notas_boletim_agregado_update ON notas;
+DROP TRIGGER IF EXISTS notas_boletim_agregado_delete ON notas;
+DROP FUNCTION IF EXISTS notas_boletim_agregado();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sophia', '0019_caixa_entrada'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nota',
+            name='peso',
+            field=models.DecimalField(decimal_places=2, default=1, max_digits=4),
+        ),
+        migrations.CreateModel(
+            name='BoletimAgregado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantidade', models.IntegerField(default=0)),
+                ('soma', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('soma_pesos', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('soma_ponderada', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ('media', models.GeneratedField(db_persist=True, expression=django.db.models.functions.math.Round(django.db.models.expressions.CombinedExpression(models.F('soma_ponderada'), '/', django.db.models.functions.comparison.NullIf(models.F('soma_pesos'), models.Value(Decimal('0')))), 2), output_field=models.DecimalField(decimal_places=2, max_digits=6, null=True))),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('aluno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='boletim_agregado', to='sophia.aluno')),
+                ('periodo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='boletim_agregado', to='sophia.periodoavaliativo')),
+                ('turma_disciplina', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='boletim_agregado', to='sophia.turmadisciplina')),
+            ],
+            options={
+                'db_table': 'boletim_agregado',
+                'constraints': [models.UniqueConstraint(fields=('aluno', 'turma_disciplina', 'periodo'), name='boletim_agregado_unico')],
+            },
+        ),
+        migrations.RunSQL(CRIAR_TRIGGER, REMOVER_TRIGGER),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Mesmo esquema de notas_boletim_agregado (0020): triggers por comando com
+# tabelas de transição. O upsert da chamada (INSERT ... ON CONFLICT DO
+# UPDATE) dispara o de INSERT para as linhas novas e o de UPDATE para as
+# refeitas.
+CRIAR_TRIGGER = """
+CREATE OR REPLACE FUNCTION frequencias_mensal() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE frequencias_mensais m SET
+            aulas = m.aulas - d.aulas,
+            presencas = m.presencas - d.presencas,
+            atualizado_em = now()
+        FROM (
+            SELECT aluno_id, turma_disciplina_id, date_trunc('month', data)::date AS mes,
+                   count(*) AS aulas, count(*) FILTER (WHERE presente) AS presencas
+            FROM antigas GROUP BY 1, 2, 3
+        ) d
+        WHERE m.aluno_id = d.aluno_id AND m.turma_disciplina_id = d.turma_disciplina_id AND m.mes = d.mes;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO frequencias_mensais AS m (aluno_id, turma_disciplina_id, mes, aulas, presencas, atualizado_em)
+        SELECT aluno_id, turma_disciplina_id, date_trunc('month', data)::date,
+               count(*), count(*) FILTER (WHERE presente), now()
+        FROM novas GROUP BY 1, 2, 3
+        ON CONFLICT (aluno_id, turma_disciplina_id, mes) DO UPDATE SET
+            aulas = m.aulas + EXCLUDED.aulas,
+            presencas = m.presencas + EXCLUDED.presencas,
+            atualizado_em = EXCLUDED.atualizado_em;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM frequencias_mensais m USING antigas a
+        WHERE m.aluno_id = a.aluno_id AND m.turma_disciplina_id = a.turma_disciplina_id
+          AND m.mes = date_trunc('month', a.data)::date AND m.aulas = 0;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER frequencias_mensal_insert AFTER INSERT ON frequencias
+    REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION frequencias_mensal();
+CREATE TRIGGER frequencias_mensal_update AFTER UPDATE ON frequencias
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION frequencias_mensal();
+CREATE TRIGGER frequencias_mensal_delete AFTER DELETE ON frequencias
+    REFERENCING OLD TABLE AS antigas
+    FOR EACH STATEMENT EXECUTE FUNCTION frequencias_mensal();
+
+INSERT INTO frequencias_mensais (aluno_id, turma_disciplina_id, mes, aulas, presencas, atualizado_em)
+SELECT aluno_id, turma_disciplina_id, date_trunc('month', data)::date,
+       count(*), count(*) FILTER (WHERE presente), now()
+FROM frequencias GROUP BY 1, 2, 3;
+"""
+
+REMOVER_TRIGGER = """
+DROP TRIGGER IF EXISTS frequencias_mensal_insert ON frequencias;
+DROP TRIGGER IF EXISTS frequencias_mensal_update ON frequencias;
+DROP TRIGGER IF EXISTS frequencias_mensal_delete ON frequencias;
+DROP FUNCTION IF EXISTS frequencias_mensal();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sophia', '0020_boletim_agregado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FrequenciaMensal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField()),
+                ('aulas', models.IntegerField(default=0)),
+                ('presencas', models.IntegerField(default=0)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('aluno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='frequencias_mensais', to='sophia.aluno')),
+                ('turma_disciplina', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='frequencias_mensais', to='sophia.turmadisciplina')),
+            ],
+            options={
+                'db_table': 'frequencias_mensais',
+                'indexes': [models.Index(fields=['turma_disciplina', 'mes'], name='frequencia_mensal_disciplina')],
+                'constraints': [models.UniqueConstraint(fields=('aluno', 'turma_disciplina', 'mes'), name='frequencia_mensal_unica')],
+            },
+        ),
+        migrations.RunSQL(CRIAR_TRIGGER, REMOVER_TRIGGER),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sophia', '0021_frequencia_mensal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participantecanal',
+            name='removido_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='participantecanal',
+            index=models.Index(condition=models.Q(('ativo', False)), fields=['usuario', 'removido_em'], name='participante_removido'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import NullIf, Round
+from decimal import Decimal
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 import uuid
@@ -460,6 +462,7 @@ class Nota(models.Model):
     periodo = models.ForeignKey(PeriodoAvaliativo, on_delete=models.CASCADE, related_name='notas')
 
     nota = models.DecimalField(max_digits=4, decimal_places=2)
+    peso = models.DecimalField(max_digits=4, decimal_places=2, default=1)  # Peso na média do período
     tipo_avaliacao = models.CharField(max_length=50)  # Prova, Trabalho, Participação
     data_avaliacao = models.DateField()
     observacao = models.TextField(blank=True)
@@ -471,6 +474,36 @@ class Nota(models.Model):
         db_table = 'notas'
 
 
+class BoletimAgregado(models.Model):
+    """
+    Totais das notas por aluno, disciplina da turma e período
+
+    Mantido pelo trigger `notas_boletim_agregado` (migração 0020) a cada
+    INSERT, UPDATE ou DELETE em notas, inclusive em lote; não gravar pelo ORM.
+    """
+    aluno = models.ForeignKey(Aluno, on_delete=models.CASCADE, related_name='boletim_agregado')
+    turma_disciplina = models.ForeignKey(TurmaDisciplina, on_delete=models.CASCADE, related_name='boletim_agregado')
+    periodo = models.ForeignKey(PeriodoAvaliativo, on_delete=models.CASCADE, related_name='boletim_agregado')
+
+    quantidade = models.IntegerField(default=0)
+    soma = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    soma_pesos = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    soma_ponderada = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    media = models.GeneratedField(
+        expression=Round(models.F('soma_ponderada') / NullIf(models.F('soma_pesos'), models.Value(Decimal(0))), 2),
+        output_field=models.DecimalField(max_digits=6, decimal_places=2, null=True),
+        db_persist=True
+    )
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'boletim_agregado'
+        constraints = [
+            # Também atende as consultas do boletim, que sempre filtram por aluno
+            models.UniqueConstraint(fields=['aluno', 'turma_disciplina', 'periodo'], name='boletim_agregado_unico'),
+        ]
+
+
 class Frequencia(models.Model):
     """Registro de presença"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -489,6 +522,32 @@ class Frequencia(models.Model):
         unique_together = ['aluno', 'turma_disciplina', 'data']
 
 
+class FrequenciaMensal(models.Model):
+    """
+    Aulas e presenças por aluno, disciplina da turma e mês
+
+    Mantido pelo trigger `frequencias_mensal` (migração 0021) a cada INSERT,
+    UPDATE ou DELETE em frequencias, inclusive o upsert da chamada; não
+    gravar pelo ORM.
+    """
+    aluno = models.ForeignKey(Aluno, on_delete=models.CASCADE, related_name='frequencias_mensais')
+    turma_disciplina = models.ForeignKey(TurmaDisciplina, on_delete=models.CASCADE, related_name='frequencias_mensais')
+    mes = models.DateField()  # Primeiro dia do mês
+
+    aulas = models.IntegerField(default=0)
+    presencas = models.IntegerField(default=0)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'frequencias_mensais'
+        constraints = [
+            models.UniqueConstraint(fields=['aluno', 'turma_disciplina', 'mes'], name='frequencia_mensal_unica'),
+        ]
+        indexes = [
+            models.Index(fields=['turma_disciplina', 'mes'], name='frequencia_mensal_disciplina'),
+        ]
+
+
 # ============= FINANCEIRO =============
 
 class Mensalidade(models.Model):
@@ -649,13 +708,23 @@ class Evento(models.Model):
 
 # sophia/models.py - ADICIONAR AO ARQUIVO EXISTENTE
 
-from django.db import models
+from django.db import connection, models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models import Case, ExpressionWrapper, F, Q, Subquery, Value, When
+from django.db.models.functions import Greatest
 import uuid
 from django.utils import timezone
 
 
 # ============= SISTEMA DE COMUNICAÇÃO AVANÇADO =============
 
+def acesso_canais(usuario):
+    """Participações e papéis do usuário nos canais (ver services/acesso_canais.py)"""
+    from .services.acesso_canais import obter_acesso  # services importa os modelos
+    return obter_acesso(usuario)
+
+
 class CanalComunicacao(models.Model):
     """
     Canal de comunicação (1-1 ou Grupo)
@@ -699,16 +768,36 @@ class CanalComunicacao(models.Model):
     # Metadados
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='ATIVO')
     fixado = models.BooleanField(default=False)
-    silenciado_por = models.ManyToManyField('User', related_name='canais_silenciados', blank=True)
+    silenciado_por = models.ManyToManyField('User', related_name='canais_silenciados', blank=True)  # Legado: ParticipanteCanal.silenciado
 
     # Auditoria
     criado_em = models.DateTimeField(auto_now_add=True)
     atualizado_em = models.DateTimeField(auto_now=True)
     ultima_mensagem_em = models.DateTimeField(null=True, blank=True)
 
+    # Resumo desnormalizado (mantido por registrar_* abaixo)
+    total_participantes = models.PositiveIntegerField(default=0)
+    total_mensagens = models.PositiveIntegerField(default=0)
+    ultima_mensagem = models.ForeignKey('MensagemCanal', on_delete=models.SET_NULL, null=True, blank=True,
+                                        related_name='+')
+    ultima_mensagem_resumo = models.JSONField(null=True, blank=True)
+
+    # Par ordenado de usuários dos canais individuais (ver chave_par)
+    chave_individual = models.CharField(max_length=73, null=True, blank=True, editable=False)
+
     class Meta:
         db_table = 'canais_comunicacao'
         ordering = ['-fixado', '-ultima_mensagem_em']
+        indexes = [
+            models.Index(fields=['escola', 'atualizado_em']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['chave_individual'],
+                condition=Q(tipo='INDIVIDUAL'),
+                name='canal_individual_unico'
+            ),
+        ]
         verbose_name = 'Canal de Comunicação'
         verbose_name_plural = 'Canais de Comunicação'
 
@@ -719,19 +808,30 @@ class CanalComunicacao(models.Model):
             return f"Chat: {' - '.join(nomes)}"
         return self.nome or f"Canal {self.tipo}"
 
+    @staticmethod
+    def chave_par(usuario_id, outro_usuario_id):
+        """Chave canônica do canal individual entre dois usuários (ordem indiferente)"""
+        return ':'.join(sorted([str(usuario_id), str(outro_usuario_id)]))
+
     def pode_visualizar(self, usuario):
         """Verifica se usuário pode visualizar o canal"""
         # Superuser e Gestor veem tudo
         if usuario.role in ['SUPERUSER', 'GESTOR']:
             return True
 
+        acesso = acesso_canais(usuario)
+
         # Coordenador vê canais da sua coordenação
         if usuario.role == 'COORDENADOR' and self.visivel_para_coordenacao:
-            if self.turma and self.turma.coordenador == usuario:
+            if acesso.coordena(self.turma_id):
                 return True
 
         # Participante direto
-        return self.participantes.filter(usuario=usuario).exists()
+        return acesso.participa(self.id)
+
+    def e_administrador(self, usuario):
+        """Verifica se usuário administra o canal"""
+        return acesso_canais(usuario).administra(self.id)
 
     def pode_enviar_mensagem(self, usuario):
         """Verifica se usuário pode enviar mensagem"""
@@ -739,7 +839,7 @@ class CanalComunicacao(models.Model):
             return False
 
         # Administrador pode sempre enviar
-        if self.administradores.filter(id=usuario.id).exists():
+        if self.e_administrador(usuario):
             return True
 
         # Gestor/Coordenador podem intervir
@@ -747,19 +847,109 @@ class CanalComunicacao(models.Model):
             return self.pode_visualizar(usuario)
 
         # Participante ativo
-        participante = self.participantes.filter(usuario=usuario).first()
-        return participante and participante.ativo
+        return acesso_canais(usuario).participa_ativamente(self.id)
+
+    @staticmethod
+    def resumir_mensagem(mensagem):
+        """Resumo da mensagem exibido na lista de canais"""
+        if mensagem is None:
+            return None
+        return {
+            'id': str(mensagem.id),
+            'remetente': mensagem.remetente.get_full_name() if mensagem.remetente else None,
+            'conteudo': mensagem.conteudo[:100],
+            'enviada_em': timezone.localtime(mensagem.enviada_em).isoformat()
+        }
+
+    def registrar_nova_mensagem(self, mensagem):
+        """Atualiza resumo do canal e contadores de não lidas dos demais participantes"""
+        CanalComunicacao.objects.filter(pk=self.pk).update(
+            total_mensagens=F('total_mensagens') + 1,
+            ultima_mensagem=mensagem,
+            ultima_mensagem_resumo=self.resumir_mensagem(mensagem),
+            ultima_mensagem_em=mensagem.enviada_em,
+            atualizado_em=timezone.now()
+        )
+        # Caixa de entrada: a conversa sobe para todos; não lidas só para os demais
+        self.participantes.filter(ativo=True).update(
+            ultima_atividade_em=mensagem.enviada_em,
+            nao_lidas=Case(
+                When(usuario_id=mensagem.remetente_id, then=F('nao_lidas')),
+                default=F('nao_lidas') + 1
+            )
+        )
+        ResponsavelConversa.registrar_mensagem(mensagem)
+
+    def registrar_mensagem_excluida(self, mensagem):
+        """Atualiza resumo do canal e desconta a mensagem de quem ainda não a leu"""
+        campos = {
+            'total_mensagens': Greatest(F('total_mensagens') - 1, 0),
+            'atualizado_em': timezone.now()
+        }
+        if self.ultima_mensagem_id == mensagem.id:
+            anterior = self.mensagens.filter(excluida=False).exclude(id=mensagem.id).select_related(
+                'remetente'
+            ).order_by('-enviada_em').first()
+            campos['ultima_mensagem'] = anterior
+            campos['ultima_mensagem_resumo'] = self.resumir_mensagem(anterior)
+        CanalComunicacao.objects.filter(pk=self.pk).update(**campos)
+
+        # Quem entrou depois do envio nunca teve a mensagem somada em nao_lidas
+        self.participantes.filter(nao_lidas__gt=0, adicionado_em__lte=mensagem.enviada_em).filter(
+            Q(lida_ate__isnull=True) | Q(lida_ate__lt=mensagem.enviada_em)
+        ).exclude(usuario_id=mensagem.remetente_id).update(
+            nao_lidas=F('nao_lidas') - 1
+        )
+
+    def registrar_participantes(self, quantidade):
+        """Soma (ou desconta, se negativo) participantes ativos no resumo do canal"""
+        if quantidade:
+            CanalComunicacao.objects.filter(pk=self.pk).update(
+                total_participantes=Greatest(F('total_participantes') + quantidade, 0),
+                atualizado_em=timezone.now()
+            )
+
+    def remover_participantes(self, usuario_ids):
+        """
+        Desativa as participações e registra a saída em `removido_em`
+
+        O histórico de leitura é mantido e o canal volta em `canais_removidos`
+        no sync do usuário. Retorna os ids dos usuários removidos.
+        """
+        removidos = list(
+            self.participantes.filter(usuario_id__in=usuario_ids, ativo=True).values_list('usuario_id', flat=True)
+        )
+        if removidos:
+            self.participantes.filter(usuario_id__in=removidos).update(
+                ativo=False, removido_em=timezone.now(), nao_lidas=0
+            )
+            self.registrar_participantes(-len(removidos))
+        return removidos
 
     def marcar_como_lida(self, usuario):
-        """Marca todas as mensagens como lidas para o usuário"""
-        self.mensagens.filter(lida=False).exclude(remetente=usuario).update(
+        """
+        Avança o cursor de leitura do usuário até a última mensagem
+
+        Retorna quantas notificações do canal foram marcadas como lidas.
+        """
+        agora = timezone.now()
+        ultima = self.mensagens.filter(excluida=False).order_by('-enviada_em').values('id')[:1]
+        self.participantes.filter(usuario=usuario).update(
+            ultima_mensagem_lida=Subquery(ultima),
+            lida_ate=agora,
+            nao_lidas=0,
+            ultima_visualizacao=agora
+        )
+        return self.notificacoes.filter(usuario=usuario, lida=False).update(
             lida=True,
-            lida_em=timezone.now()
+            lida_em=agora,
+            atualizada_em=agora
         )
 
     def obter_nao_lidas(self, usuario):
         """Retorna quantidade de mensagens não lidas"""
-        return self.mensagens.filter(lida=False).exclude(remetente=usuario).count()
+        nao_lidas = self.participantes.filter(usuario=usuario).values_list('nao_lidas', flat=True).first()
+        return nao_lidas or 0
 
 
 class ParticipanteCanal(models.Model):
@@ -792,15 +982,42 @@ class ParticipanteCanal(models.Model):
     adicionado_em = models.DateTimeField(auto_now_add=True)
     ultima_visualizacao = models.DateTimeField(auto_now=True)
 
+    # Leitura (cursor individual do participante)
+    ultima_mensagem_lida = models.ForeignKey('MensagemCanal', on_delete=models.SET_NULL, null=True, blank=True,
+                                             related_name='+')
+    lida_ate = models.DateTimeField(null=True, blank=True)
+    nao_lidas = models.PositiveIntegerField(default=0)
+
+    # Caixa de entrada do usuário (meus_canais)
+    ultima_atividade_em = models.DateTimeField(default=timezone.now)  # Última mensagem ou entrada no canal
+    fixado = models.BooleanField(default=False)
+    silenciado = models.BooleanField(default=False)  # Sem notificações; continua contando não lidas
+    removido_em = models.DateTimeField(null=True, blank=True)  # Saída do canal (ativo=False), para o delta-sync
+
     class Meta:
         db_table = 'participantes_canal'
         unique_together = ['canal', 'usuario']
         ordering = ['papel', 'usuario__first_name']
+        indexes = [
+            models.Index(
+                fields=['usuario', '-fixado', '-ultima_atividade_em', '-id'],
+                condition=Q(ativo=True),
+                name='participante_caixa_entrada'
+            ),
+            models.Index(fields=['usuario', 'removido_em'], condition=Q(ativo=False), name='participante_removido'),
+        ]
 
     def __str__(self):
         return f"{self.usuario.get_full_name()} - {self.canal}"
 
 
+class MensagemCanalManager(models.Manager):
+    """Não carrega o vetor de busca nas leituras comuns"""
+
+    def get_queryset(self):
+        return super().get_queryset().defer('busca')
+
+
 class MensagemCanal(models.Model):
     """
     Mensagens dentro dos canais
@@ -839,7 +1056,7 @@ class MensagemCanal(models.Model):
     excluida = models.BooleanField(default=False)
     excluida_em = models.DateTimeField(null=True, blank=True)
 
-    # Leitura
+    # Leitura (legado: a leitura por usuário fica em ParticipanteCanal)
     lida = models.BooleanField(default=False)
     lida_em = models.DateTimeField(null=True, blank=True)
     visualizacoes = models.IntegerField(default=0)
@@ -847,17 +1064,25 @@ class MensagemCanal(models.Model):
     # Metadados
     ip_remetente = models.GenericIPAddressField(null=True, blank=True)
     enviada_em = models.DateTimeField(auto_now_add=True)
+    atualizada_em = models.DateTimeField(auto_now=True)  # Marca d'água do delta-sync
 
     # Flags especiais
     requer_confirmacao = models.BooleanField(default=False)
     confirmada_por = models.ManyToManyField('User', related_name='mensagens_confirmadas', blank=True)
 
+    # Busca textual (preenchida por trigger no banco, config portuguese_unaccent)
+    busca = SearchVectorField(null=True, editable=False)
+
+    objects = MensagemCanalManager()
+
     class Meta:
         db_table = 'mensagens_canal'
         ordering = ['enviada_em']
         indexes = [
             models.Index(fields=['canal', '-enviada_em']),
             models.Index(fields=['remetente', '-enviada_em']),
+            models.Index(fields=['canal', 'atualizada_em']),
+            GinIndex(fields=['busca'], name='mensagens_canal_busca_gin'),
         ]
 
     def __str__(self):
@@ -865,30 +1090,21 @@ class MensagemCanal(models.Model):
 
     def marcar_como_lida(self, usuario):
         """Marca mensagem como lida"""
-        if not self.lida and self.remetente != usuario:
-            self.lida = True
-            self.lida_em = timezone.now()
-            self.save()
-
-            # Atualiza visualizações
-            Visualizacao.objects.get_or_create(
-                mensagem=self,
-                usuario=usuario,
-                defaults={'visualizada_em': timezone.now()}
-            )
+        if self.remetente_id != usuario.id:
+            Visualizacao.registrar([self.id], usuario)
 
     def pode_editar(self, usuario):
         """Verifica se usuário pode editar"""
-        if self.remetente == usuario:
+        if self.remetente_id == usuario.id:
             # Pode editar até 15 minutos após envio
             return (timezone.now() - self.enviada_em).seconds < 900
 
         # Admin do canal pode editar
-        return self.canal.administradores.filter(id=usuario.id).exists()
+        return acesso_canais(usuario).administra(self.canal_id)
 
     def pode_excluir(self, usuario):
         """Verifica se usuário pode excluir"""
-        if self.remetente == usuario:
+        if self.remetente_id == usuario.id:
             return True
 
         # Admin, Gestor, Coordenador podem excluir
@@ -898,7 +1114,36 @@ class MensagemCanal(models.Model):
         if usuario.role == 'COORDENADOR':
             return self.canal.pode_visualizar(usuario)
 
-        return self.canal.administradores.filter(id=usuario.id).exists()
+        return acesso_canais(usuario).administra(self.canal_id)
+
+
+class ObjetoArmazenado(models.Model):
+    """
+    Arquivo no Supabase Storage endereçado pelo conteúdo (SHA-256)
+
+    O mesmo conteúdo anexado em vários canais ocupa um único objeto.
+    `referencias` é mantido por trigger em anexos_mensagem.objeto_id; objetos
+    sem referências são removidos pelo comando limpar_objetos.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    sha256 = models.CharField(max_length=64, unique=True)
+    caminho = models.CharField(max_length=500, unique=True)
+    url = models.URLField()
+    tamanho = models.BigIntegerField()  # bytes
+    mime_type = models.CharField(max_length=100)
+    referencias = models.IntegerField(default=0)
+
+    criado_em = models.DateTimeField(auto_now_add=True)
+    usado_em = models.DateTimeField(default=timezone.now)  # Último envio/reaproveitamento (carência da limpeza)
+
+    class Meta:
+        db_table = 'objetos_armazenados'
+        indexes = [
+            models.Index(fields=['usado_em'], condition=Q(referencias=0), name='objeto_sem_referencias'),
+        ]
+
+    def __str__(self):
+        return self.sha256
 
 
 class AnexoMensagem(models.Model):
@@ -919,6 +1164,10 @@ class AnexoMensagem(models.Model):
     tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
     nome_arquivo = models.CharField(max_length=255)
     url = models.URLField()  # Supabase Storage
+    caminho = models.CharField(max_length=500, blank=True)  # Caminho no bucket (uploads assinados)
+    objeto = models.ForeignKey(
+        ObjetoArmazenado, on_delete=models.PROTECT, null=True, blank=True, related_name='anexos'
+    )  # Conteúdo deduplicado (caminho = objeto.caminho)
     tamanho = models.BigIntegerField()  # bytes
     mime_type = models.CharField(max_length=100)
 
@@ -932,9 +1181,27 @@ class AnexoMensagem(models.Model):
     enviado_em = models.DateTimeField(auto_now_add=True)
     downloads = models.IntegerField(default=0)
 
+    # Miniaturas (IMAGEM), geradas em segundo plano (services/miniaturas.py):
+    # {"160": {"largura": 160, "altura": 120, "webp": url, "jpeg": url}, ...}
+    variantes = models.JSONField(default=dict, blank=True)
+    variantes_geradas_em = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         db_table = 'anexos_mensagem'
         ordering = ['enviado_em']
+        constraints = [
+            # Objetos deduplicados são compartilhados; os demais caminhos, não
+            models.UniqueConstraint(
+                fields=['caminho'], condition=~Q(caminho='') & Q(objeto__isnull=True), name='anexo_caminho_unico'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['enviado_em'],
+                condition=Q(tipo='IMAGEM', variantes_geradas_em__isnull=True),
+                name='anexo_imagem_sem_variantes'
+            ),
+        ]
 
     def __str__(self):
         return self.nome_arquivo
@@ -954,6 +1221,44 @@ class Visualizacao(models.Model):
         unique_together = ['mensagem', 'usuario']
         ordering = ['-visualizada_em']
 
+    @staticmethod
+    def registrar(mensagem_ids, usuario):
+        """
+        Registra as visualizações de um lote de mensagens em uma única consulta
+
+        Só as visualizações novas (ON CONFLICT DO NOTHING) somam ao contador
+        e marcam a mensagem como lida; atualizada_em leva a mudança ao
+        delta-sync do remetente. Retorna quantas foram registradas.
+        """
+        if not mensagem_ids:
+            return 0
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                WITH novas AS (
+                    INSERT INTO visualizacoes_mensagem (id, mensagem_id, usuario_id, visualizada_em)
+                    SELECT gen_random_uuid(), mensagem_id, %(usuario)s, %(agora)s
+                    FROM unnest(%(mensagens)s::uuid[]) AS mensagem_id
+                    ON CONFLICT (mensagem_id, usuario_id) DO NOTHING
+                    RETURNING mensagem_id
+                )
+                UPDATE mensagens_canal m
+                SET visualizacoes = m.visualizacoes + 1,
+                    lida = true,
+                    lida_em = COALESCE(m.lida_em, %(agora)s),
+                    atualizada_em = %(agora)s
+                FROM novas
+                WHERE m.id = novas.mensagem_id
+                """,
+                {
+                    'usuario': str(usuario.id),
+                    'agora': timezone.now(),
+                    'mensagens': [str(mensagem_id) for mensagem_id in mensagem_ids],
+                }
+            )
+            return cursor.rowcount
+
 
 class ResponsavelConversa(models.Model):
     """
@@ -979,6 +1284,7 @@ class ResponsavelConversa(models.Model):
 
     # SLA (Service Level Agreement)
     prazo_resposta = models.IntegerField(default=24, help_text="Horas para responder")
+    prazo_resposta_em = models.DateTimeField(null=True, blank=True)  # Vazio = nada aguardando resposta
     alertado = models.BooleanField(default=False)
     atrasado = models.BooleanField(default=False)
 
@@ -988,6 +1294,16 @@ class ResponsavelConversa(models.Model):
     class Meta:
         db_table = 'responsavel_conversa'
         ordering = ['-criado_em']
+        indexes = [
+            # Varredura do verificar_sla
+            models.Index(
+                fields=['prazo_resposta_em'],
+                condition=Q(ativo=True, atrasado=False, prazo_resposta_em__isnull=False),
+                name='responsavel_prazo_pendente'
+            ),
+            # Conversas pendentes
+            models.Index(fields=['canal'], condition=Q(ativo=True, atrasado=True), name='responsavel_atrasado'),
+        ]
 
     def __str__(self):
         if self.assumida_por:
@@ -1010,11 +1326,32 @@ class ResponsavelConversa(models.Model):
 
     def esta_atrasado(self):
         """Verifica se resposta está atrasada"""
-        if not self.canal.ultima_mensagem_em:
-            return False
-
-        tempo_decorrido = timezone.now() - self.canal.ultima_mensagem_em
-        return tempo_decorrido.total_seconds() / 3600 > self.prazo_resposta
+        if self.atrasado:
+            return True
+        return self.prazo_resposta_em is not None and self.prazo_resposta_em <= timezone.now()
+
+    @classmethod
+    def registrar_mensagem(cls, mensagem):
+        """
+        Atualiza o prazo de resposta dos responsáveis do canal da mensagem
+
+        Resposta do responsável (original ou quem assumiu) zera o prazo; de
+        qualquer outro participante, inicia o prazo se ainda não houver um.
+        """
+        respondida = Q(responsavel_original_id=mensagem.remetente_id) | Q(assumida_por_id=mensagem.remetente_id)
+        novo_prazo = ExpressionWrapper(
+            Value(mensagem.enviada_em) + F('prazo_resposta') * Value(timezone.timedelta(hours=1)),
+            output_field=models.DateTimeField()
+        )
+        cls.objects.filter(canal_id=mensagem.canal_id, ativo=True).update(
+            prazo_resposta_em=Case(
+                When(respondida, then=Value(None)),
+                When(prazo_resposta_em__isnull=True, then=novo_prazo),
+                default=F('prazo_resposta_em')
+            ),
+            atrasado=Case(When(respondida, then=Value(False)), default=F('atrasado')),
+            alertado=Case(When(respondida, then=Value(False)), default=F('alertado'))
+        )
 
 
 class NotificacaoComunicacao(models.Model):
@@ -1040,6 +1377,7 @@ class NotificacaoComunicacao(models.Model):
 
     titulo = models.CharField(max_length=200)
     conteudo = models.TextField()
+    quantidade = models.PositiveIntegerField(default=1)  # Eventos agrupados enquanto não lida
 
     lida = models.BooleanField(default=False)
     lida_em = models.DateTimeField(null=True, blank=True)
@@ -1048,12 +1386,22 @@ class NotificacaoComunicacao(models.Model):
     enviada_por_sms = models.BooleanField(default=False)
 
     criada_em = models.DateTimeField(auto_now_add=True)
+    atualizada_em = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'notificacoes_comunicacao'
         ordering = ['-criada_em']
         indexes = [
             models.Index(fields=['usuario', 'lida', '-criada_em']),
+            models.Index(fields=['usuario', 'atualizada_em']),
+        ]
+        constraints = [
+            # Uma notificação não lida por usuário, canal e tipo (ver registrar_notificacoes)
+            models.UniqueConstraint(
+                fields=['usuario', 'canal', 'tipo'],
+                condition=Q(lida=False),
+                name='notificacao_nao_lida_unica'
+            ),
         ]
 
     def __str__(self):
@@ -1067,6 +1415,47 @@ class NotificacaoComunicacao(models.Model):
             self.save()
 
 
+class OutboxNotificacao(models.Model):
+    """
+    Fila de notificações a expandir para os participantes de um canal
+    Gravada na mesma transação da mensagem e processada fora da requisição
+    """
+    STATUS_CHOICES = [
+        ('PENDENTE', 'Pendente'),
+        ('ENVIADO', 'Enviado'),
+        ('ERRO', 'Erro')
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    canal = models.ForeignKey(CanalComunicacao, on_delete=models.CASCADE, related_name='outbox_notificacoes')
+    mensagem = models.ForeignKey(MensagemCanal, on_delete=models.CASCADE, null=True, blank=True)
+    remetente = models.ForeignKey('User', on_delete=models.SET_NULL, null=True, blank=True,
+                                  related_name='+')  # Não recebe a própria notificação
+
+    tipo = models.CharField(max_length=30, choices=NotificacaoComunicacao.TIPO_CHOICES)
+    titulo = models.CharField(max_length=200)
+    conteudo = models.TextField()
+
+    # Processamento
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDENTE')
+    tentativas = models.PositiveIntegerField(default=0)
+    erro = models.TextField(blank=True)
+    total_notificacoes = models.PositiveIntegerField(default=0)
+
+    criado_em = models.DateTimeField(auto_now_add=True)
+    processado_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'outbox_notificacoes'
+        ordering = ['criado_em']
+        indexes = [
+            models.Index(fields=['status', 'criado_em']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} - {self.canal} ({self.status})"
+
+
 class AuditoriaConversa(models.Model):
     """
     Auditoria completa de todas as ações em conversas
@@ -1095,7 +1484,8 @@ class AuditoriaConversa(models.Model):
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
 
-    criado_em = models.DateTimeField(auto_now_add=True)
+    # Momento da ação (não da gravação, que pode ser adiada pelo buffer)
+    criado_em = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         db_table = 'auditoria_conversa'
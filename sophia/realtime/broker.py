@@ -0,0 +1,145 @@
+# realtime/broker.py
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+import redis
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Assinatura:
+    """Conexão de um usuário aguardando eventos"""
+
+    def __init__(self, usuario_id, loop, tamanho_fila):
+        self.usuario_id = str(usuario_id)
+        self.loop = loop
+        self.fila = asyncio.Queue(maxsize=tamanho_fila)
+        self.descartados = 0
+
+    def entregar(self, quadro):
+        """Enfileira o evento (executado no loop da conexão)"""
+        try:
+            self.fila.put_nowait(quadro)
+        except asyncio.QueueFull:
+            # Cliente lento: descarta e deixa o delta-sync recuperar o atraso
+            self.descartados += 1
+
+
+class BrokerEmMemoria:
+    """
+    Pub/sub dentro do processo: entrega eventos apenas às conexões abertas
+    neste worker. Para vários workers, troque REALTIME_BROKER por uma
+    implementação com a mesma interface sobre um broker compartilhado.
+    """
+
+    def __init__(self):
+        self._assinaturas = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def assinar(self, usuario_id):
+        """Registra uma conexão (deve ser chamado dentro do event loop)"""
+        assinatura = Assinatura(
+            usuario_id,
+            asyncio.get_running_loop(),
+            settings.REALTIME_FILA_MAXIMA
+        )
+        with self._lock:
+            self._assinaturas[assinatura.usuario_id].add(assinatura)
+        return assinatura
+
+    def cancelar(self, assinatura):
+        """Remove uma conexão encerrada"""
+        with self._lock:
+            conexoes = self._assinaturas.get(assinatura.usuario_id)
+            if conexoes:
+                conexoes.discard(assinatura)
+                if not conexoes:
+                    del self._assinaturas[assinatura.usuario_id]
+
+    def publicar(self, usuario_ids, quadro):
+        """Entrega o quadro às conexões dos usuários (seguro entre threads)"""
+        with self._lock:
+            destinos = [
+                assinatura
+                for usuario_id in usuario_ids
+                for assinatura in self._assinaturas.get(str(usuario_id), ())
+            ]
+
+        for assinatura in destinos:
+            try:
+                assinatura.loop.call_soon_threadsafe(assinatura.entregar, quadro)
+            except RuntimeError:
+                # Loop já encerrado; a conexão será cancelada pelo próprio fluxo
+                logger.debug('Evento descartado para conexão encerrada de %s', assinatura.usuario_id)
+
+        return len(destinos)
+
+    def total_conexoes(self):
+        with self._lock:
+            return sum(len(conexoes) for conexoes in self._assinaturas.values())
+
+
+class BrokerRedis(BrokerEmMemoria):
+    """
+    Pub/sub entre processos sobre Redis (REALTIME_REDIS_URL)
+
+    publicar() envia o quadro a um canal do Redis; cada processo com conexões
+    abertas escuta esse canal em uma thread (iniciada na primeira assinatura)
+    e entrega às suas conexões. Assim vários workers ASGI e os processos de
+    fundo (verificar_sla, despachar_notificacoes), que não têm conexões,
+    alcançam todos os clientes. Eventos perdidos durante uma reconexão ao
+    Redis são recuperados pelo delta-sync.
+    """
+    CANAL = 'sophia:eventos'
+
+    def __init__(self):
+        super().__init__()
+        self._redis = redis.Redis.from_url(settings.REALTIME_REDIS_URL)
+        self._ouvinte = None
+
+    def assinar(self, usuario_id):
+        with self._lock:
+            if self._ouvinte is None:
+                self._ouvinte = threading.Thread(target=self._ouvir, name='realtime-redis', daemon=True)
+                self._ouvinte.start()
+        return super().assinar(usuario_id)
+
+    def _ouvir(self):
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.CANAL)
+                for mensagem in pubsub.listen():
+                    dados = json.loads(mensagem['data'])
+                    super().publicar(dados['usuarios'], dados['quadro'].encode())
+            except Exception:
+                logger.exception('Conexão do realtime com o Redis perdida; reconectando')
+                time.sleep(1)
+
+    def publicar(self, usuario_ids, quadro):
+        """Envia o quadro a todos os processos; retorna quantos estão escutando"""
+        mensagem = json.dumps({'usuarios': [str(usuario_id) for usuario_id in usuario_ids], 'quadro': quadro.decode()})
+        try:
+            return self._redis.publish(self.CANAL, mensagem)
+        except redis.RedisError:
+            # Melhor esforço: o delta-sync entrega o que não chegou em tempo real
+            logger.exception('Falha ao publicar evento no Redis')
+            return 0
+
+
+_broker = None
+
+
+def obter_broker():
+    """Instância do broker configurado em REALTIME_BROKER"""
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.REALTIME_BROKER)()
+    return _broker
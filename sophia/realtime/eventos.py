@@ -0,0 +1,41 @@
+# realtime/eventos.py
+
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from ..serializers import NotificacaoComunicacaoSerializer
+from .broker import obter_broker
+
+
+def formatar_evento(tipo, dados):
+    """Monta o quadro server-sent event uma única vez para todo o fan-out"""
+    corpo = json.dumps(dados, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return f"event: {tipo}\ndata: {corpo}\n\n".encode()
+
+
+def publicar(usuario_ids, tipo, dados):
+    """Publica o evento para os usuários após o commit da transação atual"""
+    usuario_ids = [str(usuario_id) for usuario_id in usuario_ids]
+    if not usuario_ids:
+        return
+
+    quadro = formatar_evento(tipo, dados)
+    transaction.on_commit(lambda: obter_broker().publicar(usuario_ids, quadro))
+
+
+def publicar_evento_canal(canal, tipo, dados):
+    """Publica o evento apenas para os participantes ativos do canal"""
+    usuario_ids = canal.participantes.filter(ativo=True).values_list('usuario_id', flat=True)
+    publicar(list(usuario_ids), tipo, {'canal': str(canal.id), **dados})
+
+
+def publicar_notificacoes(notificacoes):
+    """Publica cada notificação para o seu destinatário"""
+    for notificacao in notificacoes:
+        publicar(
+            [notificacao.usuario_id],
+            'notificacao.nova',
+            NotificacaoComunicacaoSerializer(notificacao).data
+        )
@@ -0,0 +1,124 @@
+# realtime/sse.py
+
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework.authtoken.models import Token
+
+from .broker import obter_broker
+
+
+def _buscar_usuario_do_token(chave):
+    """Resolve o token DRF no id do usuário (None se inválido/inativo)"""
+    close_old_connections()
+    try:
+        token = Token.objects.select_related('user').get(key=chave)
+    except Token.DoesNotExist:
+        return None
+    finally:
+        close_old_connections()
+
+    if not token.user.is_active or not token.user.ativo:
+        return None
+    return token.user.id
+
+
+autenticar = sync_to_async(_buscar_usuario_do_token)
+
+
+def _extrair_token(scope):
+    """Token via header Authorization ou ?token= (EventSource não envia headers)"""
+    for nome, valor in scope.get('headers', []):
+        if nome == b'authorization':
+            partes = valor.decode().split()
+            if len(partes) == 2 and partes[0].lower() == 'token':
+                return partes[1]
+
+    query = parse_qs(scope.get('query_string', b'').decode())
+    return query.get('token', [None])[0]
+
+
+def _cabecalhos_cors(scope):
+    origem = dict(scope.get('headers', [])).get(b'origin')
+    if origem and origem.decode() in settings.CORS_ALLOWED_ORIGINS:
+        return [
+            (b'access-control-allow-origin', origem),
+            (b'access-control-allow-credentials', b'true'),
+        ]
+    return []
+
+
+async def _aguardar_desconexao(receive):
+    while True:
+        mensagem = await receive()
+        if mensagem['type'] == 'http.disconnect':
+            return
+
+
+async def transmitir(assinatura, receive, send, heartbeat):
+    """Escreve os eventos da assinatura até o cliente desconectar"""
+    desconexao = asyncio.ensure_future(_aguardar_desconexao(receive))
+    try:
+        await send({'type': 'http.response.body', 'body': b': conectado\n\n', 'more_body': True})
+
+        while not desconexao.done():
+            proximo = asyncio.ensure_future(assinatura.fila.get())
+            prontos, _ = await asyncio.wait(
+                {proximo, desconexao},
+                timeout=heartbeat,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+
+            if proximo in prontos:
+                await send({'type': 'http.response.body', 'body': proximo.result(), 'more_body': True})
+                continue
+
+            proximo.cancel()
+            if not desconexao.done():
+                # Mantém proxies (nginx) com a conexão aberta
+                await send({'type': 'http.response.body', 'body': b': ping\n\n', 'more_body': True})
+    finally:
+        desconexao.cancel()
+
+
+async def aplicacao_eventos(scope, receive, send):
+    """
+    Endpoint ASGI de server-sent events
+
+    Cada conexão recebe os eventos (mensagem.nova, mensagem.editada,
+    mensagem.excluida, notificacao.nova) publicados para o seu usuário.
+    """
+    chave = _extrair_token(scope)
+    usuario_id = await autenticar(chave) if chave else None
+
+    if usuario_id is None:
+        await send({
+            'type': 'http.response.start',
+            'status': 401,
+            'headers': [(b'content-type', b'application/json')] + _cabecalhos_cors(scope)
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': json.dumps({'success': False, 'message': 'Token inválido'}).encode()
+        })
+        return
+
+    broker = obter_broker()
+    assinatura = broker.assinar(usuario_id)
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ] + _cabecalhos_cors(scope)
+        })
+        await transmitir(assinatura, receive, send, settings.REALTIME_HEARTBEAT_SEGUNDOS)
+    finally:
+        broker.cancelar(assinatura)
@@ -258,6 +258,30 @@ class NotaSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class NotaLoteItemSerializer(serializers.Serializer):
+    """Uma linha do lançamento em lote (validada sem consultar o banco)"""
+    aluno = serializers.UUIDField()
+    nota = serializers.DecimalField(max_digits=4, decimal_places=2, min_value=0)
+    observacao = serializers.CharField(required=False, allow_blank=True)
+
+
+class LancarNotasLoteSerializer(serializers.Serializer):
+    """Serializer para lançar uma avaliação da turma inteira"""
+    turma_disciplina = serializers.PrimaryKeyRelatedField(
+        queryset=TurmaDisciplina.objects.select_related('turma')
+    )
+    periodo = serializers.PrimaryKeyRelatedField(queryset=PeriodoAvaliativo.objects.all())
+    tipo_avaliacao = serializers.CharField(max_length=50)
+    data_avaliacao = serializers.DateField()
+    peso = serializers.DecimalField(max_digits=4, decimal_places=2, min_value=0, default=1)
+    notas = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=200)
+
+    def validate(self, attrs):
+        if attrs['periodo'].ano_letivo_id != attrs['turma_disciplina'].turma.ano_letivo_id:
+            raise serializers.ValidationError({'periodo': 'Período não pertence ao ano letivo da turma'})
+        return attrs
+
+
 class FrequenciaSerializer(serializers.ModelSerializer):
     aluno_nome = serializers.CharField(source='aluno.usuario.get_full_name', read_only=True)
     disciplina_nome = serializers.CharField(source='turma_disciplina.disciplina.nome', read_only=True)
@@ -273,6 +297,41 @@ class FrequenciaSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class PresencaChamadaSerializer(serializers.Serializer):
+    aluno_id = serializers.UUIDField()
+    presente = serializers.BooleanField()
+
+
+class RegistrarChamadaSerializer(serializers.Serializer):
+    """Serializer para registrar a chamada da turma inteira"""
+    turma_disciplina_id = serializers.PrimaryKeyRelatedField(queryset=TurmaDisciplina.objects.all())
+    data = serializers.DateField()
+    presencas = PresencaChamadaSerializer(many=True, allow_empty=False)
+
+    def validate_presencas(self, value):
+        aluno_ids = [item['aluno_id'] for item in value]
+        if len(set(aluno_ids)) != len(aluno_ids):
+            raise serializers.ValidationError('Aluno repetido na chamada')
+        return value
+
+
+class TaxaFrequenciaSerializer(serializers.Serializer):
+    """Parâmetros da consulta de frequência (%) em um período"""
+    data_inicio = serializers.DateField()
+    data_fim = serializers.DateField()
+    aluno_id = serializers.UUIDField(required=False)
+    turma_id = serializers.UUIDField(required=False)
+    turma_disciplina_id = serializers.IntegerField(required=False)
+    abaixo_minimo = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if attrs['data_inicio'] > attrs['data_fim']:
+            raise serializers.ValidationError({'data_fim': 'data_fim deve ser posterior a data_inicio'})
+        if not any(attrs.get(campo) for campo in ('aluno_id', 'turma_id', 'turma_disciplina_id')):
+            raise serializers.ValidationError('Informe aluno_id, turma_id ou turma_disciplina_id')
+        return attrs
+
+
 # ============================================
 # FINANCEIRO
 # ============================================
@@ -367,11 +426,14 @@ class DashboardSerializer(serializers.Serializer):
 # sophia/serializers.py - ADICIONAR AO ARQUIVO EXISTENTE
 
 from rest_framework import serializers
+from django.conf import settings
+from django.db import models
 from .models import (
     CanalComunicacao, ParticipanteCanal, MensagemCanal,
     AnexoMensagem, ResponsavelConversa, NotificacaoComunicacao,
     AuditoriaConversa, Visualizacao
 )
+from .utils.threads import carregar_threads
 
 
 # ============================================
@@ -391,15 +453,33 @@ class ParticipanteCanalSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'usuario', 'nome', 'email', 'foto', 'role',
             'papel', 'papel_display', 'ativo', 'pode_enviar',
-            'notificar', 'adicionado_em', 'ultima_visualizacao'
+            'notificar', 'adicionado_em', 'ultima_visualizacao',
+            'ultima_mensagem_lida', 'lida_ate', 'nao_lidas'
         ]
-        read_only_fields = ['adicionado_em', 'ultima_visualizacao']
+        read_only_fields = [
+            'adicionado_em', 'ultima_visualizacao',
+            'ultima_mensagem_lida', 'lida_ate', 'nao_lidas'
+        ]
+
+
+class AnexosMensagemListSerializer(serializers.ListSerializer):
+    """Assina de uma vez as URLs dos anexos deduplicados da lista"""
+
+    def to_representation(self, data):
+        from .services.armazenamento import caminhos_anexo, urls_assinadas  # services importa os serializers
+
+        anexos = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        self.child.urls_assinadas = urls_assinadas(
+            caminho for anexo in anexos for caminho in caminhos_anexo(anexo)
+        )
+        return super().to_representation(anexos)
 
 
 class AnexoMensagemSerializer(serializers.ModelSerializer):
-    """Serializer para anexos"""
+    """Serializer para anexos (objetos deduplicados saem com URLs assinadas)"""
     tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
     tamanho_mb = serializers.SerializerMethodField()
+    urls_assinadas = None
 
     class Meta:
         model = AnexoMensagem
@@ -407,9 +487,18 @@ class AnexoMensagemSerializer(serializers.ModelSerializer):
             'id', 'tipo', 'tipo_display', 'nome_arquivo', 'url',
             'tamanho', 'tamanho_mb', 'mime_type', 'e_trabalho',
             'atividade', 'nota_trabalho', 'feedback_professor',
-            'enviado_em', 'downloads'
+            'enviado_em', 'downloads', 'variantes'
         ]
-        read_only_fields = ['enviado_em', 'downloads']
+        read_only_fields = ['enviado_em', 'downloads', 'variantes']
+        list_serializer_class = AnexosMensagemListSerializer
+
+    def to_representation(self, instance):
+        from .services.armazenamento import urls_anexo
+
+        dados = super().to_representation(instance)
+        if instance.objeto_id:
+            dados['url'], dados['variantes'] = urls_anexo(instance, self.urls_assinadas)
+        return dados
 
     def get_tamanho_mb(self, obj):
         """Retorna tamanho em MB"""
@@ -426,6 +515,20 @@ class VisualizacaoSerializer(serializers.ModelSerializer):
         fields = ['id', 'usuario', 'nome_usuario', 'foto_usuario', 'visualizada_em']
 
 
+def profundidade_thread(context):
+    """Níveis de respostas a serializar (contexto ou MENSAGENS_PROFUNDIDADE_THREAD)"""
+    return context.get('profundidade_thread', settings.MENSAGENS_PROFUNDIDADE_THREAD)
+
+
+class MensagensComThreadSerializer(serializers.ListSerializer):
+    """Carrega as threads da lista inteira em lote antes de serializar"""
+
+    def to_representation(self, data):
+        mensagens = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        carregar_threads(mensagens, profundidade_thread(self.context))
+        return super().to_representation(mensagens)
+
+
 class MensagemCanalSerializer(serializers.ModelSerializer):
     """Serializer para mensagens"""
     remetente_nome = serializers.CharField(source='remetente.get_full_name', read_only=True)
@@ -451,14 +554,22 @@ class MensagemCanalSerializer(serializers.ModelSerializer):
             'respondendo_a_info', 'anexos', 'respostas', 'editada',
             'editada_em', 'excluida', 'lida', 'lida_em',
             'visualizacoes_detalhadas', 'total_visualizacoes',
-            'requer_confirmacao', 'enviada_em'
+            'requer_confirmacao', 'enviada_em', 'atualizada_em'
         ]
-        read_only_fields = ['remetente', 'enviada_em', 'editada', 'editada_em']
+        read_only_fields = ['remetente', 'enviada_em', 'editada', 'editada_em', 'atualizada_em']
+        list_serializer_class = MensagensComThreadSerializer
 
     def get_respostas(self, obj):
-        """Retorna respostas (threads)"""
-        respostas = obj.respostas.filter(excluida=False).select_related('remetente')[:10]
-        return MensagemCanalSerializer(respostas, many=True, context=self.context).data
+        """Retorna respostas (threads) carregadas em lote por carregar_threads"""
+        profundidade = profundidade_thread(self.context)
+        if profundidade <= 0:
+            return []
+
+        if not hasattr(obj, '_respostas'):
+            carregar_threads([obj], profundidade)
+
+        contexto = {**self.context, 'profundidade_thread': profundidade - 1}
+        return MensagemCanalSerializer(obj._respostas, many=True, context=contexto).data
 
     def get_respondendo_a_info(self, obj):
         """Informações da mensagem respondida"""
@@ -471,6 +582,21 @@ class MensagemCanalSerializer(serializers.ModelSerializer):
         return None
 
 
+class ResultadoBuscaMensagemSerializer(serializers.ModelSerializer):
+    """Serializer para resultados da busca de mensagens"""
+    canal_nome = serializers.CharField(source='canal.nome', read_only=True)
+    remetente_nome = serializers.CharField(source='remetente.get_full_name', read_only=True)
+    trecho = serializers.CharField(read_only=True)
+    relevancia = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = MensagemCanal
+        fields = [
+            'id', 'canal', 'canal_nome', 'remetente', 'remetente_nome',
+            'tipo', 'trecho', 'relevancia', 'enviada_em'
+        ]
+
+
 class ResponsavelConversaSerializer(serializers.ModelSerializer):
     """Serializer para responsáveis de conversa"""
     responsavel_original_nome = serializers.CharField(source='responsavel_original.get_full_name', read_only=True)
@@ -484,16 +610,17 @@ class ResponsavelConversaSerializer(serializers.ModelSerializer):
             'id', 'canal', 'responsavel_original', 'responsavel_original_nome',
             'assumida_por', 'assumida_por_nome', 'assumida_em',
             'motivo_assuncao', 'ativo', 'devolvida', 'devolvida_em',
-            'prazo_resposta', 'alertado', 'atrasado', 'esta_atrasado',
+            'prazo_resposta', 'prazo_resposta_em', 'alertado', 'atrasado', 'esta_atrasado',
             'tempo_decorrido_horas', 'criado_em', 'atualizado_em'
         ]
 
     def get_tempo_decorrido_horas(self, obj):
-        """Tempo decorrido desde última mensagem"""
-        if not obj.canal.ultima_mensagem_em:
+        """Tempo decorrido desde a mensagem que aguarda resposta"""
+        if not obj.prazo_resposta_em:
             return 0
         from django.utils import timezone
-        delta = timezone.now() - obj.canal.ultima_mensagem_em
+        aguardando_desde = obj.prazo_resposta_em - timezone.timedelta(hours=obj.prazo_resposta)
+        delta = timezone.now() - aguardando_desde
         return round(delta.total_seconds() / 3600, 1)
 
 
@@ -505,41 +632,49 @@ class CanalComunicacaoListSerializer(serializers.ModelSerializer):
     mensagens_nao_lidas = serializers.SerializerMethodField()
     ultima_mensagem = serializers.SerializerMethodField()
     meu_papel = serializers.SerializerMethodField()
+    fixado = serializers.SerializerMethodField()
+    silenciado = serializers.SerializerMethodField()
 
     class Meta:
         model = CanalComunicacao
         fields = [
             'id', 'tipo', 'tipo_display', 'nome', 'descricao',
-            'status', 'status_display', 'fixado', 'total_participantes',
+            'status', 'status_display', 'fixado', 'silenciado', 'total_participantes',
             'mensagens_nao_lidas', 'ultima_mensagem', 'ultima_mensagem_em',
             'meu_papel', 'criado_em'
         ]
 
     def get_total_participantes(self, obj):
-        return obj.participantes.filter(ativo=True).count()
+        return obj.total_participantes
 
     def get_mensagens_nao_lidas(self, obj):
+        # Anotado pelo ViewSet a partir do cursor de leitura do participante
+        if hasattr(obj, 'total_nao_lidas'):
+            return obj.total_nao_lidas or 0
         usuario = self.context['request'].user
         return obj.obter_nao_lidas(usuario)
 
     def get_ultima_mensagem(self, obj):
         """Última mensagem do canal"""
-        ultima = obj.mensagens.filter(excluida=False).select_related('remetente').last()
-        if ultima:
-            return {
-                'id': str(ultima.id),
-                'remetente': ultima.remetente.get_full_name(),
-                'conteudo': ultima.conteudo[:100],
-                'enviada_em': ultima.enviada_em
-            }
-        return None
+        return obj.ultima_mensagem_resumo
 
     def get_meu_papel(self, obj):
         """Papel do usuário atual no canal"""
+        # Anotado pelo ViewSet; fallback para uso fora dele
+        if hasattr(obj, 'meu_papel'):
+            return dict(ParticipanteCanal.PAPEL_CHOICES).get(obj.meu_papel)
         usuario = self.context['request'].user
         participante = obj.participantes.filter(usuario=usuario).first()
         return participante.get_papel_display() if participante else None
 
+    def get_fixado(self, obj):
+        # Preferência do participante (anotada pelo ViewSet); sem participação, a do canal
+        meu_fixado = getattr(obj, 'meu_fixado', None)
+        return obj.fixado if meu_fixado is None else meu_fixado
+
+    def get_silenciado(self, obj):
+        return bool(getattr(obj, 'meu_silenciado', False))
+
 
 class CanalComunicacaoSerializer(serializers.ModelSerializer):
     """Serializer completo para canal"""
@@ -570,14 +705,16 @@ class CanalComunicacaoSerializer(serializers.ModelSerializer):
 
     def get_mensagens_recentes(self, obj):
         """Últimas 50 mensagens"""
-        mensagens = obj.mensagens.filter(excluida=False).select_related('remetente').order_by('-enviada_em')[:50]
+        mensagens = obj.mensagens.filter(excluida=False).select_related(
+            'remetente', 'respondendo_a__remetente'
+        ).order_by('-enviada_em')[:50]
         return MensagemCanalSerializer(mensagens, many=True, context=self.context).data
 
     def get_estatisticas(self, obj):
         """Estatísticas do canal"""
         return {
-            'total_mensagens': obj.mensagens.filter(excluida=False).count(),
-            'total_participantes': obj.participantes.filter(ativo=True).count(),
+            'total_mensagens': obj.total_mensagens,
+            'total_participantes': obj.total_participantes,
             'total_anexos': AnexoMensagem.objects.filter(mensagem__canal=obj).count(),
             'trabalhos_entregues': AnexoMensagem.objects.filter(
                 mensagem__canal=obj,
@@ -595,10 +732,10 @@ class NotificacaoComunicacaoSerializer(serializers.ModelSerializer):
         model = NotificacaoComunicacao
         fields = [
             'id', 'tipo', 'tipo_display', 'canal', 'canal_nome',
-            'mensagem', 'titulo', 'conteudo', 'lida', 'lida_em',
-            'criada_em'
+            'mensagem', 'titulo', 'conteudo', 'quantidade', 'lida', 'lida_em',
+            'criada_em', 'atualizada_em'
         ]
-        read_only_fields = ['criada_em']
+        read_only_fields = ['criada_em', 'atualizada_em']
 
 
 class AuditoriaConversaSerializer(serializers.ModelSerializer):
@@ -656,6 +793,32 @@ class EnviarMensagemSerializer(serializers.Serializer):
     )
 
 
+class SolicitarUploadSerializer(serializers.Serializer):
+    """Serializer para solicitar URL de upload de anexo"""
+    nome_arquivo = serializers.CharField(max_length=255)
+    tamanho = serializers.IntegerField(required=False, min_value=1)
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$', required=False)  # Evita reenviar conteúdo conhecido
+
+    def validate_tamanho(self, value):
+        if value > settings.ANEXOS_TAMANHO_MAXIMO:
+            raise serializers.ValidationError('Arquivo excede o tamanho máximo permitido')
+        return value
+
+
+class PreferenciasCanalSerializer(serializers.Serializer):
+    """Serializer para as preferências do participante no canal"""
+    fixado = serializers.BooleanField(required=False)
+    silenciado = serializers.BooleanField(required=False)
+    notificar = serializers.BooleanField(required=False)
+
+
+class ConfirmarAnexoSerializer(serializers.Serializer):
+    """Serializer para anexar um arquivo já enviado ao Storage"""
+    chave_upload = serializers.CharField()
+    e_trabalho = serializers.BooleanField(default=False)
+    atividade_id = serializers.UUIDField(required=False, allow_null=True)
+
+
 class AdicionarParticipantesSerializer(serializers.Serializer):
     """Serializer para adicionar participantes"""
     usuarios_ids = serializers.ListField(child=serializers.UUIDField())
@@ -666,6 +829,11 @@ class AdicionarParticipantesSerializer(serializers.Serializer):
     notificar = serializers.BooleanField(default=True)
 
 
+class RemoverParticipantesSerializer(serializers.Serializer):
+    """Serializer para remover participantes"""
+    usuarios_ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False)
+
+
 class AssumirConversaSerializer(serializers.Serializer):
     """Serializer para assumir conversa"""
     motivo = serializers.CharField(required=False, allow_blank=True)
\ No newline at end of file
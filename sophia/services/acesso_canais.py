@@ -0,0 +1,98 @@
+# services/acesso_canais.py
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import BooleanField, Value
+
+from ..models import CanalComunicacao, ParticipanteCanal, Turma
+
+
+def _chave(usuario_id):
+    return f'acesso_canais:{usuario_id}'
+
+
+class AcessoCanais:
+    """
+    Participações, administrações e coordenações de um usuário nos canais
+
+    Carregado com uma consulta (duas para coordenadores) e usado por todos os
+    predicados de permissão dos canais e mensagens.
+    """
+
+    def __init__(self, participacoes, administrados, turmas_coordenadas):
+        self.participacoes = participacoes  # {canal_id: ativo}
+        self.administrados = administrados  # {canal_id}
+        self.turmas_coordenadas = turmas_coordenadas  # {turma_id}
+
+    @classmethod
+    def carregar(cls, usuario):
+        administradores = CanalComunicacao.administradores.through.objects.filter(
+            user_id=usuario.id
+        ).values_list('canalcomunicacao_id', Value(False), Value(True, output_field=BooleanField()))
+        linhas = ParticipanteCanal.objects.filter(usuario_id=usuario.id).values_list(
+            'canal_id', 'ativo', Value(False, output_field=BooleanField())
+        ).union(administradores, all=True)
+
+        participacoes, administrados = {}, set()
+        for canal_id, ativo, administra in linhas:
+            if administra:
+                administrados.add(canal_id)
+            else:
+                participacoes[canal_id] = ativo
+
+        turmas = set()
+        if usuario.role == 'COORDENADOR':
+            turmas = set(Turma.objects.filter(coordenador_id=usuario.id).values_list('id', flat=True))
+        return cls(participacoes, administrados, turmas)
+
+    def participa(self, canal_id):
+        return canal_id in self.participacoes
+
+    def participa_ativamente(self, canal_id):
+        return self.participacoes.get(canal_id, False)
+
+    def administra(self, canal_id):
+        return canal_id in self.administrados
+
+    def coordena(self, turma_id):
+        return turma_id is not None and turma_id in self.turmas_coordenadas
+
+
+def obter_acesso(usuario):
+    """
+    Acesso do usuário aos canais, carregado no máximo uma vez por requisição
+
+    Fica guardado no próprio objeto do usuário (request.user vive uma
+    requisição) e, com ACESSO_CANAIS_CACHE_SEGUNDOS, também no cache
+    compartilhado. Mudanças de participação e de coordenação de turma
+    invalidam o cache compartilhado; o restante (ex.: troca de papel do
+    usuário) fica defasado no máximo pelo TTL.
+    """
+    acesso = getattr(usuario, '_acesso_canais', None)
+    if acesso is not None:
+        return acesso
+
+    segundos = settings.ACESSO_CANAIS_CACHE_SEGUNDOS
+    if segundos:
+        acesso = cache.get(_chave(usuario.id))
+    if acesso is None:
+        acesso = AcessoCanais.carregar(usuario)
+        if segundos:
+            cache.set(_chave(usuario.id), acesso, segundos)
+
+    usuario._acesso_canais = acesso
+    return acesso
+
+
+def acessos_alterados(usuario_ids):
+    """Descarta do cache compartilhado o acesso dos usuários (após o commit)"""
+    chaves = [_chave(usuario_id) for usuario_id in usuario_ids]
+    transaction.on_commit(lambda: cache.delete_many(chaves))
+
+
+def coordenadores_alterados(*usuario_ids):
+    """Coordenador de turma atribuído, trocado ou removido: descarta o acesso do anterior e do novo"""
+    usuario_ids = {usuario_id for usuario_id in usuario_ids if usuario_id}
+    if usuario_ids:
+        acessos_alterados(usuario_ids)
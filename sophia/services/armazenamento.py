@@ -0,0 +1,205 @@
+# services/armazenamento.py
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from ..models import AnexoMensagem, ObjetoArmazenado
+from ..utils.supabase_storage import delete_files, get_path_from_url, get_signed_urls, stored_file_sha256
+from .acesso_canais import obter_acesso
+from .miniaturas import FORMATOS, agendar_miniaturas, processar_anexo
+
+logger = logging.getLogger(__name__)
+
+# Pool próprio: baixar e calcular o hash não ocupa os workers das requisições
+_executor = ThreadPoolExecutor(max_workers=settings.ANEXOS_INDEXACAO_WORKERS, thread_name_prefix='armazenamento')
+
+
+def _reaproveitar(objeto):
+    """Renova a carência do objeto para que a limpeza não o remova antes do anexo"""
+    agora = timezone.now()
+    ObjetoArmazenado.objects.filter(pk=objeto.pk).update(usado_em=agora)
+    objeto.usado_em = agora
+    return objeto
+
+
+def agendar_processamento(anexo):
+    """
+    Processa o anexo recém-confirmado em segundo plano, após o commit
+
+    Uploads diretos ao Storage são deduplicados (indexar_anexo) antes das
+    miniaturas, que assim podem ser reaproveitadas do objeto existente.
+    """
+    if anexo.objeto_id or not anexo.caminho:
+        agendar_miniaturas(anexo)
+        return
+    transaction.on_commit(lambda: _executor.submit(_processar_em_segundo_plano, anexo.id))
+
+
+def _processar_em_segundo_plano(anexo_id):
+    try:
+        indexar_anexo(anexo_id)
+    except Exception:
+        # Continua sem objeto: só perde a deduplicação
+        logger.exception('Falha ao indexar o anexo %s', anexo_id)
+    try:
+        if settings.MINIATURAS_ATIVAS:
+            processar_anexo(anexo_id)
+    except Exception:
+        logger.exception('Falha ao gerar miniaturas do anexo %s', anexo_id)
+    finally:
+        close_old_connections()
+
+
+def indexar_anexo(anexo_id):
+    """
+    Deduplica um anexo enviado direto ao Storage pelo SHA-256 do conteúdo
+
+    O hash é calculado pelo servidor, baixando o arquivo em blocos. Conteúdo
+    novo vira um ObjetoArmazenado no próprio caminho do upload; conteúdo já
+    conhecido passa a apontar para o objeto existente e a cópia é removida.
+    Retorna True se o anexo foi vinculado a um objeto.
+    """
+    anexo = AnexoMensagem.objects.filter(pk=anexo_id, objeto__isnull=True).exclude(caminho='').first()
+    if anexo is None:
+        return False
+
+    sha256 = stored_file_sha256(anexo.caminho)
+    if sha256 is None:
+        logger.warning('Anexo %s ausente do Storage: %s', anexo.id, anexo.caminho)
+        return False
+
+    with transaction.atomic():
+        objeto, criado = ObjetoArmazenado.objects.get_or_create(sha256=sha256, defaults={
+            'caminho': anexo.caminho,
+            'url': anexo.url,
+            'tamanho': anexo.tamanho,
+            'mime_type': anexo.mime_type,
+        })
+        vinculado = AnexoMensagem.objects.filter(pk=anexo.pk, objeto__isnull=True).update(
+            objeto=objeto, caminho=objeto.caminho, url=objeto.url
+        )
+        if vinculado and not criado:
+            copia = anexo.caminho
+            transaction.on_commit(lambda: delete_files([copia]))
+    return bool(vinculado)
+
+
+def localizar_objeto(sha256, tamanho, usuario):
+    """
+    Objeto com o conteúdo informado pelo cliente (hash e tamanho)
+
+    O hash não é verificado pelo servidor, então só vale para objetos já
+    anexados em canais dos quais o usuário participa: quem conhece o hash de
+    um arquivo de outro canal não consegue anexá-lo nem confirmar que existe.
+    """
+    acesso = obter_acesso(usuario)
+    canais = set(acesso.participacoes) | acesso.administrados
+    if not canais:
+        return None
+
+    objeto = ObjetoArmazenado.objects.filter(
+        sha256=sha256.lower(), tamanho=tamanho,
+        anexos__mensagem__canal_id__in=canais, anexos__mensagem__excluida=False
+    ).first()
+    return _reaproveitar(objeto) if objeto else None
+
+
+def _chave_url(caminho):
+    return f'url_assinada:{caminho}'
+
+
+def urls_assinadas(caminhos):
+    """
+    URLs assinadas de leitura, em uma chamada ao Storage ({caminho: url})
+
+    Ficam no cache por quase toda a validade, então a mesma mensagem
+    entregue várias vezes reaproveita as URLs.
+    """
+    caminhos = set(caminhos)
+    if not caminhos:
+        return {}
+
+    guardadas = cache.get_many([_chave_url(caminho) for caminho in caminhos])
+    urls = {caminho: guardadas[_chave_url(caminho)] for caminho in caminhos if _chave_url(caminho) in guardadas}
+
+    faltando = caminhos - urls.keys()
+    if faltando:
+        validade = settings.ANEXOS_VALIDADE_URL_SEGUNDOS
+        novas = get_signed_urls(faltando, validade)
+        cache.set_many({_chave_url(caminho): url for caminho, url in novas.items()}, validade * 5 // 6)
+        urls.update(novas)
+    return urls
+
+
+def caminhos_anexo(anexo):
+    """Caminhos do original e das miniaturas de um anexo deduplicado"""
+    if not anexo.objeto_id:
+        return []
+    return [anexo.caminho] + [
+        get_path_from_url(variante[formato])
+        for variante in anexo.variantes.values() for formato in FORMATOS if variante.get(formato)
+    ]
+
+
+def urls_anexo(anexo, assinadas=None):
+    """
+    URL e miniaturas do anexo como devem ser entregues ao cliente
+
+    Objetos deduplicados são endereçados pelo conteúdo: saem com URLs
+    assinadas, nunca com a URL pública (`assinadas` vem de urls_assinadas).
+    Retorna (url, variantes).
+    """
+    if not anexo.objeto_id:
+        return anexo.url, anexo.variantes
+    if assinadas is None:
+        assinadas = urls_assinadas(caminhos_anexo(anexo))
+
+    variantes = {
+        tamanho: {
+            chave: assinadas.get(get_path_from_url(valor)) if chave in FORMATOS else valor
+            for chave, valor in variante.items()
+        }
+        for tamanho, variante in anexo.variantes.items()
+    }
+    return assinadas.get(anexo.caminho), variantes
+
+
+def _caminhos(objeto):
+    """Objeto original e miniaturas geradas ao lado dele"""
+    base = objeto.caminho.rsplit('.', 1)[0]
+    return [objeto.caminho] + [
+        f'{base}_{tamanho}.{formato}'
+        for tamanho in settings.MINIATURAS_TAMANHOS for formato in FORMATOS
+    ]
+
+
+def limpar_objetos(limite=500):
+    """
+    Remove objetos sem referências há mais que ANEXOS_VALIDADE_UPLOAD_SEGUNDOS
+
+    A carência cobre chaves de upload emitidas para o objeto e ainda não
+    confirmadas. Retorna quantos objetos foram removidos.
+    """
+    corte = timezone.now() - timedelta(seconds=settings.ANEXOS_VALIDADE_UPLOAD_SEGUNDOS)
+    with transaction.atomic():
+        orfaos = list(
+            ObjetoArmazenado.objects.select_for_update(skip_locked=True).filter(
+                referencias=0, usado_em__lt=corte
+            ).order_by('usado_em')[:limite]
+        )
+        if not orfaos:
+            return 0
+        ObjetoArmazenado.objects.filter(pk__in=[objeto.pk for objeto in orfaos]).delete()
+
+    caminhos = [caminho for objeto in orfaos for caminho in _caminhos(objeto)]
+    try:
+        delete_files(caminhos)
+    except Exception:
+        logger.exception('Falha ao remover %s objeto(s) do Storage', len(orfaos))
+    return len(orfaos)
@@ -0,0 +1,139 @@
+# services/auditoria.py
+
+import atexit
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from ..models import AuditoriaConversa
+
+logger = logging.getLogger(__name__)
+
+
+class EscritorAuditoria:
+    """
+    Buffer de auditoria por processo (write-behind)
+
+    As entradas entram no buffer após o commit da requisição e são gravadas
+    com bulk_create quando o lote enche ou a cada intervalo, por uma thread
+    do próprio worker. Se o buffer falhar, a gravação volta a ser síncrona.
+    """
+
+    def __init__(self, tamanho_lote, intervalo, tamanho_maximo):
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self.tamanho_maximo = tamanho_maximo
+
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._gravacao = threading.Lock()  # Uma gravação por vez (inclusive no atexit)
+        self._lote_cheio = threading.Event()
+        self._thread = None
+        self._pid = None
+
+        atexit.register(self.descarregar)
+
+    def adicionar(self, entrada):
+        """Enfileira a entrada; grava na hora se o buffer estiver indisponível"""
+        try:
+            self._garantir_thread()
+            with self._lock:
+                if len(self._buffer) >= self.tamanho_maximo:
+                    raise OverflowError('Buffer de auditoria cheio')
+                self._buffer.append(entrada)
+                cheio = len(self._buffer) >= self.tamanho_lote
+        except Exception:
+            logger.warning('Buffer de auditoria indisponível, gravando de forma síncrona', exc_info=True)
+            self._gravar_individualmente([entrada])
+            return
+
+        if cheio:
+            self._lote_cheio.set()
+
+    def descarregar(self):
+        """Grava tudo que está no buffer; retorna quantas entradas foram gravadas"""
+        with self._gravacao:
+            with self._lock:
+                entradas, self._buffer = self._buffer, []
+            if not entradas:
+                return 0
+
+            try:
+                AuditoriaConversa.objects.bulk_create(entradas, batch_size=self.tamanho_lote)
+            except Exception:
+                logger.exception('Falha ao gravar lote de %s entradas de auditoria', len(entradas))
+                return self._gravar_individualmente(entradas)
+            return len(entradas)
+
+    def pendentes(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def _gravar_individualmente(self, entradas):
+        gravadas = 0
+        for entrada in entradas:
+            try:
+                entrada.save(force_insert=True)
+                gravadas += 1
+            except Exception:
+                logger.exception('Entrada de auditoria descartada: %s', entrada.acao)
+        return gravadas
+
+    def _garantir_thread(self):
+        # Workers criados por fork não herdam a thread do processo pai
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._executar, name='escritor-auditoria', daemon=True
+                )
+                self._thread.start()
+
+    def _executar(self):
+        while True:
+            self._lote_cheio.wait(self.intervalo)
+            self._lote_cheio.clear()
+            try:
+                self.descarregar()
+            except Exception:
+                logger.exception('Erro no escritor de auditoria')
+            finally:
+                close_old_connections()
+
+
+_escritor = None
+
+
+def obter_escritor():
+    """Escritor de auditoria deste processo"""
+    global _escritor
+    if _escritor is None:
+        _escritor = EscritorAuditoria(
+            tamanho_lote=settings.AUDITORIA_TAMANHO_LOTE,
+            intervalo=settings.AUDITORIA_INTERVALO_SEGUNDOS,
+            tamanho_maximo=settings.AUDITORIA_BUFFER_MAXIMO
+        )
+    return _escritor
+
+
+def registrar_auditoria(**campos):
+    """
+    Registra uma ação em AuditoriaConversa
+
+    Com AUDITORIA_BUFFER_ATIVO a entrada só entra no buffer se a transação
+    atual confirmar (mesma semântica do create dentro da transação).
+    """
+    entrada = AuditoriaConversa(**campos)
+
+    if not settings.AUDITORIA_BUFFER_ATIVO:
+        entrada.save(force_insert=True)
+        return entrada
+
+    transaction.on_commit(lambda: obter_escritor().adicionar(entrada))
+    return entrada
@@ -0,0 +1,160 @@
+# services/badges.py
+
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum
+
+from ..models import Mensagem, NotificacaoComunicacao, ParticipanteCanal
+
+# Acertos/faltas de cache deste processo (ver benchmark_badges)
+estatisticas = {'acertos': 0, 'faltas': 0}
+_lock_estatisticas = threading.Lock()
+
+
+def _chave(usuario_id, contador):
+    return f'badges:{usuario_id}:{contador}'
+
+
+def _contabilizar(acertos, faltas):
+    with _lock_estatisticas:
+        estatisticas['acertos'] += acertos
+        estatisticas['faltas'] += faltas
+
+
+def taxa_acerto():
+    total = estatisticas['acertos'] + estatisticas['faltas']
+    return estatisticas['acertos'] / total if total else 0.0
+
+
+def obter_badges(usuario):
+    """
+    Contadores de não lidos do usuário: notificações, mensagens diretas e canais
+
+    Lidos do cache; só os contadores ausentes são recalculados no banco.
+    As escritas incrementam os contadores em vez de invalidá-los, e o TTL
+    limita a defasagem caso um incremento se perca entre leitura e gravação.
+    Com BADGES_CACHE_SEGUNDOS = 0 (padrão sem cache compartilhado, em que os
+    incrementos de outros processos se perderiam) tudo vem do banco.
+    """
+    usar_cache = settings.BADGES_CACHE_SEGUNDOS > 0
+    chaves = {nome: _chave(usuario.id, nome) for nome in ('notificacoes', 'diretas', 'canais')}
+    valores = cache.get_many(chaves.values()) if usar_cache else {}
+    calculados = {}
+
+    notificacoes = valores.get(chaves['notificacoes'])
+    if notificacoes is None:
+        notificacoes = NotificacaoComunicacao.objects.filter(
+            usuario=usuario, lida=False
+        ).aggregate(total=Sum('quantidade'))['total'] or 0
+        calculados[chaves['notificacoes']] = notificacoes
+
+    diretas = valores.get(chaves['diretas'])
+    if diretas is None:
+        diretas = Mensagem.objects.filter(destinatario=usuario, lida=False).count()
+        calculados[chaves['diretas']] = diretas
+
+    canal_ids = valores.get(chaves['canais'])
+    if canal_ids is None:
+        canal_ids = [
+            str(canal_id) for canal_id in
+            ParticipanteCanal.objects.filter(usuario=usuario, ativo=True).values_list('canal_id', flat=True)
+        ]
+        calculados[chaves['canais']] = canal_ids
+
+    chaves_canais = {_chave(usuario.id, f'canal:{canal_id}'): canal_id for canal_id in canal_ids}
+    por_canal = {
+        chaves_canais[chave]: valor
+        for chave, valor in (cache.get_many(chaves_canais) if usar_cache else {}).items()
+    }
+    faltando = [canal_id for canal_id in canal_ids if canal_id not in por_canal]
+    if faltando:
+        for canal_id, nao_lidas in ParticipanteCanal.objects.filter(
+            usuario=usuario, canal_id__in=faltando
+        ).values_list('canal_id', 'nao_lidas'):
+            por_canal[str(canal_id)] = nao_lidas
+            calculados[_chave(usuario.id, f'canal:{canal_id}')] = nao_lidas
+
+    if calculados and usar_cache:
+        cache.set_many(calculados, settings.BADGES_CACHE_SEGUNDOS)
+    _contabilizar(3 + len(canal_ids) - len(calculados), len(calculados))
+
+    canais = {canal_id: nao_lidas for canal_id, nao_lidas in por_canal.items() if nao_lidas}
+    return {
+        'notificacoes': notificacoes,
+        'mensagens_diretas': diretas,
+        'canais': canais,
+        'total_canais': sum(canais.values()),
+    }
+
+
+def _incrementar(chaves, delta=1):
+    for chave in chaves:
+        try:
+            cache.incr(chave, delta)
+        except ValueError:
+            pass  # Fora do cache: será recalculado na próxima leitura
+
+
+# Escritas (aplicadas no cache só após o commit)
+
+def somar_notificacoes(quantidades):
+    """quantidades: {usuario_id: eventos registrados}"""
+    def aplicar():
+        for usuario_id, quantidade in quantidades.items():
+            _incrementar([_chave(usuario_id, 'notificacoes')], quantidade)
+    transaction.on_commit(aplicar)
+
+
+def notificacoes_lidas(usuario_id, quantidade):
+    """Desconta os eventos de uma notificação lida"""
+    transaction.on_commit(lambda: _incrementar([_chave(usuario_id, 'notificacoes')], -quantidade))
+
+
+def todas_notificacoes_lidas(usuario_id):
+    transaction.on_commit(
+        lambda: cache.set(_chave(usuario_id, 'notificacoes'), 0, settings.BADGES_CACHE_SEGUNDOS)
+    )
+
+
+def nova_mensagem_canal(canal_id, remetente_id):
+    """Soma 1 ao contador do canal para os demais participantes ativos"""
+    def aplicar():
+        usuario_ids = ParticipanteCanal.objects.filter(
+            canal_id=canal_id, ativo=True
+        ).exclude(usuario_id=remetente_id).values_list('usuario_id', flat=True)
+        _incrementar(_chave(usuario_id, f'canal:{canal_id}') for usuario_id in usuario_ids)
+    transaction.on_commit(aplicar)
+
+
+def canal_lido(canal_id, usuario_id, notificacoes_lidas=0):
+    """Leitura do canal zera o contador (e o de notificações, se alguma foi lida)"""
+    def aplicar():
+        cache.set(_chave(usuario_id, f'canal:{canal_id}'), 0, settings.BADGES_CACHE_SEGUNDOS)
+        if notificacoes_lidas:
+            cache.delete(_chave(usuario_id, 'notificacoes'))
+    transaction.on_commit(aplicar)
+
+
+def canal_alterado(canal_id):
+    """Descarta o contador do canal de todos os participantes (ex.: mensagem excluída)"""
+    def aplicar():
+        usuario_ids = ParticipanteCanal.objects.filter(canal_id=canal_id).values_list('usuario_id', flat=True)
+        cache.delete_many([_chave(usuario_id, f'canal:{canal_id}') for usuario_id in usuario_ids])
+    transaction.on_commit(aplicar)
+
+
+def participacoes_alteradas(usuario_ids):
+    """Descarta a lista de canais dos usuários (entrada ou saída de canais)"""
+    chaves = [_chave(usuario_id, 'canais') for usuario_id in usuario_ids]
+    transaction.on_commit(lambda: cache.delete_many(chaves))
+
+
+def mensagem_direta_recebida(destinatario_id):
+    transaction.on_commit(lambda: _incrementar([_chave(destinatario_id, 'diretas')]))
+
+
+def mensagens_diretas_alteradas(usuario_id):
+    transaction.on_commit(lambda: cache.delete(_chave(usuario_id, 'diretas')))
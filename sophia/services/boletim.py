@@ -0,0 +1,199 @@
+# services/boletim.py
+
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import F, FilteredRelation, Q
+
+from ..models import Aluno, BoletimAgregado, Nota, PeriodoAvaliativo, TurmaDisciplina
+
+
+def _notas_individuais(filtros):
+    """Notas de cada (turma_disciplina, periodo), em ordem de avaliação, com uma consulta"""
+    notas = defaultdict(list)
+    linhas = Nota.objects.filter(**filtros).order_by('data_avaliacao', 'lancado_em').values_list(
+        'turma_disciplina_id', 'periodo_id', 'nota'
+    )
+    for turma_disciplina_id, periodo_id, nota in linhas:
+        notas[(turma_disciplina_id, periodo_id)].append(float(nota))
+    return notas
+
+
+def medias_boletim(incluir_notas=False, **filtros):
+    """
+    Médias por disciplina e período lidas de BoletimAgregado
+
+    `filtros` valem tanto para o agregado quanto para Nota (ex.: aluno_id,
+    periodo_id, periodo__ano_letivo_id). A média é ponderada pelo peso das
+    notas. Retorna [(disciplina, periodo, resumo)]; com `incluir_notas`, o
+    resumo traz também as notas individuais (uma consulta a mais).
+    """
+    agregados = BoletimAgregado.objects.filter(**filtros).select_related(
+        'turma_disciplina__disciplina', 'periodo'
+    ).order_by('turma_disciplina__disciplina__nome', 'periodo__ordem')
+    notas = _notas_individuais(filtros) if incluir_notas else None
+
+    resultado = []
+    for agregado in agregados:
+        resumo = {
+            'media': float(agregado.media) if agregado.media is not None else None,
+            'quantidade': agregado.quantidade,
+        }
+        if notas is not None:
+            resumo['notas'] = notas[(agregado.turma_disciplina_id, agregado.periodo_id)]
+        resultado.append((agregado.turma_disciplina.disciplina.nome, agregado.periodo.nome, resumo))
+    return resultado
+
+
+def _media(valores):
+    valores = [valor for valor in valores if valor is not None]
+    return round(sum(valores) / len(valores), 2) if valores else None
+
+
+class _Estatisticas:
+    """Média, mínima e máxima de uma coluna, acumuladas aluno a aluno"""
+
+    __slots__ = ('soma', 'alunos', 'minima', 'maxima')
+
+    def __init__(self):
+        self.soma, self.alunos, self.minima, self.maxima = 0, 0, None, None
+
+    def adicionar(self, valor):
+        if valor is None:
+            return
+        self.soma += valor
+        self.alunos += 1
+        self.minima = valor if self.minima is None else min(self.minima, valor)
+        self.maxima = valor if self.maxima is None else max(self.maxima, valor)
+
+    def resumo(self):
+        if not self.alunos:
+            return {'media': None, 'minima': None, 'maxima': None, 'alunos': 0}
+        return {
+            'media': round(self.soma / self.alunos, 2),
+            'minima': self.minima,
+            'maxima': self.maxima,
+            'alunos': self.alunos,
+        }
+
+
+def _situacao(medias_periodos, media_anual):
+    if media_anual is None or None in medias_periodos:
+        return 'PENDENTE'  # Período ainda sem notas
+    return 'APROVADO' if media_anual >= settings.BOLETIM_MEDIA_APROVACAO else 'REPROVADO'
+
+
+def _linha_aluno(aluno_id, matricula, nome, medias):
+    """Linha do boletim de um aluno: médias anuais e situação por disciplina e geral"""
+    medias_anuais = [_media(medias_disciplina) for medias_disciplina in medias]
+    situacoes = [
+        _situacao(medias_disciplina, media_anual)
+        for medias_disciplina, media_anual in zip(medias, medias_anuais)
+    ]
+    if 'REPROVADO' in situacoes:
+        situacao = 'REPROVADO'
+    elif situacoes and all(situacao == 'APROVADO' for situacao in situacoes):
+        situacao = 'APROVADO'
+    else:
+        situacao = 'PENDENTE'
+
+    return {
+        'id': str(aluno_id),
+        'nome': nome,
+        'matricula': matricula,
+        'medias': medias,
+        'medias_anuais': medias_anuais,
+        'situacoes': situacoes,
+        'situacao': situacao,
+    }
+
+
+def _alunos_boletim(turma, periodos, disciplinas):
+    """
+    Linhas do boletim, uma por aluno, à medida que são lidas do banco
+
+    Uma consulta (cursor no servidor) com os alunos atuais da turma e os que
+    saíram mas têm notas nela, cada um seguido dos seus agregados, em ordem
+    de nome; a linha sai assim que o próximo aluno começa.
+    """
+    indice_periodo = {periodo['id']: i for i, periodo in enumerate(periodos)}
+    indice_disciplina = {disciplina['id']: i for i, disciplina in enumerate(disciplinas)}
+
+    # `__in` vazio anularia a consulta inteira; sem disciplinas, só os alunos atuais
+    condicao = Q(boletim_agregado__turma_disciplina_id__in=list(indice_disciplina)) if disciplinas else Q(pk=None)
+    linhas = Aluno.objects.annotate(
+        agregado=FilteredRelation('boletim_agregado', condition=condicao)
+    ).filter(
+        Q(turma_atual=turma) | Q(agregado__isnull=False)
+    ).order_by('usuario__first_name', 'usuario__last_name', 'id').values_list(
+        'id', 'matricula', 'usuario__first_name', 'usuario__last_name',
+        'agregado__turma_disciplina_id', 'agregado__periodo_id', 'agregado__media'
+    ).iterator(chunk_size=2000)
+
+    atual = None
+    for aluno_id, matricula, primeiro_nome, sobrenome, turma_disciplina_id, periodo_id, media in linhas:
+        if atual is None or atual[0] != aluno_id:
+            if atual is not None:
+                yield _linha_aluno(*atual)
+            medias = [[None] * len(periodos) for _ in disciplinas]
+            atual = (aluno_id, matricula, f'{primeiro_nome} {sobrenome}'.strip(), medias)
+        if turma_disciplina_id in indice_disciplina and periodo_id in indice_periodo:
+            atual[3][indice_disciplina[turma_disciplina_id]][indice_periodo[periodo_id]] = (
+                float(media) if media is not None else None
+            )
+    if atual is not None:
+        yield _linha_aluno(*atual)
+
+
+def _json(valor):
+    return json.dumps(valor, separators=(',', ':'))
+
+
+def json_boletim_turma(turma):
+    """
+    Boletim da turma inteira como matriz aluno × disciplina × período, em JSON
+
+    Gerador para StreamingHttpResponse: lê BoletimAgregado da turma com uma
+    consulta (mais períodos e disciplinas) e emite cada aluno assim que a
+    linha dele fica completa. Em `alunos`, `medias[d][p]` segue a ordem de
+    `disciplinas` e `periodos`; a média anual é a média dos períodos com
+    nota. As estatísticas da turma são acumuladas na mesma passada e saem
+    no final.
+    """
+    periodos = list(
+        PeriodoAvaliativo.objects.filter(ano_letivo_id=turma.ano_letivo_id).order_by('ordem').values('id', 'nome')
+    )
+    disciplinas = list(
+        TurmaDisciplina.objects.filter(turma=turma).order_by('disciplina__nome').values(
+            'id', nome=F('disciplina__nome')
+        )
+    )
+    colunas = [[_Estatisticas() for _ in periodos] for _ in disciplinas]
+    anuais = [_Estatisticas() for _ in disciplinas]
+    aprovados = [0] * len(disciplinas)
+    reprovados = [0] * len(disciplinas)
+
+    yield '{"success":true,"media_aprovacao":%s,"periodos":%s,"disciplinas":%s,"alunos":[' % (
+        _json(settings.BOLETIM_MEDIA_APROVACAO), _json(periodos), _json(disciplinas)
+    )
+    for i, aluno in enumerate(_alunos_boletim(turma, periodos, disciplinas)):
+        for d, medias_disciplina in enumerate(aluno['medias']):
+            for p, media in enumerate(medias_disciplina):
+                colunas[d][p].adicionar(media)
+            anuais[d].adicionar(aluno['medias_anuais'][d])
+            aprovados[d] += aluno['situacoes'][d] == 'APROVADO'
+            reprovados[d] += aluno['situacoes'][d] == 'REPROVADO'
+        yield (',' if i else '') + _json(aluno)
+
+    estatisticas = [
+        {
+            'disciplina': disciplina['id'],
+            'periodos': [coluna.resumo() for coluna in colunas[d]],
+            'anual': anuais[d].resumo(),
+            'aprovados': aprovados[d],
+            'reprovados': reprovados[d],
+        }
+        for d, disciplina in enumerate(disciplinas)
+    ]
+    yield '],"estatisticas":%s}' % _json(estatisticas)
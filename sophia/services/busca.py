@@ -0,0 +1,42 @@
+# services/busca.py
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db.models import F, IntegerField
+from django.db.models.functions import Cast
+
+# Configuração criada na migração 0008 (portuguese + unaccent)
+CONFIG_BUSCA = 'portuguese_unaccent'
+
+
+def consulta_busca(termos):
+    """Converte o texto digitado (sintaxe de buscador web) em tsquery"""
+    return SearchQuery(termos, config=CONFIG_BUSCA, search_type='websearch')
+
+
+def buscar_mensagens(queryset, termos):
+    """
+    Filtra as mensagens pelo índice GIN de `busca` e anota a relevância
+
+    A relevância é inteira (ts_rank * 1e6) para ser comparada com exatidão
+    no cursor da paginação keyset.
+    """
+    consulta = consulta_busca(termos)
+    return queryset.filter(busca=consulta).annotate(
+        relevancia=Cast(SearchRank(F('busca'), consulta) * 1000000, IntegerField())
+    )
+
+
+def com_trechos(queryset, termos, inicio='<mark>', fim='</mark>'):
+    """Anota o trecho destacado (ts_headline) de cada resultado"""
+    return queryset.annotate(
+        trecho=SearchHeadline(
+            'conteudo',
+            consulta_busca(termos),
+            config=CONFIG_BUSCA,
+            start_sel=inicio,
+            stop_sel=fim,
+            max_words=30,
+            min_words=10,
+            max_fragments=2
+        )
+    )
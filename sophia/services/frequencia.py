@@ -0,0 +1,126 @@
+# services/frequencia.py
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+
+from ..models import Aluno, Frequencia, FrequenciaMensal, TurmaDisciplina
+
+
+def _inicio_mes_seguinte(data):
+    return (data.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def dividir_periodo(data_inicio, data_fim):
+    """
+    Divide [data_inicio, data_fim] em meses inteiros e dias avulsos
+
+    Retorna ((primeiro_mes, limite), pontas): os meses inteiros são os de
+    primeiro_mes (inclusive) até limite (exclusive), ou None se não houver;
+    pontas são os intervalos de dias (inclusivos) fora deles.
+    """
+    primeiro_mes = data_inicio if data_inicio.day == 1 else _inicio_mes_seguinte(data_inicio)
+    limite = _inicio_mes_seguinte(data_fim)
+    if limite - timedelta(days=1) != data_fim:
+        limite = data_fim.replace(day=1)
+
+    if primeiro_mes >= limite:
+        return None, [(data_inicio, data_fim)]
+
+    pontas = []
+    if data_inicio < primeiro_mes:
+        pontas.append((data_inicio, primeiro_mes - timedelta(days=1)))
+    if limite <= data_fim:
+        pontas.append((limite, data_fim))
+    return (primeiro_mes, limite), pontas
+
+
+def totais_frequencia(data_inicio, data_fim, **filtros):
+    """
+    Aulas e presenças por (aluno_id, turma_disciplina_id) no período
+
+    Meses inteiros vêm de FrequenciaMensal; só os dias das pontas (no máximo
+    dois meses parciais) são lidos de Frequencia. `filtros` valem para os
+    dois modelos (ex.: aluno_id, turma_disciplina__turma_id).
+    Retorna {(aluno_id, turma_disciplina_id): [aulas, presencas]}.
+    """
+    meses, pontas = dividir_periodo(data_inicio, data_fim)
+    totais = defaultdict(lambda: [0, 0])
+
+    if meses:
+        mensais = FrequenciaMensal.objects.filter(
+            mes__gte=meses[0], mes__lt=meses[1], **filtros
+        ).values('aluno_id', 'turma_disciplina_id').annotate(
+            total_aulas=Sum('aulas'), total_presencas=Sum('presencas')
+        )
+        for linha in mensais:
+            total = totais[(linha['aluno_id'], linha['turma_disciplina_id'])]
+            total[0] += linha['total_aulas']
+            total[1] += linha['total_presencas']
+
+    if pontas:
+        dias = Q()
+        for inicio, fim in pontas:
+            dias |= Q(data__range=(inicio, fim))
+        avulsos = Frequencia.objects.filter(dias, **filtros).values('aluno_id', 'turma_disciplina_id').annotate(
+            total_aulas=Count('id'), total_presencas=Count('id', filter=Q(presente=True))
+        )
+        for linha in avulsos:
+            total = totais[(linha['aluno_id'], linha['turma_disciplina_id'])]
+            total[0] += linha['total_aulas']
+            total[1] += linha['total_presencas']
+
+    return totais
+
+
+def _taxa(aulas, presencas):
+    percentual = round(presencas * 100 / aulas, 1) if aulas else None
+    return {
+        'aulas': aulas,
+        'presencas': presencas,
+        'faltas': aulas - presencas,
+        'percentual': percentual,
+        'abaixo_minimo': percentual is not None and percentual < settings.FREQUENCIA_MINIMA,
+    }
+
+
+def taxas_frequencia(data_inicio, data_fim, apenas_abaixo_minimo=False, **filtros):
+    """
+    Frequência (%) de cada aluno, por disciplina e no total, no período
+
+    Ver totais_frequencia. Com `apenas_abaixo_minimo`, retorna só os alunos
+    com frequência total abaixo de FREQUENCIA_MINIMA.
+    """
+    totais = totais_frequencia(data_inicio, data_fim, **filtros)
+    aluno_ids = {aluno_id for aluno_id, _ in totais}
+    nomes = {
+        aluno['id']: f"{aluno['usuario__first_name']} {aluno['usuario__last_name']}".strip()
+        for aluno in Aluno.objects.filter(id__in=aluno_ids).values('id', 'usuario__first_name', 'usuario__last_name')
+    }
+    disciplinas = dict(
+        TurmaDisciplina.objects.filter(id__in={td_id for _, td_id in totais}).values_list('id', 'disciplina__nome')
+    )
+
+    por_aluno = defaultdict(list)
+    for (aluno_id, turma_disciplina_id), (aulas, presencas) in totais.items():
+        por_aluno[aluno_id].append({
+            'turma_disciplina': turma_disciplina_id,
+            'disciplina': disciplinas.get(turma_disciplina_id),
+            **_taxa(aulas, presencas),
+        })
+
+    alunos = []
+    for aluno_id, linhas in por_aluno.items():
+        total = _taxa(sum(linha['aulas'] for linha in linhas), sum(linha['presencas'] for linha in linhas))
+        if apenas_abaixo_minimo and not total['abaixo_minimo']:
+            continue
+        alunos.append({
+            'aluno': str(aluno_id),
+            'nome': nomes.get(aluno_id, ''),
+            **total,
+            'disciplinas': sorted(linhas, key=lambda linha: linha['disciplina'] or ''),
+        })
+    alunos.sort(key=lambda aluno: aluno['nome'])
+    return alunos
@@ -0,0 +1,153 @@
+# services/lancamentos.py
+
+from django.db import transaction
+
+from ..models import Aluno, Frequencia, Nota, TurmaDisciplina
+from ..serializers import NotaLoteItemSerializer
+
+
+class ChamadaInvalida(Exception):
+    """Chamada com alunos que não pertencem à turma"""
+
+
+def pode_lancar_notas(usuario, turma_disciplina):
+    """Regra do CanEditNota, verificada uma vez para o lote inteiro"""
+    if usuario.role == 'SUPERUSER':
+        return True
+    if usuario.role == 'GESTOR':
+        return usuario.escolas.filter(escola_id=turma_disciplina.turma.escola_id).exists()
+    if usuario.role == 'PROFESSOR':
+        return turma_disciplina.professor_id == usuario.id
+    return False
+
+
+def _erro(indice, linha, mensagens):
+    return {
+        'indice': indice,
+        'aluno': linha.get('aluno'),
+        'erros': mensagens,
+    }
+
+
+def _validar_linhas(linhas, turma_id):
+    """
+    Valida as linhas do lote; retorna ({aluno_id: (indice, dados)}, erros)
+
+    Formato e valores são validados linha a linha em memória; a matrícula na
+    turma é verificada para todos os alunos com uma única consulta.
+    """
+    validas, erros = {}, []
+    for indice, linha in enumerate(linhas):
+        item = NotaLoteItemSerializer(data=linha)
+        if not item.is_valid():
+            erros.append(_erro(indice, linha, item.errors))
+            continue
+
+        aluno_id = item.validated_data['aluno']
+        if aluno_id in validas:
+            erros.append(_erro(indice, linha, {'aluno': ['Aluno repetido no lote']}))
+            continue
+        validas[aluno_id] = (indice, item.validated_data)
+
+    da_turma = set(
+        Aluno.objects.filter(id__in=list(validas), turma_atual_id=turma_id).values_list('id', flat=True)
+    )
+    for aluno_id in [aluno_id for aluno_id in validas if aluno_id not in da_turma]:
+        indice, _ = validas.pop(aluno_id)
+        erros.append(_erro(indice, linhas[indice], {'aluno': ['Aluno não pertence à turma']}))
+
+    return validas, erros
+
+
+def lancar_notas(turma_disciplina, periodo, tipo_avaliacao, data_avaliacao, linhas, usuario, peso=1):
+    """
+    Lança uma avaliação para a turma inteira
+
+    Relançar a mesma avaliação (disciplina, período, tipo e data) atualiza a
+    nota (e o peso) já existente do aluno. A gravação é uma transação com um
+    bulk_create das novas e um bulk_update das existentes; linhas inválidas
+    voltam em `erros` sem impedir as demais.
+    Retorna {'criadas', 'atualizadas', 'erros'}.
+    """
+    validas, erros = _validar_linhas(linhas, turma_disciplina.turma_id)
+    erros.sort(key=lambda erro: erro['indice'])
+    if not validas:
+        return {'criadas': 0, 'atualizadas': 0, 'erros': erros}
+
+    with transaction.atomic():
+        # Lançamentos simultâneos da mesma turma/disciplina não duplicam notas
+        TurmaDisciplina.objects.select_for_update().values_list('pk', flat=True).get(pk=turma_disciplina.pk)
+
+        existentes = {
+            nota.aluno_id: nota for nota in Nota.objects.filter(
+                turma_disciplina=turma_disciplina,
+                periodo=periodo,
+                tipo_avaliacao=tipo_avaliacao,
+                data_avaliacao=data_avaliacao,
+                aluno_id__in=list(validas)
+            )
+        }
+
+        novas, alteradas = [], []
+        for aluno_id, (_, dados) in validas.items():
+            nota = existentes.get(aluno_id)
+            if nota is None:
+                novas.append(Nota(
+                    aluno_id=aluno_id,
+                    turma_disciplina=turma_disciplina,
+                    periodo=periodo,
+                    tipo_avaliacao=tipo_avaliacao,
+                    data_avaliacao=data_avaliacao,
+                    nota=dados['nota'],
+                    peso=peso,
+                    observacao=dados.get('observacao', ''),
+                    lancado_por=usuario
+                ))
+                continue
+
+            nota.nota = dados['nota']
+            nota.peso = peso
+            nota.observacao = dados.get('observacao', nota.observacao)
+            nota.lancado_por = usuario
+            alteradas.append(nota)
+
+        Nota.objects.bulk_create(novas)
+        Nota.objects.bulk_update(alteradas, ['nota', 'peso', 'observacao', 'lancado_por'])
+
+    return {'criadas': len(novas), 'atualizadas': len(alteradas), 'erros': erros}
+
+
+def registrar_chamada(turma_disciplina, data, presencas, usuario):
+    """
+    Grava a chamada da turma inteira em uma transação
+
+    A matrícula de todos os alunos é verificada com uma consulta e as
+    presenças vão em um único INSERT ... ON CONFLICT (aluno, turma_disciplina,
+    data) DO UPDATE; refazer a chamada do dia só altera presença e autor
+    (justificativas já lançadas são mantidas). Retorna quantas foram gravadas.
+    """
+    aluno_ids = [item['aluno_id'] for item in presencas]
+    da_turma = set(
+        Aluno.objects.filter(id__in=aluno_ids, turma_atual_id=turma_disciplina.turma_id).values_list('id', flat=True)
+    )
+    fora = [str(aluno_id) for aluno_id in aluno_ids if aluno_id not in da_turma]
+    if fora:
+        raise ChamadaInvalida(f"Alunos não pertencem à turma: {', '.join(fora)}")
+
+    with transaction.atomic():
+        Frequencia.objects.bulk_create(
+            [
+                Frequencia(
+                    aluno_id=item['aluno_id'],
+                    turma_disciplina=turma_disciplina,
+                    data=data,
+                    presente=item['presente'],
+                    lancado_por=usuario
+                )
+                for item in presencas
+            ],
+            update_conflicts=True,
+            unique_fields=['aluno', 'turma_disciplina', 'data'],
+            update_fields=['presente', 'lancado_por']
+        )
+    return len(presencas)
@@ -0,0 +1,173 @@
+# services/miniaturas.py
+
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from ..models import AnexoMensagem, MensagemCanal
+from ..realtime.eventos import publicar_evento_canal
+from ..utils.supabase_storage import download_file, get_path_from_url, upload_bytes
+
+logger = logging.getLogger(__name__)
+
+# Pool próprio: decodificar e redimensionar não ocupa os workers das requisições
+_executor = ThreadPoolExecutor(max_workers=settings.MINIATURAS_WORKERS, thread_name_prefix='miniaturas')
+
+FORMATOS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),  # Fallback para clientes sem WebP
+}
+
+
+class ImagemInvalida(Exception):
+    """Original ausente do Storage ou que não é uma imagem legível"""
+
+
+def agendar_miniaturas(anexo):
+    """Gera as miniaturas do anexo em segundo plano, após o commit"""
+    if anexo.tipo != 'IMAGEM' or not settings.MINIATURAS_ATIVAS:
+        return
+    transaction.on_commit(lambda: _executor.submit(_processar_em_segundo_plano, anexo.id))
+
+
+def _processar_em_segundo_plano(anexo_id):
+    try:
+        processar_anexo(anexo_id)
+    except Exception:
+        # Continua pendente: o comando gerar_miniaturas tenta de novo
+        logger.exception('Falha ao gerar miniaturas do anexo %s', anexo_id)
+    finally:
+        close_old_connections()
+
+
+def _abrir(conteudo):
+    try:
+        imagem = Image.open(io.BytesIO(conteudo))
+        imagem = ImageOps.exif_transpose(imagem)  # Fotos de celular vêm rotacionadas via EXIF
+        transparente = imagem.mode in ('RGBA', 'LA') or (imagem.mode == 'P' and 'transparency' in imagem.info)
+        return imagem.convert('RGBA' if transparente else 'RGB')
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise ImagemInvalida(str(e))
+
+
+def _codificar(imagem, formato):
+    nome, _ = FORMATOS[formato]
+    if formato == 'jpeg' and imagem.mode == 'RGBA':
+        fundo = Image.new('RGB', imagem.size, (255, 255, 255))
+        fundo.paste(imagem, mask=imagem.getchannel('A'))
+        imagem = fundo
+
+    saida = io.BytesIO()
+    imagem.save(saida, nome, quality=settings.MINIATURAS_QUALIDADE, optimize=True)
+    return saida.getvalue()
+
+
+def gerar_variantes(conteudo):
+    """
+    Redimensiona a imagem para cada lado máximo de MINIATURAS_TAMANHOS
+
+    Retorna [(tamanho, largura, altura, {formato: bytes})]. Não amplia:
+    tamanhos maiores que a imagem original são omitidos (exceto o menor).
+    """
+    original = _abrir(conteudo)
+    variantes = []
+    for tamanho in sorted(settings.MINIATURAS_TAMANHOS):
+        if variantes and max(variantes[-1][1:3]) >= max(original.size):
+            break
+        imagem = original.copy()
+        imagem.thumbnail((tamanho, tamanho), Image.Resampling.LANCZOS)
+        variantes.append((
+            tamanho, imagem.width, imagem.height,
+            {formato: _codificar(imagem, formato) for formato in FORMATOS}
+        ))
+    return variantes
+
+
+def _armazenar_variantes(anexo):
+    """Baixa o original, gera as miniaturas e grava ao lado dele no Storage"""
+    caminho = anexo.caminho or get_path_from_url(anexo.url)
+    if not caminho:
+        raise ImagemInvalida('Original fora do Storage')
+
+    conteudo = download_file(caminho)
+    if conteudo is None:
+        raise ImagemInvalida('Original não encontrado no Storage')
+
+    base = caminho.rsplit('.', 1)[0]
+    variantes = {}
+    for tamanho, largura, altura, arquivos in gerar_variantes(conteudo):
+        variante = {'largura': largura, 'altura': altura}
+        for formato, dados in arquivos.items():
+            variante[formato] = upload_bytes(f'{base}_{tamanho}.{formato}', dados, FORMATOS[formato][1])
+        variantes[str(tamanho)] = variante
+    return variantes
+
+
+def processar_anexo(anexo_id, refazer=False):
+    """
+    Gera, armazena e registra as miniaturas de um anexo de imagem
+
+    As variantes ficam ao lado do original (`<caminho>_<tamanho>.<formato>`);
+    anexos do mesmo objeto deduplicado reaproveitam as já geradas. Originais
+    inválidos são marcados como processados (sem variantes) para não
+    voltarem à fila. Retorna True se o anexo foi processado.
+    """
+    anexo = AnexoMensagem.objects.select_related('mensagem__canal').filter(
+        pk=anexo_id, tipo='IMAGEM'
+    ).first()
+    if anexo is None or (anexo.variantes_geradas_em and not refazer):
+        return False
+
+    irmao = None
+    if anexo.objeto_id and not refazer:
+        irmao = AnexoMensagem.objects.filter(
+            objeto_id=anexo.objeto_id, variantes_geradas_em__isnull=False
+        ).exclude(pk=anexo.pk).only('variantes').first()
+
+    if irmao:
+        variantes = irmao.variantes
+    else:
+        try:
+            variantes = _armazenar_variantes(anexo)
+        except ImagemInvalida as e:
+            logger.warning('Anexo %s sem miniaturas: %s', anexo.id, e)
+            variantes = {}
+
+    agora = timezone.now()
+    with transaction.atomic():
+        AnexoMensagem.objects.filter(pk=anexo.pk).update(variantes=variantes, variantes_geradas_em=agora)
+        if variantes:
+            # Delta-sync: a mensagem volta a ser entregue com as novas URLs
+            MensagemCanal.objects.filter(pk=anexo.mensagem_id).update(atualizada_em=agora)
+
+    if variantes:
+        from .armazenamento import urls_anexo  # armazenamento importa este módulo
+
+        anexo.variantes = variantes
+        publicar_evento_canal(anexo.mensagem.canal, 'anexo.variantes', {
+            'mensagem': str(anexo.mensagem_id),
+            'anexo': str(anexo.id),
+            'variantes': urls_anexo(anexo)[1],
+        })
+    return True
+
+
+def processar_pendentes(limite=100):
+    """Processa anexos de imagem ainda sem miniaturas; retorna quantos foram processados"""
+    anexo_ids = list(
+        AnexoMensagem.objects.filter(
+            tipo='IMAGEM', variantes_geradas_em__isnull=True
+        ).order_by('enviado_em').values_list('id', flat=True)[:limite]
+    )
+    processados = 0
+    for anexo_id in anexo_ids:
+        try:
+            processados += processar_anexo(anexo_id)
+        except Exception:
+            logger.exception('Falha ao gerar miniaturas do anexo %s', anexo_id)
+    return processados
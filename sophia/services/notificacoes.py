@@ -0,0 +1,207 @@
+# services/notificacoes.py
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from ..models import OutboxNotificacao, NotificacaoComunicacao, ParticipanteCanal
+from ..realtime.eventos import publicar_notificacoes
+from .badges import somar_notificacoes
+
+logger = logging.getLogger(__name__)
+
+# Um único worker por processo: o despacho não compete com as requisições
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='despacho-notificacoes')
+
+_CAMPOS = NotificacaoComunicacao._meta.concrete_fields
+
+AGRUPAR_NOTIFICACOES = f"""
+INSERT INTO notificacoes_comunicacao AS n (
+    id, usuario_id, tipo, canal_id, mensagem_id, titulo, conteudo, quantidade,
+    lida, enviada_por_email, enviada_por_sms, criada_em, atualizada_em
+)
+SELECT novas.*, false, false, false, %(agora)s, %(agora)s
+FROM unnest(
+    %(ids)s::uuid[], %(usuarios)s::uuid[], %(tipos)s::varchar[], %(canais)s::uuid[],
+    %(mensagens)s::uuid[], %(titulos)s::varchar[], %(conteudos)s::text[], %(quantidades)s::integer[]
+) AS novas
+ON CONFLICT (usuario_id, canal_id, tipo) WHERE NOT lida DO UPDATE SET
+    quantidade = n.quantidade + EXCLUDED.quantidade,
+    mensagem_id = COALESCE(EXCLUDED.mensagem_id, n.mensagem_id),
+    titulo = EXCLUDED.titulo,
+    conteudo = EXCLUDED.conteudo,
+    atualizada_em = EXCLUDED.atualizada_em
+RETURNING {', '.join(f'n.{campo.column}' for campo in _CAMPOS)}
+"""
+
+
+def registrar_notificacoes(notificacoes):
+    """
+    Grava notificações agrupando-as na não lida do mesmo usuário, canal e tipo
+
+    Em vez de uma linha por evento, a notificação não lida existente recebe
+    quantidade + 1 e passa a apontar para a mensagem/texto mais recente.
+    Retorna as notificações gravadas (novas ou agrupadas), prontas para publicar.
+    """
+    agrupadas = {}
+    for notificacao in notificacoes:
+        chave = (notificacao.usuario_id, notificacao.canal_id, notificacao.tipo)
+        if chave in agrupadas:
+            notificacao.quantidade += agrupadas[chave].quantidade
+        agrupadas[chave] = notificacao
+    if not agrupadas:
+        return []
+
+    itens = list(agrupadas.values())
+    with connection.cursor() as cursor:
+        cursor.execute(AGRUPAR_NOTIFICACOES, {
+            'agora': timezone.now(),
+            'ids': [str(n.id) for n in itens],
+            'usuarios': [str(n.usuario_id) for n in itens],
+            'tipos': [n.tipo for n in itens],
+            'canais': [str(n.canal_id) for n in itens],
+            'mensagens': [str(n.mensagem_id) if n.mensagem_id else None for n in itens],
+            'titulos': [n.titulo for n in itens],
+            'conteudos': [n.conteudo for n in itens],
+            'quantidades': [n.quantidade for n in itens],
+        })
+        linhas = cursor.fetchall()
+
+    quantidades = {}
+    for n in itens:
+        quantidades[n.usuario_id] = quantidades.get(n.usuario_id, 0) + n.quantidade
+    somar_notificacoes(quantidades)
+
+    canais = {n.canal_id: n.canal for n in itens if NotificacaoComunicacao.canal.is_cached(n)}
+    gravadas = []
+    for linha in linhas:
+        notificacao = NotificacaoComunicacao.from_db(connection.alias, [c.attname for c in _CAMPOS], linha)
+        if notificacao.canal_id in canais:
+            notificacao.canal = canais[notificacao.canal_id]
+        gravadas.append(notificacao)
+    return gravadas
+
+
+def notificar(**campos):
+    """Registra (agrupando) e publica uma única notificação"""
+    notificacoes = registrar_notificacoes([NotificacaoComunicacao(**campos)])
+    publicar_notificacoes(notificacoes)
+    return notificacoes[0]
+
+
+def enfileirar_notificacoes_canal(canal, tipo, titulo, conteudo, mensagem=None, remetente=None):
+    """
+    Grava uma linha de outbox para notificar os participantes do canal
+
+    Custo constante na requisição, independente do tamanho do canal.
+    Após o commit, o despacho é iniciado em segundo plano (se habilitado);
+    o comando despachar_notificacoes recupera o que ficar pendente.
+    """
+    item = OutboxNotificacao.objects.create(
+        canal=canal,
+        mensagem=mensagem,
+        remetente=remetente,
+        tipo=tipo,
+        titulo=titulo,
+        conteudo=conteudo
+    )
+
+    if settings.NOTIFICACOES_DESPACHO_IMEDIATO:
+        transaction.on_commit(lambda: _executor.submit(_despachar_em_segundo_plano, item.id))
+
+    return item
+
+
+def _despachar_em_segundo_plano(outbox_id):
+    try:
+        despachar_pendentes(outbox_id=outbox_id)
+    except Exception:
+        logger.exception('Falha ao despachar outbox %s', outbox_id)
+    finally:
+        close_old_connections()
+
+
+def _destinatarios(item):
+    """Participantes ativos que querem ser notificados (exceto o remetente)"""
+    participantes = ParticipanteCanal.objects.filter(
+        canal_id=item.canal_id,
+        ativo=True,
+        notificar=True,
+        silenciado=False
+    )
+    if item.remetente_id:
+        participantes = participantes.exclude(usuario_id=item.remetente_id)
+    return participantes.order_by().values_list('usuario_id', flat=True)
+
+
+def _expandir(item):
+    """Cria as notificações do item em lotes; retorna o total criado"""
+    tamanho_lote = settings.NOTIFICACOES_TAMANHO_LOTE
+    usuario_ids = list(_destinatarios(item))
+    total = 0
+
+    for inicio in range(0, len(usuario_ids), tamanho_lote):
+        notificacoes = registrar_notificacoes([
+            NotificacaoComunicacao(
+                usuario_id=usuario_id,
+                tipo=item.tipo,
+                canal=item.canal,
+                mensagem_id=item.mensagem_id,
+                titulo=item.titulo,
+                conteudo=item.conteudo
+            )
+            for usuario_id in usuario_ids[inicio:inicio + tamanho_lote]
+        ])
+        publicar_notificacoes(notificacoes)
+        total += len(notificacoes)
+
+    return total
+
+
+def _processar_proximo(outbox_id=None):
+    """
+    Processa um item pendente; retorna False quando não há mais nada
+
+    O lock com skip_locked permite vários despachantes em paralelo sem
+    processar o mesmo item duas vezes.
+    """
+    with transaction.atomic():
+        pendentes = OutboxNotificacao.objects.select_for_update(skip_locked=True).select_related(
+            'canal'
+        ).filter(status='PENDENTE')
+        if outbox_id:
+            pendentes = pendentes.filter(pk=outbox_id)
+
+        item = pendentes.order_by('criado_em').first()
+        if item is None:
+            return False
+
+        try:
+            with transaction.atomic():
+                item.total_notificacoes = _expandir(item)
+        except Exception as e:
+            logger.exception('Erro ao expandir outbox %s', item.id)
+            item.tentativas += 1
+            item.erro = str(e)
+            if item.tentativas >= settings.NOTIFICACOES_MAX_TENTATIVAS:
+                item.status = 'ERRO'
+        else:
+            item.status = 'ENVIADO'
+            item.erro = ''
+            item.processado_em = timezone.now()
+
+        item.save(update_fields=['status', 'tentativas', 'erro', 'total_notificacoes', 'processado_em'])
+        return True
+
+
+def despachar_pendentes(limite=100, outbox_id=None):
+    """Processa até `limite` itens da outbox; retorna quantos foram processados"""
+    processados = 0
+    while processados < limite and _processar_proximo(outbox_id):
+        processados += 1
+        if outbox_id:
+            break
+    return processados
@@ -0,0 +1,61 @@
+# services/sla.py
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import CanalComunicacao, NotificacaoComunicacao, ResponsavelConversa
+from ..realtime.eventos import publicar_notificacoes
+from .notificacoes import registrar_notificacoes
+
+
+def marcar_atrasadas(limite=500):
+    """
+    Marca um lote de conversas com prazo de resposta vencido e cria os alertas
+
+    Usa o índice parcial de prazo_resposta_em; skip_locked permite mais de um
+    verificador em paralelo. Retorna quantas conversas foram marcadas.
+    """
+    with transaction.atomic():
+        vencidas = list(
+            ResponsavelConversa.objects.select_for_update(skip_locked=True).filter(
+                ativo=True,
+                atrasado=False,
+                prazo_resposta_em__isnull=False,
+                prazo_resposta_em__lte=timezone.now()
+            ).order_by('prazo_resposta_em').only(
+                'id', 'canal_id', 'responsavel_original_id', 'assumida_por_id', 'prazo_resposta'
+            )[:limite]
+        )
+        if not vencidas:
+            return 0
+
+        ResponsavelConversa.objects.filter(pk__in=[r.pk for r in vencidas]).update(
+            atrasado=True,
+            alertado=True,
+            atualizado_em=timezone.now()
+        )
+
+        canais = CanalComunicacao.objects.only('id', 'nome').in_bulk({r.canal_id for r in vencidas})
+        notificacoes = registrar_notificacoes([
+            NotificacaoComunicacao(
+                usuario_id=responsavel.assumida_por_id or responsavel.responsavel_original_id,
+                tipo='SLA_ALERTA',
+                canal=canais[responsavel.canal_id],
+                titulo='Conversa aguardando resposta',
+                conteudo=f'O prazo de {responsavel.prazo_resposta}h para responder venceu'
+            )
+            for responsavel in vencidas
+        ])
+        publicar_notificacoes(notificacoes)
+
+    return len(vencidas)
+
+
+def verificar_prazos(limite=500):
+    """Processa lotes até não haver conversas vencidas; retorna o total marcado"""
+    total = 0
+    while True:
+        marcadas = marcar_atrasadas(limite)
+        total += marcadas
+        if marcadas < limite:
+            return total
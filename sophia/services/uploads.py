@@ -0,0 +1,158 @@
+# services/uploads.py
+
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.db import IntegrityError, transaction
+
+from ..models import AnexoMensagem, ObjetoArmazenado
+from ..utils.supabase_storage import create_signed_upload_url, delete_file, get_file_info
+from .armazenamento import localizar_objeto
+
+SALT_UPLOAD = 'sophia.anexos.upload'
+
+
+class UploadInvalido(Exception):
+    """Chave de upload inválida/expirada ou arquivo ausente no Storage"""
+
+
+def tipo_anexo(mime_type):
+    """Tipo do AnexoMensagem a partir do content-type"""
+    grupo = (mime_type or '').split('/')[0]
+    if grupo == 'image':
+        return 'IMAGEM'
+    if grupo == 'video':
+        return 'VIDEO'
+    if grupo == 'audio':
+        return 'AUDIO'
+    if grupo == 'text' or mime_type in ('application/pdf', 'application/msword') or \
+            (mime_type or '').startswith('application/vnd.'):
+        return 'DOCUMENTO'
+    return 'OUTRO'
+
+
+def _chave_objeto(objeto, canal, usuario, nome_arquivo):
+    return signing.dumps({
+        'objeto': str(objeto.id),
+        'canal': str(canal.id),
+        'usuario': str(usuario.id),
+        'nome': nome_arquivo,
+    }, salt=SALT_UPLOAD)
+
+
+def _upload_existente(objeto, canal, usuario, nome_arquivo):
+    """Conteúdo já armazenado: a confirmação só cria os metadados do anexo"""
+    return {
+        'existente': True,
+        'url_upload': None,
+        'token': None,
+        'caminho': objeto.caminho,
+        'chave_upload': _chave_objeto(objeto, canal, usuario, nome_arquivo),
+        'expira_em_segundos': settings.ANEXOS_VALIDADE_UPLOAD_SEGUNDOS,
+    }
+
+
+def solicitar_upload(canal, usuario, nome_arquivo, sha256=None, tamanho=None):
+    """
+    Gera a URL assinada para o cliente enviar o arquivo direto ao Storage
+
+    Retorna também a `chave_upload`, que vincula o caminho ao canal e ao
+    usuário e é exigida na confirmação (o cliente não escolhe o caminho).
+    Se o cliente informar `sha256` e `tamanho` de um conteúdo já anexado em
+    um canal do qual participa, não há upload (`existente`: true, sem
+    `url_upload`; ver localizar_objeto).
+    """
+    if sha256 and tamanho:
+        objeto = localizar_objeto(sha256, tamanho, usuario)
+        if objeto:
+            return _upload_existente(objeto, canal, usuario, nome_arquivo)
+
+    extensao = nome_arquivo.rsplit('.', 1)[-1].lower() if '.' in nome_arquivo else 'bin'
+    caminho = f'canais/{canal.id}/{uuid.uuid4()}.{extensao}'
+    upload = create_signed_upload_url(caminho)
+
+    chave = signing.dumps({
+        'caminho': caminho,
+        'canal': str(canal.id),
+        'usuario': str(usuario.id),
+        'nome': nome_arquivo,
+    }, salt=SALT_UPLOAD)
+
+    return {
+        'existente': False,
+        'url_upload': upload['url'],
+        'token': upload['token'],
+        'caminho': caminho,
+        'chave_upload': chave,
+        'expira_em_segundos': settings.ANEXOS_VALIDADE_UPLOAD_SEGUNDOS,
+    }
+
+
+def confirmar_upload(chave_upload, canal, usuario):
+    """
+    Valida a chave e lê do Storage os metadados do arquivo enviado
+
+    Tamanho e content-type vêm do objeto armazenado, não do cliente.
+    Retorna os campos para criar o AnexoMensagem. Chaves de conteúdo
+    deduplicado podem ser usadas mais de uma vez (cada uso é uma referência).
+    """
+    try:
+        dados = signing.loads(chave_upload, salt=SALT_UPLOAD, max_age=settings.ANEXOS_VALIDADE_UPLOAD_SEGUNDOS)
+    except signing.BadSignature:
+        raise UploadInvalido('Chave de upload inválida ou expirada')
+
+    if dados['canal'] != str(canal.id) or dados['usuario'] != str(usuario.id):
+        raise UploadInvalido('Chave de upload não pertence a este usuário ou canal')
+
+    if 'objeto' in dados:
+        objeto = ObjetoArmazenado.objects.filter(pk=dados['objeto']).first()
+        if objeto is None:
+            raise UploadInvalido('Arquivo não está mais disponível')
+        return {
+            'tipo': tipo_anexo(objeto.mime_type),
+            'nome_arquivo': dados['nome'],
+            'url': objeto.url,
+            'caminho': objeto.caminho,
+            'tamanho': objeto.tamanho,
+            'mime_type': objeto.mime_type,
+            'objeto': objeto,
+        }
+
+    # Checagem antecipada; a corrida entre duas confirmações é barrada em criar_anexo
+    if AnexoMensagem.objects.filter(caminho=dados['caminho']).exists():
+        raise UploadInvalido('Arquivo já foi anexado')
+
+    arquivo = get_file_info(dados['caminho'])
+    if not arquivo or not arquivo['size']:
+        raise UploadInvalido('Arquivo ainda não foi enviado ao Storage')
+
+    if int(arquivo['size']) > settings.ANEXOS_TAMANHO_MAXIMO:
+        delete_file(dados['caminho'])
+        raise UploadInvalido('Arquivo excede o tamanho máximo permitido')
+
+    mime_type = arquivo['content_type'] or 'application/octet-stream'
+    return {
+        'tipo': tipo_anexo(mime_type),
+        'nome_arquivo': dados['nome'],
+        'url': arquivo['url'],
+        'caminho': dados['caminho'],
+        'tamanho': int(arquivo['size']),
+        'mime_type': mime_type,
+        'objeto': None,
+    }
+
+
+def criar_anexo(mensagem, **campos):
+    """
+    Cria o AnexoMensagem em um savepoint
+
+    Duas confirmações simultâneas da mesma chave passam pela checagem de
+    confirmar_upload; a segunda esbarra em anexo_caminho_unico e vira
+    UploadInvalido em vez de erro 500.
+    """
+    try:
+        with transaction.atomic():
+            return AnexoMensagem.objects.create(mensagem=mensagem, **campos)
+    except IntegrityError:
+        raise UploadInvalido('Arquivo já foi anexado')
@@ -1,3 +1,197 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .models import AnexoMensagem, Escola, EscolaUsuario, MensagemCanal, ObjetoArmazenado, User
+from .services.armazenamento import indexar_anexo
+
+TAMANHO_PDF = 1234
+
+
+def _arquivo_enviado(tamanho=TAMANHO_PDF, mime_type='application/pdf'):
+    """Resposta de get_file_info para um objeto presente no Storage"""
+    def get_file_info(caminho):
+        return {'size': tamanho, 'content_type': mime_type, 'url': f'https://storage.teste/{caminho}'}
+    return get_file_info
+
+
+@patch('sophia.services.uploads.delete_file')
+@patch('sophia.services.uploads.get_file_info')
+@patch('sophia.services.uploads.create_signed_upload_url')
+class UploadAssinadoTests(TestCase):
+    """solicitar_upload → upload direto ao Storage → confirmação (Storage simulado)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.escola = Escola.objects.create(
+            nome='Escola', cnpj='1', endereco='Rua', telefone='1', email='escola@teste.com'
+        )
+        cls.professor = cls._usuario('professor', 'PROFESSOR')
+        cls.pai = cls._usuario('pai', 'RESPONSAVEL')
+        cls.mae = cls._usuario('mae', 'RESPONSAVEL')
+        cls.vizinho = cls._usuario('vizinho', 'RESPONSAVEL')
+
+    @classmethod
+    def _usuario(cls, username, role):
+        usuario = User.objects.create(username=username, role=role, first_name=username.title())
+        EscolaUsuario.objects.create(escola=cls.escola, usuario=usuario, role_na_escola=role)
+        return usuario
+
+    def _cliente(self, usuario):
+        cliente = APIClient()
+        cliente.force_authenticate(usuario)
+        return cliente
+
+    def _criar_canal(self, nome='Grupo', participantes=None):
+        participantes = participantes or [self.pai, self.mae]
+        resposta = self._cliente(self.professor).post('/api/canais/', {
+            'tipo': 'GRUPO_TURMA', 'nome': nome, 'participantes_ids': [str(usuario.id) for usuario in participantes]
+        }, format='json')
+        self.assertEqual(resposta.status_code, 201, resposta.data)
+        return resposta.data['canal']['id']
+
+    def _solicitar(self, canal_id, usuario, nome_arquivo='boletim.pdf'):
+        resposta = self._cliente(usuario).post(
+            f'/api/canais/{canal_id}/solicitar_upload/', {'nome_arquivo': nome_arquivo}, format='json'
+        )
+        self.assertEqual(resposta.status_code, 200, resposta.data)
+        return resposta.data['upload']
+
+    def _enviar(self, canal_id, usuario, chave_upload):
+        return self._cliente(usuario).post(f'/api/canais/{canal_id}/enviar_mensagem/', {
+            'conteudo': 'segue', 'anexos': [{'chave_upload': chave_upload}]
+        }, format='json')
+
+    def setUp(self):
+        # O cache local sobrevive entre testes e as invalidações rodam no commit
+        cache.clear()
+        self.canal_id = self._criar_canal()
+
+    def test_solicitar_e_confirmar(self, create_signed_upload_url, get_file_info, delete_file):
+        create_signed_upload_url.side_effect = lambda caminho: {'url': f'https://storage.teste/upload/{caminho}', 'token': 't'}
+        get_file_info.side_effect = _arquivo_enviado()
+
+        upload = self._solicitar(self.canal_id, self.pai)
+        self.assertTrue(upload['caminho'].startswith(f'canais/{self.canal_id}/'))
+        create_signed_upload_url.assert_called_once_with(upload['caminho'])
+
+        resposta = self._enviar(self.canal_id, self.pai, upload['chave_upload'])
+        self.assertEqual(resposta.status_code, 201, resposta.data)
+        anexo = AnexoMensagem.objects.get()
+        # Metadados vêm do Storage, não do cliente
+        self.assertEqual(anexo.caminho, upload['caminho'])
+        self.assertEqual(anexo.tamanho, TAMANHO_PDF)
+        self.assertEqual(anexo.tipo, 'DOCUMENTO')
+        delete_file.assert_not_called()
+
+    def test_arquivo_ausente_no_storage(self, create_signed_upload_url, get_file_info, delete_file):
+        create_signed_upload_url.return_value = {'url': 'https://storage.teste/upload', 'token': 't'}
+        get_file_info.return_value = None
+
+        upload = self._solicitar(self.canal_id, self.pai)
+        resposta = self._enviar(self.canal_id, self.pai, upload['chave_upload'])
+
+        self.assertEqual(resposta.status_code, 400)
+        self.assertFalse(resposta.data['success'])
+        self.assertFalse(AnexoMensagem.objects.exists())
+        self.assertFalse(MensagemCanal.objects.exists())
+
+    def test_chave_de_outro_usuario(self, create_signed_upload_url, get_file_info, delete_file):
+        create_signed_upload_url.return_value = {'url': 'https://storage.teste/upload', 'token': 't'}
+        get_file_info.side_effect = _arquivo_enviado()
+
+        upload = self._solicitar(self.canal_id, self.pai)
+        resposta = self._enviar(self.canal_id, self.mae, upload['chave_upload'])
+
+        self.assertEqual(resposta.status_code, 400)
+        self.assertFalse(AnexoMensagem.objects.exists())
+
+    def test_chave_de_outro_canal(self, create_signed_upload_url, get_file_info, delete_file):
+        create_signed_upload_url.return_value = {'url': 'https://storage.teste/upload', 'token': 't'}
+        get_file_info.side_effect = _arquivo_enviado()
+        outro_canal_id = self._criar_canal('Outro grupo')
+
+        upload = self._solicitar(outro_canal_id, self.pai)
+        resposta = self._enviar(self.canal_id, self.pai, upload['chave_upload'])
+
+        self.assertEqual(resposta.status_code, 400)
+        self.assertFalse(AnexoMensagem.objects.exists())
+
+    def test_chave_reutilizada(self, create_signed_upload_url, get_file_info, delete_file):
+        create_signed_upload_url.return_value = {'url': 'https://storage.teste/upload', 'token': 't'}
+        get_file_info.side_effect = _arquivo_enviado()
+
+        upload = self._solicitar(self.canal_id, self.pai)
+        self.assertEqual(self._enviar(self.canal_id, self.pai, upload['chave_upload']).status_code, 201)
+
+        resposta = self._enviar(self.canal_id, self.pai, upload['chave_upload'])
+        self.assertEqual(resposta.status_code, 400)
+        self.assertEqual(AnexoMensagem.objects.count(), 1)
+
+        mensagem_id = AnexoMensagem.objects.get().mensagem_id
+        resposta = self._cliente(self.pai).post(
+            f'/api/mensagens-canal/{mensagem_id}/confirmar_anexo/', {'chave_upload': upload['chave_upload']}, format='json'
+        )
+        self.assertEqual(resposta.status_code, 400)
+        self.assertEqual(AnexoMensagem.objects.count(), 1)
+
+    def test_arquivo_acima_do_limite(self, create_signed_upload_url, get_file_info, delete_file):
+        create_signed_upload_url.return_value = {'url': 'https://storage.teste/upload', 'token': 't'}
+
+        upload = self._solicitar(self.canal_id, self.pai)
+        with self.settings(ANEXOS_TAMANHO_MAXIMO=TAMANHO_PDF - 1):
+            get_file_info.side_effect = _arquivo_enviado()
+            resposta = self._enviar(self.canal_id, self.pai, upload['chave_upload'])
+
+        self.assertEqual(resposta.status_code, 400)
+        delete_file.assert_called_once_with(upload['caminho'])
+        self.assertFalse(AnexoMensagem.objects.exists())
+
+    def test_deduplicacao_limitada_aos_canais_do_usuario(self, create_signed_upload_url, get_file_info, delete_file):
+        create_signed_upload_url.return_value = {'url': 'https://storage.teste/upload', 'token': 't'}
+        objeto = ObjetoArmazenado.objects.create(
+            sha256='a' * 64, caminho='objetos/aa/arquivo.pdf', url='https://storage.teste/objetos/aa/arquivo.pdf',
+            tamanho=TAMANHO_PDF, mime_type='application/pdf'
+        )
+        mensagem = MensagemCanal.objects.create(canal_id=self.canal_id, remetente=self.pai, tipo='TEXTO', conteudo='x')
+        AnexoMensagem.objects.create(
+            mensagem=mensagem, tipo='DOCUMENTO', nome_arquivo='arquivo.pdf', url=objeto.url,
+            caminho=objeto.caminho, objeto=objeto, tamanho=objeto.tamanho, mime_type=objeto.mime_type
+        )
+        outro_canal_id = self._criar_canal('Outro grupo', [self.mae, self.vizinho])
+
+        def solicitar(canal_id, usuario):
+            resposta = self._cliente(usuario).post(f'/api/canais/{canal_id}/solicitar_upload/', {
+                'nome_arquivo': 'copia.pdf', 'sha256': objeto.sha256, 'tamanho': TAMANHO_PDF
+            }, format='json')
+            return resposta.data['upload']['existente']
+
+        self.assertTrue(solicitar(outro_canal_id, self.mae))
+        # O vizinho não participa do canal onde o conteúdo foi anexado
+        self.assertFalse(solicitar(outro_canal_id, self.vizinho))
+
+    @patch('sophia.services.armazenamento.delete_files')
+    @patch('sophia.services.armazenamento.stored_file_sha256', return_value='b' * 64)
+    def test_indexacao_deduplica_uploads_diretos(self, stored_file_sha256, delete_files, create_signed_upload_url,
+                                                 get_file_info, delete_file):
+        create_signed_upload_url.return_value = {'url': 'https://storage.teste/upload', 'token': 't'}
+        get_file_info.side_effect = _arquivo_enviado()
+
+        caminhos = []
+        for _ in range(2):
+            upload = self._solicitar(self.canal_id, self.pai)
+            self.assertEqual(self._enviar(self.canal_id, self.pai, upload['chave_upload']).status_code, 201)
+            caminhos.append(upload['caminho'])
+
+        for anexo in AnexoMensagem.objects.order_by('enviado_em'):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertTrue(indexar_anexo(anexo.id))
 
-# Create your tests here.
+        # O primeiro upload vira o objeto; a cópia idêntica é removida do Storage
+        objeto = ObjetoArmazenado.objects.get()
+        self.assertEqual(objeto.caminho, caminhos[0])
+        self.assertEqual(objeto.referencias, 2)
+        self.assertEqual(set(AnexoMensagem.objects.values_list('caminho', flat=True)), {caminhos[0]})
+        delete_files.assert_called_once_with([caminhos[1]])
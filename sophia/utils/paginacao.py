@@ -0,0 +1,88 @@
+# utils/paginacao.py
+
+import base64
+import json
+import uuid
+from datetime import datetime
+
+from django.db.models import Q
+
+
+def _serializar(valor):
+    # isoformat() mantém os microssegundos (DjangoJSONEncoder os trunca)
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    if isinstance(valor, uuid.UUID):
+        return str(valor)
+    return valor
+
+
+def codificar_cursor(valores):
+    """Codifica os valores da chave de ordenação em um cursor opaco"""
+    bruto = json.dumps([_serializar(v) for v in valores], separators=(',', ':'))
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, tamanho):
+    """Decodifica o cursor; levanta ValueError se for inválido"""
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+    except ValueError:
+        raise ValueError('Cursor inválido')
+
+    if not isinstance(valores, list) or len(valores) != tamanho:
+        raise ValueError('Cursor inválido')
+    return valores
+
+
+def filtro_keyset(campos, valores, maior):
+    """
+    Monta a comparação de tupla (campo1, campo2, ...) > ou < (valor1, valor2, ...)
+    expandida em ORs para que o Postgres use o índice da ordenação
+    """
+    lookup = 'gt' if maior else 'lt'
+    filtro = Q()
+    for i, campo in enumerate(campos):
+        iguais = {campos[j]: valores[j] for j in range(i)}
+        filtro |= Q(**iguais, **{f'{campo}__{lookup}': valores[i]})
+
+    # Limite redundante no primeiro campo permite range scan no índice
+    return Q(**{f'{campos[0]}__{lookup}e': valores[0]}) & filtro
+
+
+def paginar_keyset(queryset, campos, cursor=None, direcao='anteriores', limite=50):
+    """
+    Pagina o queryset pela chave `campos` (do mais recente para o mais antigo)
+
+    direcao='anteriores' busca itens mais antigos que o cursor,
+    direcao='posteriores' busca itens mais novos. Os itens retornam sempre
+    do mais recente para o mais antigo, e o custo independe da profundidade.
+    'posteriores' exige cursor (sem ele, a página seria a mais antiga);
+    levanta ValueError caso contrário.
+    """
+    posteriores = direcao == 'posteriores'
+    if posteriores and not cursor:
+        raise ValueError("direcao 'posteriores' exige cursor")
+
+    if cursor:
+        valores = decodificar_cursor(cursor, len(campos))
+        queryset = queryset.filter(filtro_keyset(campos, valores, maior=posteriores))
+
+    ordem = campos if posteriores else [f'-{campo}' for campo in campos]
+    itens = list(queryset.order_by(*ordem)[:limite + 1])
+
+    tem_mais = len(itens) > limite
+    itens = itens[:limite]
+    if posteriores:
+        itens.reverse()
+
+    def cursor_de(item):
+        return codificar_cursor([getattr(item, campo) for campo in campos])
+
+    return {
+        'itens': itens,
+        'tem_mais': tem_mais,
+        'cursor_anteriores': cursor_de(itens[-1]) if itens else cursor,
+        'cursor_posteriores': cursor_de(itens[0]) if itens else cursor,
+    }
@@ -0,0 +1,218 @@
+# utils/particionamento.py
+
+"""
+Particionamento mensal (RANGE) de tabelas append-only no Postgres
+
+Os modelos continuam com `id` como chave primária para o Django; no banco a
+chave passa a ser (id, coluna de data), exigência do particionamento. Linhas
+fora das partições mensais caem na partição padrão (`<tabela>_padrao`).
+"""
+from datetime import date
+
+
+def _mes_seguinte(mes):
+    return date(mes.year + (mes.month == 12), mes.month % 12 + 1, 1)
+
+
+def _primeiro_dia(data):
+    return date(data.year, data.month, 1)
+
+
+def nome_particao(tabela, mes):
+    return f'{tabela}_p{mes:%Y%m}'
+
+
+def esta_particionada(cursor, tabela):
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [tabela])
+    linha = cursor.fetchone()
+    return bool(linha) and linha[0] == 'p'
+
+
+def _definicoes(cursor, tabela):
+    """Índices (exceto a PK) e chaves estrangeiras atuais da tabela"""
+    cursor.execute(
+        """
+        SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        WHERE i.indrelid = %s::regclass AND NOT i.indisprimary
+        """,
+        [tabela]
+    )
+    indices = cursor.fetchall()
+    cursor.execute(
+        """
+        SELECT conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype = 'f'
+        """,
+        [tabela]
+    )
+    chaves = cursor.fetchall()
+    return indices, chaves
+
+
+def _recriar_tabela(cursor, tabela, criar, chave_primaria, depois_de_criar=None):
+    """
+    Troca `tabela` por uma nova estrutura preservando dados, índices e FKs
+
+    Os índices e FKs são recriados depois da cópia dos dados (mais rápido e
+    sem eventos de trigger pendentes das FKs deferidas).
+    """
+    antiga = f'{tabela}_antiga'
+    indices, chaves = _definicoes(cursor, tabela)
+
+    cursor.execute(f'ALTER TABLE {tabela} RENAME TO {antiga}')
+    cursor.execute(f'ALTER INDEX {tabela}_pkey RENAME TO {antiga}_pkey')
+    for nome, _ in chaves:
+        cursor.execute(f'ALTER TABLE {antiga} DROP CONSTRAINT {nome}')
+    for nome, _ in indices:
+        cursor.execute(f'DROP INDEX {nome}')
+
+    cursor.execute(
+        f'CREATE TABLE {tabela} (LIKE {antiga} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE) {criar}'
+    )
+    cursor.execute(f'ALTER TABLE {tabela} ADD CONSTRAINT {tabela}_pkey PRIMARY KEY ({chave_primaria})')
+    if depois_de_criar:
+        depois_de_criar()
+
+    cursor.execute(f'INSERT INTO {tabela} SELECT * FROM {antiga}')
+    cursor.execute(f'DROP TABLE {antiga}')
+
+    for _, definicao in indices:
+        cursor.execute(definicao)
+    for nome, definicao in chaves:
+        cursor.execute(f'ALTER TABLE {tabela} ADD CONSTRAINT {nome} {definicao}')
+
+
+def particionar_tabela(cursor, tabela, coluna, meses_a_frente=3):
+    """Converte a tabela em particionada por mês de `coluna`"""
+    if esta_particionada(cursor, tabela):
+        return
+
+    cursor.execute(f'SELECT min({coluna}) FROM {tabela}')
+    primeira = cursor.fetchone()[0]
+
+    def criar_particoes():
+        cursor.execute(f'CREATE TABLE {tabela}_padrao PARTITION OF {tabela} DEFAULT')
+        inicio = _primeiro_dia(primeira or date.today())
+        criar_particoes_ate(cursor, tabela, inicio, meses_a_frente, coluna)
+
+    _recriar_tabela(
+        cursor, tabela,
+        criar=f'PARTITION BY RANGE ({coluna})',
+        chave_primaria=f'id, {coluna}',
+        depois_de_criar=criar_particoes
+    )
+
+
+def desparticionar_tabela(cursor, tabela):
+    """Volta a tabela particionada para uma tabela comum (reverso da migração)"""
+    if not esta_particionada(cursor, tabela):
+        return
+    _recriar_tabela(cursor, tabela, criar='', chave_primaria='id')
+
+
+def listar_particoes(cursor, tabela):
+    """Partições mensais como [(nome, inicio, fim)], em ordem"""
+    cursor.execute(
+        """
+        SELECT c.relname,
+               (regexp_match(pg_get_expr(c.relpartbound, c.oid), 'FROM \\(''([^'']+)''\\)'))[1],
+               (regexp_match(pg_get_expr(c.relpartbound, c.oid), 'TO \\(''([^'']+)''\\)'))[1]
+        FROM pg_inherits h
+        JOIN pg_class c ON c.oid = h.inhrelid
+        WHERE h.inhparent = %s::regclass
+          AND pg_get_expr(c.relpartbound, c.oid) <> 'DEFAULT'
+        ORDER BY 2
+        """,
+        [tabela]
+    )
+    return [
+        (nome, date.fromisoformat(inicio[:10]), date.fromisoformat(fim[:10]))
+        for nome, inicio, fim in cursor.fetchall()
+    ]
+
+
+def criar_particao(cursor, tabela, coluna, mes):
+    """
+    Cria a partição do mês (idempotente)
+
+    Se a partição padrão já tiver linhas do mês, elas são movidas para a
+    nova partição antes de anexá-la.
+    """
+    nome = nome_particao(tabela, mes)
+    cursor.execute('SELECT to_regclass(%s)', [nome])
+    if cursor.fetchone()[0]:
+        return False
+
+    inicio, fim = mes, _mes_seguinte(mes)
+    cursor.execute(
+        f'SELECT EXISTS (SELECT 1 FROM {tabela}_padrao WHERE {coluna} >= %s AND {coluna} < %s)',
+        [inicio, fim]
+    )
+    if not cursor.fetchone()[0]:
+        cursor.execute(
+            f"CREATE TABLE {nome} PARTITION OF {tabela} FOR VALUES FROM ('{inicio}') TO ('{fim}')"
+        )
+        return True
+
+    cursor.execute(f'CREATE TABLE {nome} (LIKE {tabela} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(
+        f"""
+        WITH movidas AS (
+            DELETE FROM {tabela}_padrao WHERE {coluna} >= %s AND {coluna} < %s RETURNING *
+        )
+        INSERT INTO {nome} SELECT * FROM movidas
+        """,
+        [inicio, fim]
+    )
+    cursor.execute(f"ALTER TABLE {tabela} ATTACH PARTITION {nome} FOR VALUES FROM ('{inicio}') TO ('{fim}')")
+    return True
+
+
+def criar_particoes_ate(cursor, tabela, inicio, meses_a_frente, coluna=None):
+    """Cria as partições de `inicio` até `meses_a_frente` meses após o atual"""
+    if coluna is None:
+        cursor.execute(
+            """
+            SELECT a.attname FROM pg_partitioned_table p
+            JOIN pg_attribute a ON a.attrelid = p.partrelid AND a.attnum = p.partattrs[0]
+            WHERE p.partrelid = %s::regclass
+            """,
+            [tabela]
+        )
+        coluna = cursor.fetchone()[0]
+
+    limite = _primeiro_dia(date.today())
+    for _ in range(meses_a_frente):
+        limite = _mes_seguinte(limite)
+
+    criadas = []
+    mes = _primeiro_dia(inicio)
+    while mes <= limite:
+        if criar_particao(cursor, tabela, coluna, mes):
+            criadas.append(nome_particao(tabela, mes))
+        mes = _mes_seguinte(mes)
+    return criadas
+
+
+def aplicar_retencao(cursor, tabela, meses, modo='detach'):
+    """
+    Remove as partições que terminam antes do início da janela de retenção
+
+    modo='detach' desanexa (a tabela fica disponível para arquivamento);
+    modo='drop' apaga. Nos dois casos não há DELETE linha a linha.
+    """
+    corte = _primeiro_dia(date.today())
+    for _ in range(meses):
+        corte = date(corte.year - (corte.month == 1), (corte.month - 2) % 12 + 1, 1)
+
+    removidas = []
+    for nome, _, fim in listar_particoes(cursor, tabela):
+        if fim > corte:
+            continue
+        cursor.execute(f'ALTER TABLE {tabela} DETACH PARTITION {nome}')
+        if modo == 'drop':
+            cursor.execute(f'DROP TABLE {nome}')
+        removidas.append(nome)
+    return removidas
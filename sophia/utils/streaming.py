@@ -0,0 +1,20 @@
+# utils/streaming.py
+
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+
+async def em_lotes(partes, tamanho=50):
+    """
+    Iterador assíncrono sobre um gerador síncrono (ex.: que lê do banco)
+
+    Sob ASGI, StreamingHttpResponse junta um iterador síncrono inteiro na
+    memória antes de enviar. Aqui cada lote de `tamanho` partes é produzido
+    fora do event loop (sempre na mesma thread, como exige a conexão com o
+    banco) e enviado em seguida.
+    """
+    proximo_lote = sync_to_async(lambda: list(islice(partes, tamanho)))
+    while lote := await proximo_lote():
+        for parte in lote:
+            yield parte
@@ -1,22 +1,39 @@
 # utils/supabase_storage.py (continuação)
 
 from supabase import create_client
+from storage3.exceptions import StorageApiError
 from django.conf import settings
-import uuid
+import hashlib
+import requests
 
 supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
 
 
-def upload_file(file, folder='uploads'):
-    """Upload de arquivo para Supabase Storage"""
-    file_extension = file.name.split('.')[-1]
-    file_name = f"{folder}/{uuid.uuid4()}.{file_extension}"
+def file_sha256(file):
+    """SHA-256 do arquivo lido em blocos (sem carregá-lo inteiro na memória)"""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
 
-    # Upload
+
+def upload_file(file, folder='uploads', sha256=None):
+    """
+    Upload de arquivo para Supabase Storage, endereçado pelo conteúdo
+
+    O caminho é derivado do SHA-256 (`folder/ab/abcd....ext`): reenviar o
+    mesmo conteúdo grava no mesmo objeto em vez de criar outro.
+    """
+    sha256 = sha256 or file_sha256(file)
+    file_extension = file.name.split('.')[-1].lower() if '.' in file.name else 'bin'
+    file_name = f"{folder}/{sha256[:2]}/{sha256}.{file_extension}"
+
+    # Upload (upsert: o conteúdo de um caminho nunca muda)
     response = supabase.storage.from_(settings.SUPABASE_STORAGE_BUCKET).upload(
         file_name,
         file.read(),
-        file_options={"content-type": file.content_type}
+        file_options={"content-type": file.content_type, "upsert": "true"}
     )
 
     # Retorna URL pública
@@ -26,7 +43,8 @@ def upload_file(file, folder='uploads'):
         'url': public_url,
         'path': file_name,
         'size': file.size,
-        'content_type': file.content_type
+        'content_type': file.content_type,
+        'sha256': sha256
     }
 
 
@@ -36,10 +54,96 @@ def delete_file(file_path):
     return response
 
 
+def delete_files(file_paths):
+    """Delete vários arquivos em uma chamada (caminhos inexistentes são ignorados)"""
+    return supabase.storage.from_(settings.SUPABASE_STORAGE_BUCKET).remove(list(file_paths))
+
+
 def get_signed_url(file_path, expires_in=3600):
     """Gera URL assinada temporária (para arquivos privados)"""
     response = supabase.storage.from_(settings.SUPABASE_STORAGE_BUCKET).create_signed_url(
         file_path,
         expires_in
     )
-    return response['signedURL']
\ No newline at end of file
+    return response['signedURL']
+
+
+def stored_file_sha256(file_path, chunk_size=1024 * 1024):
+    """SHA-256 de um arquivo armazenado, baixado em blocos (None se não existe)"""
+    try:
+        url = get_signed_url(file_path, expires_in=60)
+    except StorageApiError as e:
+        if str(e.status) in ('400', '404'):
+            return None
+        raise
+
+    digest = hashlib.sha256()
+    with requests.get(url, stream=True, timeout=30) as response:
+        if response.status_code in (400, 404):
+            return None
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_signed_urls(file_paths, expires_in=3600):
+    """URLs assinadas de vários arquivos em uma chamada ({caminho: url}; inexistentes ficam de fora)"""
+    response = supabase.storage.from_(settings.SUPABASE_STORAGE_BUCKET).create_signed_urls(
+        list(file_paths),
+        expires_in
+    )
+    return {item['path']: item['signedURL'] for item in response if item.get('signedURL')}
+
+
+def create_signed_upload_url(file_path):
+    """Gera URL assinada para o cliente enviar o arquivo direto ao Storage"""
+    response = supabase.storage.from_(settings.SUPABASE_STORAGE_BUCKET).create_signed_upload_url(file_path)
+    return {
+        'url': response['signed_url'],
+        'token': response['token'],
+        'path': file_path
+    }
+
+
+def get_file_info(file_path):
+    """Metadados do arquivo já armazenado (None se ainda não existe)"""
+    bucket = supabase.storage.from_(settings.SUPABASE_STORAGE_BUCKET)
+    try:
+        info = bucket.info(file_path)
+    except StorageApiError as e:
+        if str(e.status) in ('400', '404'):
+            return None
+        raise
+
+    metadata = info.get('metadata') or {}
+    return {
+        'url': bucket.get_public_url(file_path),
+        'path': file_path,
+        'size': info.get('size') or metadata.get('size'),
+        'content_type': info.get('content_type') or metadata.get('mimetype')
+    }
+
+
+def download_file(file_path):
+    """Conteúdo (bytes) de um arquivo armazenado (None se não existe)"""
+    try:
+        return supabase.storage.from_(settings.SUPABASE_STORAGE_BUCKET).download(file_path)
+    except StorageApiError as e:
+        if str(e.status) in ('400', '404'):
+            return None
+        raise
+
+
+def upload_bytes(file_path, content, content_type):
+    """Grava bytes em um caminho fixo (sobrescreve) e retorna a URL pública"""
+    bucket = supabase.storage.from_(settings.SUPABASE_STORAGE_BUCKET)
+    bucket.upload(file_path, content, file_options={"content-type": content_type, "upsert": "true"})
+    return bucket.get_public_url(file_path)
+
+
+def get_path_from_url(public_url):
+    """Caminho no bucket a partir da URL pública (None se a URL não for do bucket)"""
+    prefix = f"/storage/v1/object/public/{settings.SUPABASE_STORAGE_BUCKET}/"
+    path = public_url.split('?')[0].partition(prefix)[2]
+    return path or None
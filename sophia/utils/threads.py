@@ -0,0 +1,55 @@
+# utils/threads.py
+
+from django.db.models import F, Window, prefetch_related_objects
+from django.db.models.functions import RowNumber
+
+from ..models import MensagemCanal
+
+
+def carregar_threads(mensagens, profundidade=2, limite_respostas=10):
+    """
+    Carrega as respostas (até `profundidade` níveis) de uma página de mensagens
+
+    Uma consulta por nível de respostas, limitada a `limite_respostas` por
+    mensagem, mais as consultas de remetentes, mensagens respondidas, anexos e
+    visualizações de todas as mensagens de uma vez. O resultado fica em
+    `mensagem._respostas`, usado pelo MensagemCanalSerializer.
+    """
+    nivel = [m for m in mensagens if not hasattr(m, '_respostas')]
+    todas = list(nivel)
+
+    for _ in range(profundidade):
+        if not nivel:
+            break
+
+        pais = {m.id: m for m in nivel}
+        for mensagem in nivel:
+            mensagem._respostas = []
+
+        respostas = MensagemCanal.objects.filter(
+            respondendo_a_id__in=pais.keys(),
+            excluida=False
+        ).select_related('remetente').annotate(
+            posicao=Window(
+                RowNumber(),
+                partition_by=F('respondendo_a_id'),
+                order_by=[F('enviada_em').asc(), F('id').asc()]
+            )
+        ).filter(posicao__lte=limite_respostas).order_by('enviada_em', 'id')
+
+        nivel = []
+        for resposta in respostas:
+            pai = pais[resposta.respondendo_a_id]
+            resposta.respondendo_a = pai
+            pai._respostas.append(resposta)
+            nivel.append(resposta)
+        todas.extend(nivel)
+
+    prefetch_related_objects(
+        todas,
+        'remetente',
+        'respondendo_a__remetente',
+        'anexos',
+        'visualizacoes_detalhadas__usuario'
+    )
+    return mensagens
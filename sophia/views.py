@@ -8,6 +8,8 @@ from django.utils import timezone
 from rest_framework.authtoken.models import Token
 from decimal import Decimal
 from django.db.models import Count, Avg, Q, Sum
+from django.conf import settings
+from django.http import StreamingHttpResponse
 
 # Imports dos modelos
 from .models import (
@@ -26,9 +28,12 @@ from .serializers import (
     DisciplinaSerializer, NotaSerializer, FrequenciaSerializer,
     MensalidadeSerializer, AvisoSerializer, MensagemSerializer,
     AtividadeAgendaSerializer, EventoSerializer, AnoLetivoSerializer,
-    DashboardSerializer
+    DashboardSerializer, LancarNotasLoteSerializer, RegistrarChamadaSerializer,
+    TaxaFrequenciaSerializer
 )
 
+from .services.acesso_canais import coordenadores_alterados
+
 # Imports das permissões
 from .permissions import (
     IsSuperUser, IsGestorOrAbove, IsCoordenadorOrAbove,
@@ -37,12 +42,18 @@ from .permissions import (
 
 # Imports dos serviços
 from .services.asaas_service import AsaasService
+from .services.boletim import json_boletim_turma, medias_boletim
+from .services.frequencia import taxas_frequencia
+from .services.lancamentos import (
+    ChamadaInvalida, lancar_notas, pode_lancar_notas, registrar_chamada
+)
 
 # Imports dos filtros customizados
 from .filters import (
     TurmaFilter, AlunoFilter, NotaFilter,
     FrequenciaFilter, MensalidadeFilter
 )
+from .utils.streaming import em_lotes
 
 
 # ============================================
@@ -284,6 +295,22 @@ class TurmaViewSet(viewsets.ModelViewSet):
         escola_ids = user.escolas.values_list('escola_id', flat=True)
         return self.queryset.filter(escola_id__in=escola_ids)
 
+    # O coordenador vê os canais da turma: trocas invalidam o acesso em cache
+    def perform_create(self, serializer):
+        turma = serializer.save()
+        coordenadores_alterados(turma.coordenador_id)
+
+    def perform_update(self, serializer):
+        anterior = serializer.instance.coordenador_id
+        turma = serializer.save()
+        if turma.coordenador_id != anterior:
+            coordenadores_alterados(anterior, turma.coordenador_id)
+
+    def perform_destroy(self, instance):
+        coordenador_id = instance.coordenador_id
+        instance.delete()
+        coordenadores_alterados(coordenador_id)
+
     @action(detail=True, methods=['get'])
     def alunos(self, request, pk=None):
         """Lista alunos da turma"""
@@ -292,6 +319,20 @@ class TurmaViewSet(viewsets.ModelViewSet):
         serializer = AlunoListSerializer(alunos, many=True)
         return Response({'success': True, 'alunos': serializer.data})
 
+    @action(detail=True, methods=['get'])
+    def boletim(self, request, pk=None):
+        """
+        Boletim da turma: médias de cada aluno por disciplina e período
+
+        Montado a partir de BoletimAgregado (ver json_boletim_turma), com
+        situação de cada aluno e estatísticas da turma; cada aluno é enviado
+        assim que é lido do banco.
+        """
+        turma = self.get_object()
+        return StreamingHttpResponse(
+            em_lotes(json_boletim_turma(turma)), content_type='application/json'
+        )
+
 
 class DisciplinaViewSet(viewsets.ModelViewSet):
     """CRUD de Disciplinas"""
@@ -357,26 +398,21 @@ class AlunoViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['get'])
     def boletim_completo(self, request, pk=None):
-        """Boletim completo do aluno"""
+        """
+        Boletim completo do aluno: {disciplina: {periodo: {media, quantidade}}}
+
+        Lido dos totais em BoletimAgregado; `notas=true` inclui as notas individuais.
+        """
         aluno = self.get_object()
         ano_letivo_id = request.query_params.get('ano_letivo_id')
 
-        notas = Nota.objects.filter(
+        boletim = {}
+        for disc, periodo, resumo in medias_boletim(
+            incluir_notas=request.query_params.get('notas') == 'true',
             aluno=aluno,
             periodo__ano_letivo_id=ano_letivo_id
-        ).select_related('turma_disciplina__disciplina', 'periodo')
-
-        boletim = {}
-        for nota in notas:
-            disc = nota.turma_disciplina.disciplina.nome
-            periodo = nota.periodo.nome
-
-            if disc not in boletim:
-                boletim[disc] = {}
-            if periodo not in boletim[disc]:
-                boletim[disc][periodo] = []
-
-            boletim[disc][periodo].append(float(nota.nota))
+        ):
+            boletim.setdefault(disc, {})[periodo] = resumo
 
         return Response({'success': True, 'boletim': boletim})
 
@@ -430,7 +466,11 @@ class NotaViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def boletim(self, request):
-        """Boletim do aluno"""
+        """
+        Boletim do aluno no período: {disciplina: {media, quantidade}}
+
+        Lido dos totais em BoletimAgregado; `notas=true` inclui as notas individuais.
+        """
         aluno_id = request.query_params.get('aluno_id')
         periodo_id = request.query_params.get('periodo_id')
 
@@ -440,26 +480,47 @@ class NotaViewSet(viewsets.ModelViewSet):
                 'message': 'aluno_id e periodo_id obrigatórios'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        notas = self.queryset.filter(aluno_id=aluno_id, periodo_id=periodo_id)
-
-        boletim = {}
-        for nota in notas:
-            disc = nota.turma_disciplina.disciplina.nome
-            if disc not in boletim:
-                boletim[disc] = []
-            boletim[disc].append(float(nota.nota))
-
         resultado = {
-            disc: {
-                'notas': notas_list,
-                'media': sum(notas_list) / len(notas_list),
-                'quantidade': len(notas_list)
-            }
-            for disc, notas_list in boletim.items()
+            disc: resumo
+            for disc, _, resumo in medias_boletim(
+                incluir_notas=request.query_params.get('notas') == 'true',
+                aluno_id=aluno_id,
+                periodo_id=periodo_id
+            )
         }
 
         return Response({'success': True, 'boletim': resultado})
 
+    @action(detail=False, methods=['post'])
+    def lancar_lote(self, request):
+        """
+        Lança uma avaliação para a turma inteira
+
+        Body: turma_disciplina, periodo, tipo_avaliacao, data_avaliacao, peso e
+        notas: [{aluno, nota, observacao}]. Linhas com erro voltam em `erros`
+        (com o índice no lote) e não impedem a gravação das demais.
+        """
+        serializer = LancarNotasLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if not pode_lancar_notas(request.user, data['turma_disciplina']):
+            return Response({
+                'success': False,
+                'message': 'Você não pode lançar notas nesta turma/disciplina'
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        resultado = lancar_notas(
+            data['turma_disciplina'], data['periodo'], data['tipo_avaliacao'],
+            data['data_avaliacao'], data['notas'], request.user, peso=data['peso']
+        )
+        gravadas = resultado['criadas'] + resultado['atualizadas']
+
+        return Response({
+            'success': gravadas > 0,
+            **resultado
+        }, status=status.HTTP_200_OK if gravadas else status.HTTP_400_BAD_REQUEST)
+
 
 class FrequenciaViewSet(viewsets.ModelViewSet):
     """CRUD de Frequência"""
@@ -481,27 +542,66 @@ class FrequenciaViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'])
     def registrar_chamada(self, request):
-        """Registra chamada de toda turma"""
-        turma_disciplina_id = request.data.get('turma_disciplina_id')
-        data = request.data.get('data')
-        presencas = request.data.get('presencas')  # [{aluno_id: true/false}]
-
-        frequencias_criadas = []
-        for item in presencas:
-            freq, created = Frequencia.objects.update_or_create(
-                aluno_id=item['aluno_id'],
-                turma_disciplina_id=turma_disciplina_id,
-                data=data,
-                defaults={
-                    'presente': item['presente'],
-                    'lancado_por': request.user
-                }
+        """
+        Registra chamada de toda turma
+
+        Body: turma_disciplina_id, data e presencas: [{aluno_id, presente}].
+        A chamada é gravada inteira ou rejeitada inteira.
+        """
+        serializer = RegistrarChamadaSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        try:
+            registradas = registrar_chamada(
+                data['turma_disciplina_id'], data['data'], data['presencas'], request.user
             )
-            frequencias_criadas.append(freq.id)
+        except ChamadaInvalida as e:
+            return Response({
+                'success': False,
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'success': True,
+            'frequencias_registradas': registradas
+        })
+
+    @action(detail=False, methods=['get'])
+    def taxa(self, request):
+        """
+        Frequência (%) por aluno e disciplina em um período qualquer
 
+        Query: data_inicio, data_fim e aluno_id, turma_id ou turma_disciplina_id;
+        `abaixo_minimo=true` lista só os alunos abaixo de FREQUENCIA_MINIMA.
+        Calculada a partir dos totais mensais (ver taxas_frequencia).
+        """
+        serializer = TaxaFrequenciaSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        filtros = {}
+        if data.get('aluno_id'):
+            filtros['aluno_id'] = data['aluno_id']
+        if data.get('turma_id'):
+            filtros['turma_disciplina__turma_id'] = data['turma_id']
+        if data.get('turma_disciplina_id'):
+            filtros['turma_disciplina_id'] = data['turma_disciplina_id']
+
+        # Mesmo escopo de get_queryset
+        user = request.user
+        if user.role == 'PROFESSOR':
+            filtros['turma_disciplina__professor'] = user
+        elif user.role == 'RESPONSAVEL':
+            filtros['aluno__in'] = user.responsavel_profile.alunos.all()
+
+        alunos = taxas_frequencia(
+            data['data_inicio'], data['data_fim'], apenas_abaixo_minimo=data['abaixo_minimo'], **filtros
+        )
         return Response({
             'success': True,
-            'frequencias_registradas': len(frequencias_criadas)
+            'frequencia_minima': settings.FREQUENCIA_MINIMA,
+            'alunos': alunos
         })
 
 
@@ -633,6 +733,20 @@ class MensagemViewSet(viewsets.ModelViewSet):
             Q(remetente=user) | Q(destinatario=user)
         )
 
+    def perform_create(self, serializer):
+        mensagem = serializer.save()
+        badges.mensagem_direta_recebida(mensagem.destinatario_id)
+
+    def perform_update(self, serializer):
+        destinatario_id = serializer.instance.destinatario_id
+        mensagem = serializer.save()
+        badges.mensagens_diretas_alteradas(destinatario_id)
+        badges.mensagens_diretas_alteradas(mensagem.destinatario_id)
+
+    def perform_destroy(self, instance):
+        badges.mensagens_diretas_alteradas(instance.destinatario_id)
+        instance.delete()
+
     @action(detail=False, methods=['get'])
     def caixa_entrada(self, request):
         """Mensagens recebidas"""
@@ -864,14 +978,17 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q, Count, Prefetch
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Q, Count, Prefetch, OuterRef, Subquery, Exists
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.db import transaction
 
 from .models import (
     CanalComunicacao, ParticipanteCanal, MensagemCanal,
-    AnexoMensagem, ResponsavelConversa, NotificacaoComunicacao,
-    AuditoriaConversa
+    ResponsavelConversa, NotificacaoComunicacao,
+    AuditoriaConversa, Visualizacao
 )
 from .serializers import (
     CanalComunicacaoSerializer, CanalComunicacaoListSerializer,
@@ -879,9 +996,20 @@ from .serializers import (
     ResponsavelConversaSerializer, NotificacaoComunicacaoSerializer,
     AuditoriaConversaSerializer, CriarCanalSerializer,
     EnviarMensagemSerializer, AdicionarParticipantesSerializer,
-    AssumirConversaSerializer
+    AssumirConversaSerializer, ResultadoBuscaMensagemSerializer,
+    PreferenciasCanalSerializer, SolicitarUploadSerializer,
+    ConfirmarAnexoSerializer, AnexoMensagemSerializer, RemoverParticipantesSerializer
 )
 from .utils.supabase_storage import upload_file
+from .utils.paginacao import paginar_keyset, codificar_cursor, decodificar_cursor, filtro_keyset
+from .realtime.eventos import publicar_evento_canal
+from .services import badges
+from .services.acesso_canais import acessos_alterados
+from .services.notificacoes import enfileirar_notificacoes_canal, notificar
+from .services.busca import buscar_mensagens, com_trechos
+from .services.uploads import UploadInvalido, confirmar_upload, criar_anexo, solicitar_upload
+from .services.armazenamento import agendar_processamento
+from .services.auditoria import registrar_auditoria
 
 
 # ============================================
@@ -903,7 +1031,7 @@ class CanalComunicacaoViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_serializer_class(self):
-        if self.action == 'list':
+        if self.action in ['list', 'meus_canais', 'sync']:
             return CanalComunicacaoListSerializer
         return CanalComunicacaoSerializer
 
@@ -912,7 +1040,17 @@ class CanalComunicacaoViewSet(viewsets.ModelViewSet):
         Filtra canais baseado no papel do usuário
         """
         user = self.request.user
-        queryset = super().get_queryset()
+        participacao = ParticipanteCanal.objects.filter(canal=OuterRef('pk'), usuario=user)
+        queryset = super().get_queryset().annotate(
+            total_nao_lidas=Subquery(participacao.values('nao_lidas')[:1]),
+            meu_papel=Subquery(participacao.values('papel')[:1]),
+            meu_fixado=Subquery(participacao.values('fixado')[:1]),
+            meu_silenciado=Subquery(participacao.values('silenciado')[:1])
+        )
+
+        # Listagens usam apenas as colunas de resumo do canal
+        if self.action in ['list', 'meus_canais', 'conversas_pendentes', 'sync']:
+            queryset = queryset.prefetch_related(None)
 
         # Superuser e Gestor veem tudo
         if user.role in ['SUPERUSER', 'GESTOR']:
@@ -951,29 +1089,9 @@ class CanalComunicacaoViewSet(viewsets.ModelViewSet):
                 'message': 'Canal individual deve ter exatamente 1 outro participante'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # Verifica se já existe canal individual entre os usuários
-        if data['tipo'] == 'INDIVIDUAL':
-            outro_usuario_id = data['participantes_ids'][0]
-            canal_existente = CanalComunicacao.objects.filter(
-                tipo='INDIVIDUAL',
-                participantes__usuario=request.user
-            ).filter(
-                participantes__usuario_id=outro_usuario_id
-            ).first()
-
-            if canal_existente:
-                return Response({
-                    'success': True,
-                    'message': 'Canal já existe',
-                    'canal': CanalComunicacaoSerializer(canal_existente, context={'request': request}).data
-                })
-
-        # Criar canal
         escola_id = request.data.get('escola') or request.user.escolas.first().escola_id
-
-        canal = CanalComunicacao.objects.create(
+        campos = dict(
             escola_id=escola_id,
-            tipo=data['tipo'],
             nome=data.get('nome', ''),
             descricao=data.get('descricao', ''),
             turma_id=data.get('turma'),
@@ -984,6 +1102,22 @@ class CanalComunicacaoViewSet(viewsets.ModelViewSet):
             permite_entrega_trabalhos=data.get('permite_entrega_trabalhos', False)
         )
 
+        if data['tipo'] == 'INDIVIDUAL':
+            # Busca ou cria pelo índice único do par (seguro com criações simultâneas)
+            canal, criado = CanalComunicacao.objects.get_or_create(
+                tipo='INDIVIDUAL',
+                chave_individual=CanalComunicacao.chave_par(request.user.id, data['participantes_ids'][0]),
+                defaults=campos
+            )
+            if not criado:
+                return Response({
+                    'success': True,
+                    'message': 'Canal já existe',
+                    'canal': CanalComunicacaoSerializer(canal, context={'request': request}).data
+                })
+        else:
+            canal = CanalComunicacao.objects.create(tipo=data['tipo'], **campos)
+
         # Adicionar criador como admin
         ParticipanteCanal.objects.create(
             canal=canal,
@@ -1000,6 +1134,9 @@ class CanalComunicacaoViewSet(viewsets.ModelViewSet):
                 papel='MEMBRO',
                 adicionado_por=request.user
             )
+        canal.registrar_participantes(1 + len(data.get('participantes_ids', [])))
+        badges.participacoes_alteradas([request.user.id, *data.get('participantes_ids', [])])
+        acessos_alterados([request.user.id, *data.get('participantes_ids', [])])
 
         # Criar responsável se for canal com professor
         if request.user.role == 'PROFESSOR' or any(
@@ -1016,7 +1153,7 @@ class CanalComunicacaoViewSet(viewsets.ModelViewSet):
             )
 
         # Auditoria
-        AuditoriaConversa.objects.create(
+        registrar_auditoria(
             usuario=request.user,
             acao='CANAL_CRIADO',
             canal=canal,
@@ -1030,6 +1167,42 @@ class CanalComunicacaoViewSet(viewsets.ModelViewSet):
         }, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=['post'])
+    def solicitar_upload(self, request, pk=None):
+        """
+        URL assinada para enviar um anexo direto ao Storage
+
+        O arquivo não passa pelo Django: o cliente envia o arquivo para
+        `url_upload` e depois informa a `chave_upload` em `anexos` do
+        enviar_mensagem (ou em mensagens-canal/{id}/confirmar_anexo).
+        """
+        canal = self.get_object()
+
+        if not canal.pode_enviar_mensagem(request.user):
+            return Response({
+                'success': False,
+                'message': 'Você não tem permissão para enviar mensagens neste canal'
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        if not canal.permite_anexos:
+            return Response({
+                'success': False,
+                'message': 'Este canal não permite anexos'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = SolicitarUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        return Response({
+            'success': True,
+            'upload': solicitar_upload(
+                canal, request.user, data['nome_arquivo'],
+                sha256=data.get('sha256'), tamanho=data.get('tamanho')
+            )
+        })
+
+    @action(detail=True, methods=['post'])
+    @transaction.atomic
     def enviar_mensagem(self, request, pk=None):
         """Envia mensagem no canal"""
         canal = self.get_object()
@@ -1045,6 +1218,19 @@ class CanalComunicacaoViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
 
+        # Anexos enviados direto ao Storage (chave_upload): metadados vêm do objeto armazenado
+        anexos_data = []
+        for anexo_data in data.get('anexos', []):
+            if 'chave_upload' in anexo_data:
+                try:
+                    anexo_data = {**anexo_data, **confirmar_upload(anexo_data['chave_upload'], canal, request.user)}
+                except UploadInvalido as e:
+                    return Response({
+                        'success': False,
+                        'message': str(e)
+                    }, status=status.HTTP_400_BAD_REQUEST)
+            anexos_data.append(anexo_data)
+
         # Criar mensagem
         mensagem = MensagemCanal.objects.create(
             canal=canal,
@@ -1058,38 +1244,44 @@ class CanalComunicacaoViewSet(viewsets.ModelViewSet):
         )
 
         # Processar anexos
-        anexos_data = data.get('anexos', [])
         for anexo_data in anexos_data:
-            AnexoMensagem.objects.create(
-                mensagem=mensagem,
-                tipo=anexo_data['tipo'],
-                nome_arquivo=anexo_data['nome_arquivo'],
-                url=anexo_data['url'],
-                tamanho=anexo_data['tamanho'],
-                mime_type=anexo_data['mime_type'],
-                e_trabalho=anexo_data.get('e_trabalho', False),
-                atividade_id=anexo_data.get('atividade_id')
-            )
-
-        # Atualizar timestamp do canal
-        canal.ultima_mensagem_em = timezone.now()
-        canal.save()
-
-        # Criar notificações para participantes
-        participantes = canal.participantes.filter(ativo=True).exclude(usuario=request.user)
-        for participante in participantes:
-            if participante.notificar:
-                NotificacaoComunicacao.objects.create(
-                    usuario=participante.usuario,
-                    tipo='NOVA_MENSAGEM',
-                    canal=canal,
-                    mensagem=mensagem,
-                    titulo=f"Nova mensagem de {request.user.get_full_name()}",
-                    conteudo=data['conteudo'][:200]
+            try:
+                anexo = criar_anexo(
+                    mensagem,
+                    tipo=anexo_data['tipo'],
+                    nome_arquivo=anexo_data['nome_arquivo'],
+                    url=anexo_data['url'],
+                    caminho=anexo_data.get('caminho', ''),
+                    tamanho=anexo_data['tamanho'],
+                    mime_type=anexo_data['mime_type'],
+                    objeto=anexo_data['objeto'] if 'chave_upload' in anexo_data else None,
+                    e_trabalho=anexo_data.get('e_trabalho', False),
+                    atividade_id=anexo_data.get('atividade_id')
                 )
+            except UploadInvalido as e:
+                transaction.set_rollback(True)  # Descarta a mensagem já criada
+                return Response({
+                    'success': False,
+                    'message': str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+            agendar_processamento(anexo)
+
+        # Resumo do canal e contadores de não lidas dos participantes
+        canal.registrar_nova_mensagem(mensagem)
+        badges.nova_mensagem_canal(canal.id, request.user.id)
+
+        # Notificações dos participantes (expandidas fora da requisição)
+        enfileirar_notificacoes_canal(
+            canal,
+            tipo='NOVA_MENSAGEM',
+            titulo=f"Nova mensagem de {request.user.get_full_name()}",
+            conteudo=data['conteudo'][:200],
+            mensagem=mensagem,
+            remetente=request.user
+        )
 
         # Auditoria
-        AuditoriaConversa.objects.create(
+        registrar_auditoria(
             usuario=request.user,
             acao='MENSAGEM_ENVIADA',
             canal=canal,
@@ -1098,9 +1290,14 @@ class CanalComunicacaoViewSet(viewsets.ModelViewSet):
             ip_address=self.get_client_ip(request)
         )
 
+        dados_mensagem = MensagemCanalSerializer(mensagem, context={'request': request}).data
+
+        # Tempo real (entregue após o commit)
+        publicar_evento_canal(canal, 'mensagem.nova', dados_mensagem)
+
         return Response({
             'success': True,
-            'mensagem': MensagemCanalSerializer(mensagem, context={'request': request}).data
+            'mensagem': dados_mensagem
         }, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=['get'])
@@ -1115,38 +1312,81 @@ class CanalComunicacaoViewSet(viewsets.ModelViewSet):
                 'message': 'Você não tem permissão para visualizar este canal'
             }, status=status.HTTP_403_FORBIDDEN)
 
-        # Paginação
-        pagina = int(request.query_params.get('pagina', 1))
-        por_pagina = int(request.query_params.get('por_pagina', 50))
-        inicio = (pagina - 1) * por_pagina
-        fim = inicio + por_pagina
+        # Paginação por cursor (enviada_em, id)
+        direcao = request.query_params.get('direcao', 'anteriores')
+        if direcao not in ['anteriores', 'posteriores']:
+            return Response({
+                'success': False,
+                'message': "direcao deve ser 'anteriores' ou 'posteriores'"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if direcao == 'posteriores' and not request.query_params.get('cursor'):
+            return Response({
+                'success': False,
+                'message': "direcao 'posteriores' exige um cursor"
+            }, status=status.HTTP_400_BAD_REQUEST)
 
+        # Respostas, anexos e visualizações vêm em lote (carregar_threads)
         mensagens = canal.mensagens.filter(excluida=False).select_related(
-            'remetente'
-        ).prefetch_related(
-            'anexos', 'respostas'
-        ).order_by('-enviada_em')[inicio:fim]
+            'remetente', 'respondendo_a__remetente'
+        )
+
+        try:
+            por_pagina = min(max(int(request.query_params.get('por_pagina', 50)), 1), 100)
+            profundidade = min(max(int(
+                request.query_params.get('profundidade', settings.MENSAGENS_PROFUNDIDADE_THREAD)
+            ), 0), 5)
+            pagina = paginar_keyset(
+                mensagens,
+                ['enviada_em', 'id'],
+                cursor=request.query_params.get('cursor'),
+                direcao=direcao,
+                limite=por_pagina
+            )
+        except ValueError:
+            return Response({
+                'success': False,
+                'message': 'Cursor, por_pagina ou profundidade inválido'
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer = MensagemCanalSerializer(mensagens, many=True, context={'request': request})
+        serializer = MensagemCanalSerializer(pagina['itens'], many=True, context={
+            'request': request,
+            'profundidade_thread': profundidade
+        })
+
+        # Confirmações de leitura da página (uma consulta para todas as mensagens)
+        Visualizacao.registrar(
+            [m.id for m in pagina['itens'] if m.remetente_id != request.user.id],
+            request.user
+        )
 
         # Marcar como lidas
-        canal.marcar_como_lida(request.user)
+        notificacoes_lidas = canal.marcar_como_lida(request.user)
+        badges.canal_lido(canal.id, request.user.id, notificacoes_lidas)
+
+        # Contagem exata é opcional; o resumo do canal já traz o total
+        if request.query_params.get('total_exato') == 'true':
+            total = canal.mensagens.filter(excluida=False).count()
+        else:
+            total = canal.total_mensagens
 
         return Response({
             'success': True,
             'mensagens': serializer.data,
-            'pagina': pagina,
             'por_pagina': por_pagina,
-            'total': canal.mensagens.filter(excluida=False).count()
+            'tem_mais': pagina['tem_mais'],
+            'cursor_anteriores': pagina['cursor_anteriores'],
+            'cursor_posteriores': pagina['cursor_posteriores'],
+            'total': total
         })
 
     @action(detail=True, methods=['post'])
+    @transaction.atomic
     def adicionar_participantes(self, request, pk=None):
         """Adiciona participantes ao canal"""
         canal = self.get_object()
 
         # Apenas admin ou gestor/coordenador
-        if not (canal.administradores.filter(id=request.user.id).exists() or
+        if not (canal.e_administrador(request.user) or
                 request.user.role in ['SUPERUSER', 'GESTOR', 'COORDENADOR']):
             return Response({
                 'success': False,
@@ -1168,12 +1408,22 @@ class CanalComunicacaoViewSet(viewsets.ModelViewSet):
                     'notificar': data['notificar']
                 }
             )
+            if not created and not participante.ativo:
+                # Volta ao canal: começa sem não lidas, como um participante novo
+                agora = timezone.now()
+                ParticipanteCanal.objects.filter(pk=participante.pk).update(
+                    ativo=True, removido_em=None, papel=data['papel'], adicionado_por=request.user,
+                    adicionado_em=agora, lida_ate=agora, nao_lidas=0, ultima_atividade_em=agora
+                )
+                participante.refresh_from_db()
+                created = True
+
             if created:
                 adicionados.append(participante)
 
                 # Notificar novo participante
                 if data['notificar']:
-                    NotificacaoComunicacao.objects.create(
+                    notificar(
                         usuario_id=usuario_id,
                         tipo='CANAL_CRIADO',
                         canal=canal,
@@ -1182,7 +1432,7 @@ class CanalComunicacaoViewSet(viewsets.ModelViewSet):
                     )
 
                 # Auditoria
-                AuditoriaConversa.objects.create(
+                registrar_auditoria(
                     usuario=request.user,
                     acao='PARTICIPANTE_ADICIONADO',
                     canal=canal,
@@ -1190,17 +1440,58 @@ class CanalComunicacaoViewSet(viewsets.ModelViewSet):
                     ip_address=self.get_client_ip(request)
                 )
 
+        canal.registrar_participantes(len(adicionados))
+        badges.participacoes_alteradas([p.usuario_id for p in adicionados])
+        acessos_alterados([p.usuario_id for p in adicionados])
+
         return Response({
             'success': True,
             'message': f'{len(adicionados)} participante(s) adicionado(s)',
             'participantes': ParticipanteCanalSerializer(adicionados, many=True).data
         })
 
+    @action(detail=True, methods=['post'])
+    @transaction.atomic
+    def remover_participantes(self, request, pk=None):
+        """Remove participantes do canal (qualquer participante pode remover a si mesmo)"""
+        canal = self.get_object()
+
+        serializer = RemoverParticipantesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        usuarios_ids = serializer.validated_data['usuarios_ids']
+
+        so_si_mesmo = usuarios_ids == [request.user.id]
+        if not (so_si_mesmo or canal.e_administrador(request.user) or
+                request.user.role in ['SUPERUSER', 'GESTOR', 'COORDENADOR']):
+            return Response({
+                'success': False,
+                'message': 'Você não tem permissão para remover participantes'
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        removidos = canal.remover_participantes(usuarios_ids)
+        for usuario_id in removidos:
+            registrar_auditoria(
+                usuario=request.user,
+                acao='PARTICIPANTE_REMOVIDO',
+                canal=canal,
+                detalhes={'usuario_removido_id': str(usuario_id)},
+                ip_address=self.get_client_ip(request)
+            )
+
+        badges.participacoes_alteradas(removidos)
+        acessos_alterados(removidos)
+
+        return Response({
+            'success': True,
+            'message': f'{len(removidos)} participante(s) removido(s)'
+        })
+
     @action(detail=True, methods=['post'])
     def marcar_como_lida(self, request, pk=None):
         """Marca todas as mensagens como lidas"""
         canal = self.get_object()
-        canal.marcar_como_lida(request.user)
+        notificacoes_lidas = canal.marcar_como_lida(request.user)
+        badges.canal_lido(canal.id, request.user.id, notificacoes_lidas)
 
         return Response({
             'success': True,
@@ -1232,7 +1523,7 @@ class CanalComunicacaoViewSet(viewsets.ModelViewSet):
         responsavel.assumir(request.user, serializer.validated_data.get('motivo', ''))
 
         # Notificar responsável original
-        NotificacaoComunicacao.objects.create(
+        notificar(
             usuario=responsavel.responsavel_original,
             tipo='CONVERSA_ASSUMIDA',
             canal=canal,
@@ -1241,7 +1532,7 @@ class CanalComunicacaoViewSet(viewsets.ModelViewSet):
         )
 
         # Auditoria
-        AuditoriaConversa.objects.create(
+        registrar_auditoria(
             usuario=request.user,
             acao='CONVERSA_ASSUMIDA',
             canal=canal,
@@ -1273,7 +1564,7 @@ class CanalComunicacaoViewSet(viewsets.ModelViewSet):
         responsavel.devolver()
 
         # Notificar responsável original
-        NotificacaoComunicacao.objects.create(
+        notificar(
             usuario=responsavel.responsavel_original,
             tipo='CONVERSA_ASSUMIDA',  # Reutiliza tipo
             canal=canal,
@@ -1282,7 +1573,7 @@ class CanalComunicacaoViewSet(viewsets.ModelViewSet):
         )
 
         # Auditoria
-        AuditoriaConversa.objects.create(
+        registrar_auditoria(
             usuario=request.user,
             acao='CONVERSA_DEVOLVIDA',
             canal=canal,
@@ -1297,29 +1588,81 @@ class CanalComunicacaoViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def meus_canais(self, request):
-        """Lista canais do usuário com estatísticas"""
-        canais = self.get_queryset().annotate(
-            total_nao_lidas=Count(
-                'mensagens',
-                filter=Q(mensagens__lida=False) & ~Q(mensagens__remetente=request.user)
-            )
-        )
+        """
+        Caixa de entrada: canais em que o usuário participa
+
+        Fixados primeiro e depois por última atividade, lidos direto das
+        participações (índice participante_caixa_entrada), sem varrer as
+        mensagens. Use `proximo_cursor` como `cursor` para a página seguinte.
+        """
+        participacoes = ParticipanteCanal.objects.filter(
+            usuario=request.user, ativo=True
+        ).select_related('canal')
 
         # Filtros
         tipo = request.query_params.get('tipo')
         if tipo:
-            canais = canais.filter(tipo=tipo)
+            participacoes = participacoes.filter(canal__tipo=tipo)
 
         status_filter = request.query_params.get('status')
         if status_filter:
-            canais = canais.filter(status=status_filter)
+            participacoes = participacoes.filter(canal__status=status_filter)
+
+        try:
+            por_pagina = min(max(int(request.query_params.get('por_pagina', 50)), 1), 100)
+            pagina = paginar_keyset(
+                participacoes,
+                ['fixado', 'ultima_atividade_em', 'id'],
+                cursor=request.query_params.get('cursor'),
+                limite=por_pagina
+            )
+        except ValueError:
+            return Response({
+                'success': False,
+                'message': 'Cursor ou por_pagina inválido'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Mesmos campos que o get_queryset anota a partir da participação
+        canais = []
+        for participacao in pagina['itens']:
+            canal = participacao.canal
+            canal.total_nao_lidas = participacao.nao_lidas
+            canal.meu_papel = participacao.papel
+            canal.meu_fixado = participacao.fixado
+            canal.meu_silenciado = participacao.silenciado
+            canais.append(canal)
 
         serializer = self.get_serializer(canais, many=True)
 
         return Response({
             'success': True,
             'canais': serializer.data,
-            'total': canais.count()
+            'total': participacoes.count(),
+            'tem_mais': pagina['tem_mais'],
+            'proximo_cursor': pagina['cursor_anteriores'] if pagina['tem_mais'] else None
+        })
+
+    @action(detail=True, methods=['post'])
+    def preferencias(self, request, pk=None):
+        """Fixa, silencia ou desativa as notificações do canal para o usuário"""
+        canal = self.get_object()
+
+        serializer = PreferenciasCanalSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        participacao = ParticipanteCanal.objects.filter(canal=canal, usuario=request.user)
+        if not participacao.exists():
+            return Response({
+                'success': False,
+                'message': 'Você não participa deste canal'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if serializer.validated_data:
+            participacao.update(**serializer.validated_data)
+
+        return Response({
+            'success': True,
+            'preferencias': participacao.values('fixado', 'silenciado', 'notificar').first()
         })
 
     @action(detail=False, methods=['get'])
@@ -1331,13 +1674,10 @@ class CanalComunicacaoViewSet(viewsets.ModelViewSet):
                 'message': 'Acesso negado'
             }, status=status.HTTP_403_FORBIDDEN)
 
-        # Conversas com SLA vencido ou próximo
-        from datetime import timedelta
-        limite = timezone.now() - timedelta(hours=20)
-
+        # Conversas marcadas pelo verificar_sla (índice parcial de atrasadas)
         canais_pendentes = self.get_queryset().filter(
-            responsaveis__atrasado=True
-        ).distinct()
+            Exists(ResponsavelConversa.objects.filter(canal=OuterRef('pk'), ativo=True, atrasado=True))
+        )
 
         serializer = CanalComunicacaoListSerializer(canais_pendentes, many=True, context={'request': request})
 
@@ -1347,6 +1687,95 @@ class CanalComunicacaoViewSet(viewsets.ModelViewSet):
             'total': canais_pendentes.count()
         })
 
+    @action(detail=False, methods=['get'])
+    def sync(self, request):
+        """
+        Delta-sync: canais, mensagens e notificações alterados após `since`
+
+        Sem `since` retorna o estado inicial (canais e notificações não lidas;
+        o histórico vem de `mensagens`). Mensagens excluídas voltam apenas como
+        {id, canal, excluida_em}. Enquanto `tem_mais` for true, chame de novo
+        com a `marca` retornada. Itens podem se repetir entre chamadas (janela
+        de sobreposição) e devem ser aplicados pelo id.
+        """
+        user = request.user
+        since = request.query_params.get('since')
+
+        try:
+            marca, continuar_em, continuar_id = decodificar_cursor(since, 3) if since else (None, None, None)
+            marca = parse_datetime(marca) if marca else None
+            continuar_em = parse_datetime(continuar_em) if continuar_em else None
+            if since and marca is None:
+                raise ValueError('Marca inválida')
+        except (ValueError, TypeError):
+            return Response({
+                'success': False,
+                'message': 'Marca inválida'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        canais = self.get_queryset()
+        mensagens = MensagemCanal.objects.filter(canal__in=canais.order_by().values('id'))
+        canais_alterados = canais.none()
+        canais_removidos = []
+        notificacoes = NotificacaoComunicacao.objects.none()
+
+        if continuar_em:
+            # Continuação da mesma sincronização: só o restante das mensagens
+            proxima_marca = marca
+            mensagens = mensagens.filter(
+                filtro_keyset(['atualizada_em', 'id'], [continuar_em, continuar_id], maior=True)
+            )
+        else:
+            proxima_marca = timezone.now()
+            notificacoes = NotificacaoComunicacao.objects.filter(usuario=user).select_related('canal')
+
+            if marca:
+                # Cobre transações que confirmaram depois da marca anterior
+                desde = marca - timedelta(seconds=settings.SYNC_SOBREPOSICAO_SEGUNDOS)
+                canais_alterados = canais.filter(
+                    Q(atualizado_em__gt=desde) |
+                    Q(participantes__usuario=user, participantes__ultima_visualizacao__gt=desde)
+                )
+                canais_removidos = ParticipanteCanal.objects.filter(
+                    usuario=user, ativo=False, removido_em__gt=desde
+                ).values_list('canal_id', flat=True)
+                mensagens = mensagens.filter(atualizada_em__gt=desde)
+                notificacoes = notificacoes.filter(atualizada_em__gt=desde)
+            else:
+                canais_alterados = canais
+                mensagens = mensagens.none()
+                notificacoes = notificacoes.filter(lida=False)
+
+        limite = settings.SYNC_LIMITE_MENSAGENS
+        lote = list(
+            mensagens.select_related('remetente', 'respondendo_a__remetente').order_by(
+                'atualizada_em', 'id'
+            )[:limite + 1]
+        )
+        tem_mais = len(lote) > limite
+        lote = lote[:limite]
+
+        if tem_mais:
+            nova_marca = codificar_cursor([proxima_marca, lote[-1].atualizada_em, lote[-1].id])
+        else:
+            nova_marca = codificar_cursor([proxima_marca, None, None])
+
+        return Response({
+            'success': True,
+            'canais': self.get_serializer(canais_alterados.distinct(), many=True).data,
+            'canais_removidos': [str(canal_id) for canal_id in canais_removidos],
+            'mensagens': MensagemCanalSerializer(
+                [m for m in lote if not m.excluida], many=True, context={'request': request}
+            ).data,
+            'mensagens_excluidas': [
+                {'id': str(m.id), 'canal': str(m.canal_id), 'excluida_em': m.excluida_em}
+                for m in lote if m.excluida
+            ],
+            'notificacoes': NotificacaoComunicacaoSerializer(notificacoes, many=True).data,
+            'tem_mais': tem_mais,
+            'marca': nova_marca
+        })
+
     def get_client_ip(self, request):
         """Obtém IP do cliente"""
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -1359,7 +1788,7 @@ class CanalComunicacaoViewSet(viewsets.ModelViewSet):
 
 class MensagemCanalViewSet(viewsets.ModelViewSet):
     """ViewSet para mensagens"""
-    queryset = MensagemCanal.objects.select_related('remetente', 'canal').all()
+    queryset = MensagemCanal.objects.select_related('remetente', 'canal', 'respondendo_a__remetente').all()
     serializer_class = MensagemCanalSerializer
     permission_classes = [IsAuthenticated]
 
@@ -1378,6 +1807,53 @@ class MensagemCanalViewSet(viewsets.ModelViewSet):
 
         return self.queryset.filter(canal_id__in=canais_visiveis, excluida=False)
 
+    @action(detail=False, methods=['get'])
+    def buscar(self, request):
+        """
+        Busca textual nas mensagens dos canais visíveis ao usuário
+
+        Parâmetros: q (sintaxe de buscador: "frase exata", -excluir, or),
+        canal (opcional), cursor e por_pagina. Resultados por relevância,
+        com trecho destacado.
+        """
+        termos = request.query_params.get('q', '').strip()
+        if len(termos) < 2:
+            return Response({
+                'success': False,
+                'message': 'Informe ao menos 2 caracteres para a busca'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        mensagens = self.get_queryset().filter(excluida=False)
+        canal_id = request.query_params.get('canal')
+        if canal_id:
+            mensagens = mensagens.filter(canal_id=canal_id)
+
+        resultados = com_trechos(buscar_mensagens(mensagens, termos), termos)
+
+        try:
+            por_pagina = min(max(int(request.query_params.get('por_pagina', 20)), 1), 50)
+            pagina = paginar_keyset(
+                resultados,
+                ['relevancia', 'enviada_em', 'id'],
+                cursor=request.query_params.get('cursor'),
+                limite=por_pagina
+            )
+        except ValueError:
+            return Response({
+                'success': False,
+                'message': 'Cursor ou por_pagina inválido'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = ResultadoBuscaMensagemSerializer(pagina['itens'], many=True)
+
+        return Response({
+            'success': True,
+            'resultados': serializer.data,
+            'por_pagina': por_pagina,
+            'tem_mais': pagina['tem_mais'],
+            'proximo_cursor': pagina['cursor_anteriores'] if pagina['tem_mais'] else None
+        })
+
     @action(detail=True, methods=['put'])
     def editar(self, request, pk=None):
         """Edita mensagem"""
@@ -1402,7 +1878,7 @@ class MensagemCanalViewSet(viewsets.ModelViewSet):
         mensagem.save()
 
         # Auditoria
-        AuditoriaConversa.objects.create(
+        registrar_auditoria(
             usuario=request.user,
             acao='MENSAGEM_EDITADA',
             canal=mensagem.canal,
@@ -1410,12 +1886,63 @@ class MensagemCanalViewSet(viewsets.ModelViewSet):
             detalhes={'conteudo_anterior': mensagem.conteudo}
         )
 
+        dados_mensagem = self.get_serializer(mensagem).data
+        publicar_evento_canal(mensagem.canal, 'mensagem.editada', dados_mensagem)
+
         return Response({
             'success': True,
-            'mensagem': self.get_serializer(mensagem).data
+            'mensagem': dados_mensagem
         })
 
+    @action(detail=True, methods=['post'])
+    def confirmar_anexo(self, request, pk=None):
+        """Anexa à mensagem um arquivo já enviado ao Storage (ver solicitar_upload)"""
+        mensagem = self.get_object()
+
+        if mensagem.remetente_id != request.user.id:
+            return Response({
+                'success': False,
+                'message': 'Apenas o remetente pode anexar arquivos'
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = ConfirmarAnexoSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        try:
+            arquivo = confirmar_upload(data['chave_upload'], mensagem.canal, request.user)
+        except UploadInvalido as e:
+            return Response({
+                'success': False,
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            try:
+                anexo = criar_anexo(
+                    mensagem,
+                    e_trabalho=data['e_trabalho'],
+                    atividade_id=data.get('atividade_id'),
+                    **arquivo
+                )
+            except UploadInvalido as e:
+                return Response({
+                    'success': False,
+                    'message': str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+            agendar_processamento(anexo)
+            mensagem.save(update_fields=['atualizada_em'])
+
+            dados_mensagem = self.get_serializer(mensagem).data
+            publicar_evento_canal(mensagem.canal, 'mensagem.editada', dados_mensagem)
+
+        return Response({
+            'success': True,
+            'anexo': AnexoMensagemSerializer(anexo).data
+        }, status=status.HTTP_201_CREATED)
+
     @action(detail=True, methods=['delete'])
+    @transaction.atomic
     def excluir(self, request, pk=None):
         """Exclui (soft delete) mensagem"""
         mensagem = self.get_object()
@@ -1426,12 +1953,16 @@ class MensagemCanalViewSet(viewsets.ModelViewSet):
                 'message': 'Você não pode excluir esta mensagem'
             }, status=status.HTTP_403_FORBIDDEN)
 
+        if not mensagem.excluida:
+            mensagem.canal.registrar_mensagem_excluida(mensagem)
+            badges.canal_alterado(mensagem.canal_id)
+
         mensagem.excluida = True
         mensagem.excluida_em = timezone.now()
         mensagem.save()
 
         # Auditoria
-        AuditoriaConversa.objects.create(
+        registrar_auditoria(
             usuario=request.user,
             acao='MENSAGEM_EXCLUIDA',
             canal=mensagem.canal,
@@ -1439,6 +1970,8 @@ class MensagemCanalViewSet(viewsets.ModelViewSet):
             detalhes={'conteudo': mensagem.conteudo}
         )
 
+        publicar_evento_canal(mensagem.canal, 'mensagem.excluida', {'id': str(mensagem.id)})
+
         return Response({
             'success': True,
             'message': 'Mensagem excluída'
@@ -1456,20 +1989,44 @@ class NotificacaoComunicacaoViewSet(viewsets.ReadOnlyModelViewSet):
 
     @action(detail=False, methods=['get'])
     def nao_lidas(self, request):
-        """Lista notificações não lidas"""
-        notificacoes = self.get_queryset().filter(lida=False).order_by('-criada_em')
-        serializer = self.get_serializer(notificacoes, many=True)
+        """
+        Lista notificações não lidas (agrupadas por canal e tipo)
+
+        Mais recentes primeiro; `quantidade` indica quantos eventos cada uma
+        agrupa. Use `proximo_cursor` como `cursor` para a página seguinte.
+        """
+        notificacoes = self.get_queryset().filter(lida=False)
+
+        try:
+            por_pagina = min(max(int(request.query_params.get('por_pagina', 50)), 1), 100)
+            pagina = paginar_keyset(
+                notificacoes,
+                ['atualizada_em', 'id'],
+                cursor=request.query_params.get('cursor'),
+                limite=por_pagina
+            )
+        except ValueError:
+            return Response({
+                'success': False,
+                'message': 'Cursor ou por_pagina inválido'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = self.get_serializer(pagina['itens'], many=True)
 
         return Response({
             'success': True,
             'notificacoes': serializer.data,
-            'total': notificacoes.count()
+            'total': notificacoes.count(),
+            'tem_mais': pagina['tem_mais'],
+            'proximo_cursor': pagina['cursor_anteriores'] if pagina['tem_mais'] else None
         })
 
     @action(detail=True, methods=['post'])
     def marcar_lida(self, request, pk=None):
         """Marca notificação como lida"""
         notificacao = self.get_object()
+        if not notificacao.lida:
+            badges.notificacoes_lidas(request.user.id, notificacao.quantidade)
         notificacao.marcar_como_lida()
 
         return Response({
@@ -1480,10 +2037,13 @@ class NotificacaoComunicacaoViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['post'])
     def marcar_todas_lidas(self, request):
         """Marca todas como lidas"""
+        agora = timezone.now()
         self.get_queryset().filter(lida=False).update(
             lida=True,
-            lida_em=timezone.now()
+            lida_em=agora,
+            atualizada_em=agora
         )
+        badges.todas_notificacoes_lidas(request.user.id)
 
         return Response({
             'success': True,
@@ -1491,6 +2051,16 @@ class NotificacaoComunicacaoViewSet(viewsets.ReadOnlyModelViewSet):
         })
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def badges_view(request):
+    """
+    Contadores de não lidos para os badges do app (notificações, mensagens
+    diretas e por canal), servidos do cache
+    """
+    return Response({'success': True, **badges.obter_badges(request.user)})
+
+
 class AuditoriaConversaViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet para auditoria (apenas gestores)"""
     queryset = AuditoriaConversa.objects.select_related('usuario', 'canal').all()